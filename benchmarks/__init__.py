@@ -0,0 +1,4 @@
+"""Benchmarks hors ligne de crapy (`python -m benchmarks <cible>`).
+
+Séparés du scraper : ils importent `crapy` comme n'importe quel utilisateur, et leurs corpus
+figés (`data/`) servent de référence aux mesures de non-régression."""
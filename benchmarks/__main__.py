@@ -0,0 +1,114 @@
+"""`python -m benchmarks <cible>` : voir `python -m benchmarks --help`."""
+
+import argparse
+import asyncio
+import sys
+
+from .baseline import BENCH_TOLERANCE, compare_baseline, save_baseline
+from .bench import bench_challenge, bench_e2e, bench_extract, bench_hrefs_async, bench_inpage_async, bench_micro
+from .corpus import BASELINE_PATH, CHALLENGE_CORPUS_DIR, SITE_CORPUS_DIR, make_site_corpus, save_site_corpus
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="benchmarks hors ligne de crapy")
+    sub = parser.add_subparsers(dest="target", required=True)
+    extract = sub.add_parser("extract", help="parse + extraction : BeautifulSoup vs plan compilé lxml")
+    extract.add_argument("files", nargs="*", help="fiches HTML sauvegardées (défaut: pages synthétiques)")
+    extract.add_argument("--size-mb", type=float, default=2.0, help="taille des pages synthétiques")
+    extract.add_argument("--pages", type=int, default=5, help="nb de pages synthétiques")
+    extract.add_argument("--repeat", type=int, default=3, help="répétitions par mesure (médiane)")
+    hrefs = sub.add_parser("hrefs", help="résolution des liens d'un listing : par lien vs groupée")
+    hrefs.add_argument("--url", default="", help="listing réel à ouvrir (défaut: listing synthétique hors ligne)")
+    hrefs.add_argument("--file", help="listing HTML sauvegardé, servi hors ligne (à l'adresse --url si donnée)")
+    hrefs.add_argument("--repeat", type=int, default=3, help="répétitions par mesure (médiane)")
+    hrefs.add_argument("--headful", action="store_true", help="affiche le navigateur")
+    challenge = sub.add_parser("challenge", help="détection des pages de challenge : précision et temps")
+    challenge.add_argument("--corpus", default=CHALLENGE_CORPUS_DIR,
+                           help="corpus sauvegardé (<dir>/challenge/*.html, <dir>/normal/*.html) ; "
+                                "défaut: le corpus étiqueté de benchmarks/data/challenge")
+    challenge.add_argument("--synthetic", action="store_true", help="corpus synthétique généré à la volée")
+    challenge.add_argument("--save", default="", help="écrit le corpus utilisé dans ce dossier")
+    challenge.add_argument("--repeat", type=int, default=5, help="répétitions par mesure (médiane)")
+
+    site_opts = argparse.ArgumentParser(add_help=False)
+    site_opts.add_argument("--corpus", default=SITE_CORPUS_DIR,
+                           help="mini-site enregistré (listings + fiches) ; défaut: le corpus figé de benchmarks/data/site")
+    site_opts.add_argument("--synthetic", action="store_true", help="mini-site synthétique généré à la volée")
+    baseline_opts = argparse.ArgumentParser(add_help=False)
+    baseline_opts.add_argument("--baseline", nargs="?", const=BASELINE_PATH,
+                               help=f"JSON de référence : code retour 1 en cas de régression (sans valeur: {BASELINE_PATH})")
+    baseline_opts.add_argument("--save-baseline", nargs="?", const=BASELINE_PATH,
+                               help="enregistre les mesures comme référence dans ce JSON (sans valeur: le même)")
+    baseline_opts.add_argument("--tolerance", type=float, default=BENCH_TOLERANCE,
+                               help=f"écart toléré avant de signaler une régression (défaut: {BENCH_TOLERANCE:.0%})")
+
+    inpage = sub.add_parser("inpage", parents=[site_opts], help="extraction dans la page vs page.content() + Python")
+    inpage.add_argument("--repeat", type=int, default=3, help="répétitions par mesure (médiane)")
+    inpage.add_argument("--headful", action="store_true", help="affiche le navigateur")
+    corpus = sub.add_parser("corpus", help="écrit un mini-site synthétique (listings + fiches) sur disque")
+    corpus.add_argument("--out", required=True, help="dossier de sortie")
+    corpus.add_argument("--listings", type=int, default=3, help="pages listing")
+    corpus.add_argument("--per-page", type=int, default=20, help="fiches par page listing")
+    corpus.add_argument("--product-kb", type=int, default=200, help="taille d'une fiche (Ko)")
+    corpus.add_argument("--seed", type=int, default=0)
+    micro = sub.add_parser("micro", parents=[site_opts, baseline_opts],
+                           help="micro-benchmarks des helpers (extraction, profil, liens, filtre)")
+    micro.add_argument("--repeat", type=int, default=20, help="répétitions par mesure (médiane)")
+    e2e = sub.add_parser("e2e", parents=[site_opts, baseline_opts],
+                         help="crawl Playwright complet contre le corpus servi en local")
+    e2e.add_argument("--latency-ms", type=float, default=50, help="latence simulée du serveur local")
+    e2e.add_argument("--concurrency", type=int, default=4, help="pages visitées en parallèle")
+    e2e.add_argument("--wait-ms", type=int, default=500, help="attente max après chargement (ms)")
+    e2e.add_argument("--fetch", choices=["browser", "auto"], default="browser")
+    e2e.add_argument("--headful", action="store_true", help="affiche le navigateur")
+    return parser
+
+
+def run_bench(args) -> int:
+    corpus_dir = "" if getattr(args, "synthetic", False) else getattr(args, "corpus", "")
+    if args.target == "extract":
+        bench_extract(args.files, size_mb=args.size_mb, pages=args.pages, repeat=args.repeat)
+    elif args.target == "hrefs":
+        html = ""
+        if args.file:
+            with open(args.file, encoding="utf-8", errors="replace") as f:
+                html = f.read()
+        asyncio.run(bench_hrefs_async(url=args.url, html=html, repeat=args.repeat, headless=not args.headful))
+    elif args.target == "challenge":
+        summary = bench_challenge(corpus_dir, args.save, repeat=args.repeat)
+        # Code retour non nul si la détection actuelle se trompe sur le corpus.
+        current = summary["classify_challenge"]
+        if current["false_positive_rate"] or current["false_negative_rate"]:
+            return 1
+    elif args.target == "inpage":
+        summary = asyncio.run(bench_inpage_async(corpus_dir, repeat=args.repeat, headless=not args.headful))
+        if summary["mismatches"]:
+            return 1
+    elif args.target == "corpus":
+        pages = make_site_corpus(args.listings, args.per_page, args.product_kb, seed=args.seed)
+        save_site_corpus(pages, args.out)
+        print(f"✓ {len(pages)} page(s) écrite(s) dans {args.out}", file=sys.stderr)
+    else:
+        if args.target == "micro":
+            results = bench_micro(corpus_dir, repeat=args.repeat)
+        else:
+            results = bench_e2e(corpus_dir, latency_ms=args.latency_ms, concurrency=args.concurrency,
+                                wait_ms=args.wait_ms, fetch=args.fetch, headless=not args.headful)
+        if args.save_baseline:
+            save_baseline(args.target, results, args.save_baseline)
+            print(f"référence enregistrée dans {args.save_baseline}")
+        if args.baseline:
+            print(f"comparaison à {args.baseline}:")
+            regressions = compare_baseline(args.target, results, args.baseline, args.tolerance)
+            if regressions:
+                print(f"⚠️ {len(regressions)} régression(s): {', '.join(regressions)}")
+                return 1
+    return 0
+
+
+def main(argv=None) -> int:
+    return run_bench(build_arg_parser().parse_args(argv))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
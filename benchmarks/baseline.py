@@ -0,0 +1,42 @@
+"""Mesures de référence : enregistrement et détection des régressions."""
+
+import json
+import os
+from datetime import datetime, timezone
+
+from crapy import write_json_file
+
+BENCH_TOLERANCE = 0.15
+
+
+def compare_baseline(section: str, results: dict, path: str, tolerance: float = BENCH_TOLERANCE, logger=print) -> list[str]:
+    """Compare aux mesures de référence (section `section` du JSON) ; renvoie les régressions
+    au-delà de `tolerance`. `*_per_s` : plus haut est mieux ; `*_ms`, `*_s`, `*_mb` : plus bas."""
+    with open(path, encoding="utf-8") as f:
+        baseline = json.load(f).get(section, {})
+    regressions = []
+    for key, value in results.items():
+        old = baseline.get(key)
+        if not isinstance(old, (int, float)) or not old:
+            continue
+        change = value / old - 1
+        if key.endswith("_per_s"):
+            worse = change < -tolerance
+        elif key.endswith(("_ms", "_s", "_mb")):
+            worse = change > tolerance
+        else:
+            continue
+        logger(f"  {key:<30} {old:>10.3f} → {value:>10.3f} ({change:+.0%}){'  ⚠️ régression' if worse else ''}")
+        if worse:
+            regressions.append(key)
+    return regressions
+
+
+def save_baseline(section: str, results: dict, path: str) -> None:
+    """Enregistre les mesures comme référence (les autres sections du fichier sont conservées)."""
+    data = {}
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    data[section] = {**results, "recorded_at": datetime.now(timezone.utc).isoformat(timespec="seconds")}
+    write_json_file(path, data)
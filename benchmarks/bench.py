@@ -0,0 +1,410 @@
+"""Mesures : extraction, liens, détection de challenge, extraction dans la page, micro-benchmarks
+et crawl de bout en bout contre un corpus servi en local."""
+
+import http.server
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+from bs4 import BeautifulSoup
+from playwright.async_api import async_playwright
+
+from crapy import (
+    CrawlEngine,
+    ExtractionPlan,
+    HttpClient,
+    Metrics,
+    ProfileStore,
+    UrlCanonicalizer,
+    UrlRules,
+    build_extraction_profile,
+    extract_all_hrefs,
+    extract_in_page,
+    extract_product_info,
+    extract_product_info_soup,
+    filter_by_prefix,
+    hrefs_to_absolute,
+    looks_like_bot_challenge,
+    parse_html,
+    percentile,
+    resolve_hrefs_offline,
+    select_urls,
+)
+
+from .corpus import (
+    BENCH_HOST,
+    BENCH_PRODUCT_PREFIX,
+    load_challenge_corpus,
+    load_site_corpus,
+    make_challenge_corpus,
+    make_listing_page,
+    make_product_page,
+    make_site_corpus,
+    save_challenge_corpus,
+    split_site_corpus,
+)
+
+
+def _timed(fn, repeat: int) -> tuple[float, object]:
+    """Médiane (ms) de `repeat` exécutions, et le dernier résultat."""
+    timings = []
+    result = None
+    for _ in range(max(1, repeat)):
+        t0 = time.perf_counter()
+        result = fn()
+        timings.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(timings), result
+
+
+async def _atimed(fn, repeat: int) -> tuple[float, object]:
+    timings = []
+    result = None
+    for _ in range(max(1, repeat)):
+        t0 = time.perf_counter()
+        result = await fn()
+        timings.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(timings), result
+
+
+async def _hrefs_to_absolute_per_link(page, hrefs: list[str]) -> list[str]:
+    """Ancienne version de `hrefs_to_absolute` (un page.evaluate par lien), gardée pour le benchmark."""
+    abs_links = []
+    for h in hrefs:
+        if not h:
+            continue
+        h = h.strip()
+        if h.startswith(("javascript:", "mailto:", "tel:")):
+            continue
+        absu = await page.evaluate("(href) => new URL(href, window.location.href).href", h)
+        abs_links.append(absu.split("#")[0])
+    return abs_links
+
+
+async def bench_hrefs_async(url: str = "", html: str = "", repeat: int = 3, headless: bool = True, logger=print) -> dict:
+    """Coût par page listing de la résolution des liens : un evaluate par lien vs un seul pour tous.
+
+    Si `html` est fourni (ou sans `url`, avec un listing synthétique), la page est servie hors ligne
+    via `page.route`, à l'adresse `url` si elle est donnée.
+    """
+    offline = bool(html) or not url
+    base_url = url or "https://bench.crapy.invalid/jeux-jouets/jardin/page1.htm"
+    html = html or make_listing_page()
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=headless)
+        try:
+            page = await browser.new_page()
+            if offline:
+                async def serve(route):
+                    if route.request.url == base_url:
+                        await route.fulfill(status=200, content_type="text/html; charset=utf-8", body=html)
+                    else:
+                        await route.abort()
+
+                await page.route("**/*", serve)
+            await page.goto(base_url, wait_until="domcontentloaded")
+            hrefs = extract_all_hrefs(await page.content())
+            per_link_ms, expected = await _atimed(lambda: _hrefs_to_absolute_per_link(page, hrefs), repeat)
+            bulk_ms, links = await _atimed(lambda: hrefs_to_absolute(page, hrefs), repeat)
+        finally:
+            await browser.close()
+
+    if links != expected:
+        raise RuntimeError("la résolution groupée ne donne pas les mêmes URLs que la version lien par lien")
+    logger(f"{len(hrefs)} href → {len(links)} URLs absolues (résultats identiques)")
+    logger(f"un evaluate par lien: {per_link_ms:.1f} ms | un seul evaluate: {bulk_ms:.1f} ms "
+           f"| gain {per_link_ms / max(bulk_ms, 0.001):.0f}x")
+    return {"hrefs": len(hrefs), "per_link_ms": per_link_ms, "bulk_ms": bulk_ms}
+
+
+def bench_extract(paths: list[str], size_mb: float = 2.0, pages: int = 5, repeat: int = 3, logger=print) -> dict:
+    """Compare, page par page, BeautifulSoup + select_one (implémentation d'origine) au plan compilé lxml."""
+    if paths:
+        docs = []
+        for path in paths:
+            with open(path, encoding="utf-8", errors="replace") as f:
+                docs.append((path, f.read()))
+    else:
+        docs = [(f"synthetic-{i}.htm", make_product_page(int(size_mb * 1_000_000), seed=i)) for i in range(pages)]
+
+    profile = build_extraction_profile(docs[0][1])
+    plan = ExtractionPlan(profile)
+    totals = {"soup_parse": [], "soup_total": [], "plan_parse": [], "plan_extract": []}
+    logger(f"{'page':<28} {'Ko':>7} {'soup parse':>11} {'soup total':>11} {'lxml parse':>11} {'plan':>8} {'gain':>6}")
+    for name, html in docs:
+        soup_parse, _ = _timed(lambda: BeautifulSoup(html, "lxml"), repeat)
+        soup_total, expected = _timed(lambda: extract_product_info_soup(name, html, profile), repeat)
+        plan_parse, tree = _timed(lambda: parse_html(html), repeat)
+        plan_extract, row = _timed(lambda: plan.run(name, tree), repeat)
+        if row != expected:
+            raise RuntimeError(f"{name}: le plan compilé ne donne pas le même résultat que BeautifulSoup")
+        totals["soup_parse"].append(soup_parse)
+        totals["soup_total"].append(soup_total)
+        totals["plan_parse"].append(plan_parse)
+        totals["plan_extract"].append(plan_extract)
+        logger(
+            f"{os.path.basename(name)[:28]:<28} {len(html) / 1024:>7.0f} {soup_parse:>9.1f}ms {soup_total:>9.1f}ms "
+            f"{plan_parse:>9.1f}ms {plan_extract:>6.1f}ms {soup_total / (plan_parse + plan_extract):>5.1f}x"
+        )
+
+    summary = {key: statistics.median(values) for key, values in totals.items()}
+    logger(
+        f"médiane/page: BeautifulSoup {summary['soup_total']:.1f} ms "
+        f"(dont parse {summary['soup_parse']:.1f}) → plan lxml {summary['plan_parse'] + summary['plan_extract']:.1f} ms "
+        f"(parse {summary['plan_parse']:.1f} + extraction {summary['plan_extract']:.1f})"
+    )
+    return summary
+
+
+def _looks_like_bot_challenge_substrings(html: str) -> bool:
+    """Ancienne détection (mots-clés dans tout le HTML), gardée pour le benchmark."""
+    lowered = html.lower()
+    patterns = ["captcha", "cloudflare", "vérification", "verify you are human", "are you human", "robot", "access denied"]
+    return any(p in lowered for p in patterns)
+
+
+def bench_challenge(corpus_dir: str = "", save_dir: str = "", repeat: int = 5, logger=print) -> dict:
+    """Faux positifs, faux négatifs et temps de classification : ancienne détection par mots-clés
+    vs `classify_challenge`, sur le corpus synthétique ou un corpus sauvegardé."""
+    corpus = load_challenge_corpus(corpus_dir) if corpus_dir else make_challenge_corpus()
+    if save_dir:
+        save_challenge_corpus(corpus, save_dir)
+        logger(f"corpus écrit dans {save_dir}")
+    if not corpus:
+        raise RuntimeError(f"corpus vide: {corpus_dir}")
+    classifiers = {
+        "mots-clés (ancien)": lambda page: _looks_like_bot_challenge_substrings(page["html"]),
+        "classify_challenge": lambda page: looks_like_bot_challenge(page["html"], page["status"], page["headers"]),
+    }
+    n_challenge = sum(1 for page in corpus if page["label"] == "challenge")
+    n_normal = len(corpus) - n_challenge
+    logger(f"{len(corpus)} page(s): {n_challenge} challenge(s), {n_normal} normale(s)")
+    summary = {}
+    for name, classify in classifiers.items():
+        fp, fn, timings = [], [], []
+        for page in corpus:
+            ms, blocked = _timed(lambda: classify(page), repeat)
+            timings.append(ms)
+            if blocked and page["label"] == "normal":
+                fp.append(page["name"])
+            elif not blocked and page["label"] == "challenge":
+                fn.append(page["name"])
+        fp_rate = len(fp) / n_normal if n_normal else 0.0
+        fn_rate = len(fn) / n_challenge if n_challenge else 0.0
+        summary[name] = {
+            "false_positive_rate": fp_rate,
+            "false_negative_rate": fn_rate,
+            "median_ms": statistics.median(timings),
+            "max_ms": max(timings),
+        }
+        logger(
+            f"{name:<20} faux positifs {len(fp)}/{n_normal} ({fp_rate:.0%}) | faux négatifs {len(fn)}/{n_challenge} "
+            f"({fn_rate:.0%}) | {statistics.median(timings) * 1000:.0f} µs médiane, {max(timings):.2f} ms max"
+        )
+        for label, names in (("faux positifs", fp), ("faux négatifs", fn)):
+            if names:
+                logger(f"  {label}: {', '.join(names)}")
+    return summary
+
+
+async def bench_inpage_async(corpus_dir: str = "", repeat: int = 3, headless: bool = True, logger=print) -> dict:
+    """Extraction dans la page vs `page.content()` + `extract_product_info`, sur les fiches du
+    corpus servies hors ligne : champs identiques exigés, octets transférés et temps par fiche."""
+    _, products = split_site_corpus(load_site_corpus(corpus_dir) if corpus_dir else make_site_corpus())
+    pages = {BENCH_HOST + path: html for path, html in products}
+    profile = build_extraction_profile(products[0][1])
+    totals = {"content_bytes": [], "in_page_bytes": [], "content_ms": [], "in_page_ms": []}
+    mismatches = []
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=headless)
+        try:
+            page = await browser.new_page()
+
+            async def serve(route):
+                html = pages.get(route.request.url)
+                if html is None:
+                    await route.abort()
+                else:
+                    await route.fulfill(status=200, content_type="text/html; charset=utf-8", body=html)
+
+            await page.route("**/*", serve)
+            for url in pages:
+                await page.goto(url, wait_until="domcontentloaded")
+
+                async def via_content():
+                    html = await page.content()
+                    return html, extract_product_info(url, html, profile)
+
+                content_ms, (html, expected) = await _atimed(via_content, repeat)
+                in_page_ms, fields = await _atimed(lambda: extract_in_page(page, url, profile), repeat)
+                if fields["row"] != expected:
+                    mismatches.append(url)
+                totals["content_bytes"].append(len(html.encode("utf-8")))
+                totals["in_page_bytes"].append(len(json.dumps(fields, ensure_ascii=False).encode("utf-8")))
+                totals["content_ms"].append(content_ms)
+                totals["in_page_ms"].append(in_page_ms)
+        finally:
+            await browser.close()
+
+    summary = {key: statistics.median(values) for key, values in totals.items()}
+    logger(
+        f"{len(pages)} fiche(s) | content()+Python: {summary['content_bytes'] / 1024:.0f} Ko, "
+        f"{summary['content_ms']:.1f} ms | dans la page: {summary['in_page_bytes'] / 1024:.1f} Ko, "
+        f"{summary['in_page_ms']:.1f} ms (médianes par fiche)"
+    )
+    if mismatches:
+        logger(f"⚠️ champs différents sur {len(mismatches)} fiche(s): {', '.join(mismatches[:5])}")
+    summary["mismatches"] = len(mismatches)
+    return summary
+
+
+def bench_micro(corpus_dir: str = "", repeat: int = 20, logger=print) -> dict:
+    """Temps médian par appel (ms) des helpers du chemin chaud, sur les pages du corpus."""
+    listings, products = split_site_corpus(load_site_corpus(corpus_dir) if corpus_dir else make_site_corpus())
+    profile = build_extraction_profile(products[0][1])
+    prefix = BENCH_HOST + BENCH_PRODUCT_PREFIX
+    rules = UrlRules([prefix], exclude=["*?sort=*", "re:/(panier|compte)/"])
+    canonicalizer = UrlCanonicalizer()
+    listing_links = []
+    for path, html in listings:
+        url = BENCH_HOST + path
+        listing_links.append((url, resolve_hrefs_offline(extract_all_hrefs(html), url)))
+    trees = [(BENCH_HOST + path, html, parse_html(html)) for path, html in products]
+    cases = {
+        "parse_html": [lambda html=html: parse_html(html) for _, html, _ in trees],
+        "build_extraction_profile": [
+            lambda html=html, tree=tree: build_extraction_profile(html, tree=tree) for _, html, tree in trees
+        ],
+        "extract_product_info": [
+            lambda url=url, html=html, tree=tree: extract_product_info(url, html, profile, tree=tree)
+            for url, html, tree in trees
+        ],
+        "extract_all_hrefs": [lambda html=html: extract_all_hrefs(html) for _, html in listings],
+        "filter_by_prefix": [
+            lambda url=url, links=links: filter_by_prefix(links, prefix, only_same_domain=True, base_url=url)
+            for url, links in listing_links
+        ],
+        "select_urls": [
+            lambda url=url, links=links: select_urls(links, rules, canonicalizer, base_url=url)
+            for url, links in listing_links
+        ],
+    }
+    logger(f"{len(listings)} listing(s), {len(products)} fiche(s), {repeat} répétition(s) par mesure")
+    results = {}
+    for name, calls in cases.items():
+        timings = [_timed(call, repeat)[0] for call in calls]
+        results[f"{name}_ms"] = statistics.median(timings)
+        logger(f"{name:<26} {statistics.median(timings):>8.3f} ms médiane/appel ({max(timings):.3f} ms max)")
+    return results
+
+
+class _CorpusHandler(http.server.BaseHTTPRequestHandler):
+    """Sert `server.pages` (chemin → html) après `server.latency_s` de latence simulée."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        time.sleep(self.server.latency_s)
+        html = self.server.pages.get(urlsplit(self.path).path)
+        body = (html or "<html><body>introuvable</body></html>").encode("utf-8")
+        self.send_response(200 if html is not None else 404)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def serve_corpus(pages: dict[str, str], latency_ms: float = 0) -> http.server.ThreadingHTTPServer:
+    """Serveur HTTP local (127.0.0.1, port libre) dans un thread ; à fermer par `shutdown()`."""
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _CorpusHandler)
+    server.daemon_threads = True
+    server.pages = pages
+    server.latency_s = max(0.0, latency_ms) / 1000
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def peak_rss_mb() -> tuple[float | None, float | None]:
+    """Pic de mémoire résidente (Mo) du process et du plus gros process enfant terminé ;
+    (None, None) là où le module `resource` n'existe pas (Windows)."""
+    try:
+        import resource
+    except ImportError:
+        return None, None
+    # ru_maxrss est en Ko sous Linux, en octets sous macOS.
+    unit = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return (
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / unit,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / unit,
+    )
+
+
+def bench_e2e(
+    corpus_dir: str = "",
+    latency_ms: float = 50,
+    concurrency: int = 4,
+    wait_ms: int = 500,
+    fetch: str = "browser",
+    headless: bool = True,
+    logger=print,
+) -> dict:
+    """Crawl complet (listing en flux + fiches) avec Playwright contre le corpus servi en local :
+    débit, latence par fiche et pic de mémoire. Pas de rythme par domaine : on mesure le scraper."""
+    pages = load_site_corpus(corpus_dir) if corpus_dir else make_site_corpus()
+    listings, products = split_site_corpus(pages)
+    server = serve_corpus(pages, latency_ms)
+    base = f"http://127.0.0.1:{server.server_port}"
+    metrics = Metrics()
+    engine = CrawlEngine(
+        wait_ms=wait_ms,
+        headless=headless,
+        delay_min=0,
+        delay_max=0,
+        concurrency=concurrency,
+        per_host=concurrency,
+        max_rate=10_000,
+        http_client=HttpClient(timeout_s=30) if fetch == "auto" else None,
+        profiles=ProfileStore(),
+        metrics=metrics,
+        logger=lambda message: None,
+    )
+    rows = []
+    t0 = time.perf_counter()
+    try:
+        engine.crawl(base + listings[0][0], base + BENCH_PRODUCT_PREFIX, max_pages=len(listings) + 1,
+                     on_result=rows.append, keep_rows=False)
+    finally:
+        elapsed = time.perf_counter() - t0
+        server.shutdown()
+        server.server_close()
+        if engine.http_client:
+            engine.http_client.close()
+    page_times = metrics.durations.get("page", [])
+    rss, children_rss = peak_rss_mb()
+    results = {
+        "pages": len(rows),
+        "elapsed_s": elapsed,
+        "pages_per_s": len(rows) / elapsed if elapsed else 0.0,
+        "page_p50_ms": percentile(page_times, 0.5) * 1000,
+        "page_p95_ms": percentile(page_times, 0.95) * 1000,
+    }
+    if rss is not None:
+        results["peak_rss_mb"] = rss
+        results["children_peak_rss_mb"] = children_rss
+    if len(rows) < len(products):
+        logger(f"⚠️ {len(rows)}/{len(products)} fiche(s) extraite(s)")
+    logger(
+        f"{len(rows)} fiche(s) en {elapsed:.1f}s → {results['pages_per_s']:.2f} fiches/s | latence fiche "
+        f"p50 {results['page_p50_ms']:.0f} ms, p95 {results['page_p95_ms']:.0f} ms "
+        f"(serveur {latency_ms:.0f} ms, {concurrency} page(s), fetch {fetch})"
+    )
+    if rss is not None:
+        logger(f"pic RSS: {rss:.0f} Mo (Python), {children_rss:.0f} Mo (plus gros process enfant terminé)")
+    logger(metrics.summary())
+    return results
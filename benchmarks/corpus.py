@@ -0,0 +1,261 @@
+"""Corpus des benchmarks : pages synthétiques (fiches, listings, mini-site, pages de challenge)
+et lecture/écriture des corpus enregistrés sur disque."""
+
+import json
+import os
+import random
+import re
+from collections import deque
+
+# Corpus figés livrés avec les benchmarks (références de `baseline.json`).
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+SITE_CORPUS_DIR = os.path.join(DATA_DIR, "site")
+# Pages de blocage des fournisseurs et fiches piégeuses (« Captcha », scripts Cloudflare/Imperva),
+# étiquetées à la main : c'est la référence de `classify_challenge`, pas le corpus synthétique.
+CHALLENGE_CORPUS_DIR = os.path.join(DATA_DIR, "challenge")
+BASELINE_PATH = os.path.join(DATA_DIR, "baseline.json")
+
+# Mini-site hors ligne servi au benchmark de bout en bout (chemins façon king-jouet).
+BENCH_LISTING_PATH = "/jeu-jouet/jardin/page{}.htm"
+BENCH_PRODUCT_PREFIX = "/jeu-jouet/jeux-exterieur/jardinage/"
+BENCH_HOST = "https://bench.crapy.invalid"
+
+
+def make_product_page(target_bytes: int, seed: int = 0) -> str:
+    """Fiche produit synthétique façon trabaldogino, gonflée jusqu'à ~target_bytes
+    (menus, gros JSON inline, produits associés) comme les vraies pages de 1–3 Mo."""
+    rnd = random.Random(seed)
+    words = ("jouet", "jardin", "robot", "enfant", "bois", "arrosoir", "pelle", "seau", "été", "couleur")
+
+    def text(n):
+        return " ".join(rnd.choice(words) for _ in range(n))
+
+    head = [
+        "<!DOCTYPE html><html lang='fr'><head><meta charset='utf-8'>",
+        f"<title>{text(4)}</title>",
+        f"<meta name='description' content='{text(20)}'>",
+        f"<meta property='og:title' content='{text(4)}'>",
+        f"<meta property='og:image' content='/storage/products/{seed}/og.jpg'>",
+        "<script>window.__STATE__ = " + json.dumps({"items": [text(12) for _ in range(400)]}) + ";</script>",
+        "</head><body><header><nav><ul class='menu'>",
+    ]
+    head += [f"<li class='menu-item'><a href='/categorie/{i}'>{text(2)}</a></li>" for i in range(300)]
+    head.append("</ul></nav></header><main class='container'><div class='row product'>")
+    head.append(f"<h1 class='text-trabaldo'>{text(5)}</h1>")
+    head += [f"<img class='img-fluid' src='/storage/products/{seed}/{i}.jpg'>" for i in range(6)]
+    head += [f"<p class='MsoNormal'>{text(rnd.randint(20, 80))}</p>" for _ in range(4)]
+    head.append("</div><section class='related'>")
+    tail = "</section></main><footer><p>© crapy</p></footer></body></html>"
+
+    parts = head
+    size = sum(len(part) for part in parts) + len(tail)
+    i = 0
+    while size < target_bytes:
+        card = (
+            f"<div class='card product-card'><a href='/p/{seed}-{i}.htm'>"
+            f"<img src='/img/thumb/{i}.jpg' alt='{text(3)}'></a>"
+            f"<div class='card-body product-detail-card'><p class='card-text'>{text(rnd.randint(8, 30))}</p>"
+            f"<span class='price'>{rnd.randint(5, 90)},99 €</span></div></div>"
+        )
+        parts.append(card)
+        size += len(card)
+        i += 1
+    parts.append(tail)
+    return "".join(parts)
+
+
+def make_listing_page(n_links: int = 600, seed: int = 0, products: list[str] | None = None) -> str:
+    """Page listing synthétique façon king-jouet : menus, tuiles produits, pagination, liens parasites.
+
+    Avec `products`, les tuiles pointent sur ces chemins (tous présents, dans l'ordre) au lieu de
+    références tirées au hasard."""
+    rnd = random.Random(seed)
+    queue = deque(products or ())
+    parts = ["<!DOCTYPE html><html lang='fr'><head><link rel='stylesheet' href='/css/app.css'>",
+             "<link rel='canonical' href='https://www.king-jouet.com/jeux-jouets/jardin/page1.htm'></head><body><nav>"]
+    specials = ["javascript:void(0)", "mailto:contact@example.com", "tel:+33100000000", "#top",
+                "//cdn.example.com/promo.htm", "../../aide/livraison.htm", "?tri=prix", " /panier.htm "]
+    count = 0
+    while count < n_links or queue:
+        kind = rnd.random()
+        if kind < 0.55:
+            if products is not None and not queue:
+                continue
+            ref = rnd.randint(100000, 999999)
+            href = queue.popleft() if products is not None else f"{BENCH_PRODUCT_PREFIX}ref-{ref}-arrosoir.htm"
+            if rnd.random() < 0.2:
+                href += "#avis"
+            parts.append(f"<div class='product-tile'><a href=\"{href}\"><img src='/img/{ref}.jpg'></a>"
+                         f"<a href='{href}' class='title'>Jouet {ref}</a></div>")
+            count += 2
+        elif kind < 0.85:
+            parts.append(f"<li><a href='/jeux-jouets/categorie-{rnd.randint(1, 80)}/page1.htm'>catégorie</a></li>")
+            count += 1
+        else:
+            parts.append(f"<a href='{rnd.choice(specials)}'>x</a>")
+            count += 1
+    parts.append("".join(f"<a href='page{i}.htm'>{i}</a>" for i in range(1, 6)))
+    parts.append("</nav></body></html>")
+    return "".join(parts)
+
+
+def make_site_corpus(listings: int = 3, per_page: int = 20, product_kb: int = 200, seed: int = 0) -> dict[str, str]:
+    """Corpus {chemin: html} : `listings` pages listing (page1.htm, page2.htm…) dont les tuiles
+    pointent chacune sur `per_page` fiches façon trabaldogino d'environ `product_kb` Ko."""
+    pages = {}
+    for k in range(1, listings + 1):
+        refs = [100000 + seed * 10000 + (k - 1) * per_page + i for i in range(per_page)]
+        hrefs = [f"{BENCH_PRODUCT_PREFIX}ref-{ref}-arrosoir.htm" for ref in refs]
+        pages[BENCH_LISTING_PATH.format(k)] = make_listing_page(per_page * 3, seed=seed + k, products=hrefs)
+        for ref, href in zip(refs, hrefs):
+            pages[href] = make_product_page(product_kb * 1000, seed=ref)
+    return pages
+
+
+def save_site_corpus(pages: dict[str, str], directory: str) -> None:
+    """Écrit chaque page sous <dir>/<chemin URL>, pour la relire (`load_site_corpus`) ou la servir."""
+    for path, html in pages.items():
+        target = os.path.join(directory, *path.strip("/").split("/"))
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, "w", encoding="utf-8") as f:
+            f.write(html)
+
+
+def load_site_corpus(directory: str) -> dict[str, str]:
+    """Corpus sauvegardé : les .htm/.html du dossier, indexés par leur chemin URL. On peut y
+    déposer de vraies pages enregistrées, en gardant la disposition des chemins."""
+    pages = {}
+    for root, _, files in os.walk(directory):
+        for fname in sorted(files):
+            if not fname.endswith((".html", ".htm")):
+                continue
+            full = os.path.join(root, fname)
+            with open(full, encoding="utf-8", errors="replace") as f:
+                pages["/" + os.path.relpath(full, directory).replace(os.sep, "/")] = f.read()
+    if not pages:
+        raise RuntimeError(f"corpus vide: {directory}")
+    return pages
+
+
+def split_site_corpus(pages: dict[str, str]) -> tuple[list, list]:
+    """(listings, fiches) en [(chemin, html)], triés par chemin."""
+    listings = [(path, html) for path, html in sorted(pages.items()) if not path.startswith(BENCH_PRODUCT_PREFIX)]
+    products = [(path, html) for path, html in sorted(pages.items()) if path.startswith(BENCH_PRODUCT_PREFIX)]
+    if not listings or not products:
+        raise RuntimeError(f"le corpus doit contenir des listings et des fiches sous {BENCH_PRODUCT_PREFIX}")
+    return listings, products
+
+
+def challenge_page(title: str, body: str, head: str = "") -> str:
+    """Petite page HTML complète (titre, head et body donnés)."""
+    return (
+        f"<!DOCTYPE html><html><head><meta charset='utf-8'><title>{title}</title>{head}</head>"
+        f"<body>{body}</body></html>"
+    )
+
+
+def make_challenge_corpus(seed: int = 0) -> list[dict]:
+    """Corpus étiqueté de pages de blocage (gabarits des principaux fournisseurs) et de pages
+    normales piégeuses (catégorie robots, « vérification », scripts Cloudflare, reCAPTCHA de
+    contact…). Chaque page : name, label (challenge|normal), status, headers, html."""
+    rnd = random.Random(seed)
+    cf_head = "<script src='/cdn-cgi/challenge-platform/h/g/orchestrate/chl_page/v1'></script>"
+    challenges = [
+        ("cloudflare-jschallenge", 403, {"server": "cloudflare", "cf-mitigated": "challenge"},
+         challenge_page("Just a moment...", "<div id='challenge-running'>Checking your browser</div>", cf_head)),
+        ("cloudflare-un-instant", 503, {"server": "cloudflare"},
+         challenge_page("Un instant…", "<noscript>Activer JavaScript et les cookies pour continuer</noscript>", cf_head)),
+        ("cloudflare-attention", 403, {"server": "cloudflare"},
+         challenge_page("Attention Required! | Cloudflare", "<div class='cf-browser-verification'>Sorry, you have been blocked</div>")),
+        ("cloudflare-turnstile", 200, {},
+         challenge_page("Vérification", "<div class='cf-turnstile'></div><script src='https://challenges.cloudflare.com/turnstile/v0/api.js'></script>"
+                         "<p>Vérifier que vous êtes humain</p>")),
+        ("datadome", 403, {"x-datadome": "protected", "server": "nginx"},
+         challenge_page("king-jouet.com", "<iframe src='https://geo.captcha-delivery.com/captcha/?initialCid=abc'></iframe>")),
+        ("datadome-200", 200, {},
+         challenge_page("", "<script src='https://ct.captcha-delivery.com/c.js'></script>")),
+        ("perimeterx", 403, {},
+         challenge_page("Access to this page has been denied", "<div id='px-captcha'></div><p>Press &amp; Hold</p>")),
+        ("akamai", 403, {"server": "AkamaiGHost"},
+         challenge_page("Access Denied", "<h1>Access Denied</h1>You don't have permission to access this server.")),
+        ("imperva", 200, {"x-iinfo": "1-2-3"},
+         challenge_page("", "<iframe src='/_Incapsula_Resource?SWUDNSAI=31'></iframe>")),
+        ("sucuri", 403, {"x-sucuri-block": "BL01", "server": "Sucuri/Cloudproxy"},
+         challenge_page("Sucuri WebSite Firewall - Access Denied", "<div>Access Denied - Sucuri Website Firewall</div>")),
+        ("recaptcha-unusual-traffic", 429, {},
+         challenge_page("Sorry...", "<p>Our systems have detected unusual traffic from your computer network.</p>"
+                         "<div class='g-recaptcha' data-sitekey='x'></div>")),
+        ("hcaptcha-fr", 200, {},
+         challenge_page("Vérification de sécurité", "<p>Êtes-vous un robot ?</p><div class='h-captcha'></div>"
+                         "<script src='https://hcaptcha.com/1/api.js'></script>")),
+        ("ddos-guard", 403, {"server": "ddos-guard"},
+         challenge_page("DDoS-Guard", "<p>Checking your browser before accessing</p>")),
+        ("generic-robot-check", 200, {},
+         challenge_page("Robot Check", "<p>Enter the characters you see below</p><form action='/errors/validateCaptcha'></form>")),
+    ]
+    corpus = [{"name": n, "label": "challenge", "status": st, "headers": h, "html": html} for n, st, h, html in challenges]
+
+    # Pages normales : fiches et listings synthétiques, avec les mots qui piégeaient l'ancienne détection.
+    traps = [
+        ("robot-categorie", "<title>Robot programmable enfant - Jouets robots</title>", ""),
+        ("robot-aspirateur", "<title>Robot jardinier en bois</title>", "<p>Ce robot arrose les plantes.</p>"),
+        ("verification", "", "<p class='MsoNormal'>Vérification de la commande sous 24h, vérification des piles incluse.</p>"),
+        ("cdnjs-cloudflare", "", "<script src='https://cdnjs.cloudflare.com/ajax/libs/jquery/3.7.1/jquery.min.js'></script>"),
+        ("recaptcha-contact", "", "<form id='contact'><div class='g-recaptcha' data-sitekey='x'></div></form>"
+                                  "<script src='https://www.google.com/recaptcha/api.js'></script>"),
+        ("access-denied-faq", "", "<p>FAQ : que faire si « access denied » s'affiche sur votre espace client ?</p>"),
+        ("captcha-footer", "", "<footer>Ce site est protégé par reCAPTCHA et les règles de confidentialité de Google.</footer>"),
+    ]
+    for i, (name, head_extra, body_extra) in enumerate(traps):
+        html = make_product_page(rnd.randint(80_000, 400_000), seed=seed + i)
+        if head_extra:
+            html = re.sub(r"<title>.*?</title>", head_extra, html, count=1)
+        html = html.replace("</main>", body_extra + "</main>", 1)
+        corpus.append({"name": f"fiche-{name}", "label": "normal", "status": 200, "headers": {}, "html": html})
+    for i in range(6):
+        html = make_product_page(rnd.randint(200_000, 2_000_000), seed=seed + 100 + i)
+        corpus.append({"name": f"fiche-{i}", "label": "normal", "status": 200,
+                       "headers": {"server": rnd.choice(["cloudflare", "nginx", "AkamaiGHost"])}, "html": html})
+    for i in range(3):
+        corpus.append({"name": f"listing-{i}", "label": "normal", "status": 200, "headers": {},
+                       "html": make_listing_page(600, seed=seed + i)})
+    corpus.append({"name": "panier-vide", "label": "normal", "status": 200, "headers": {},
+                   "html": challenge_page("Mon panier", "<p>Votre panier est vide.</p><a href='/robots'>Nos robots</a>")})
+    corpus.append({"name": "introuvable", "label": "normal", "status": 404, "headers": {"server": "cloudflare"},
+                   "html": challenge_page("Page introuvable", "<p>Cette page n'existe plus.</p>")})
+    return corpus
+
+
+def save_challenge_corpus(corpus: list[dict], directory: str) -> None:
+    """Écrit le corpus : <dir>/<label>/<name>.html, statut et en-têtes dans <name>.json."""
+    for page in corpus:
+        folder = os.path.join(directory, page["label"])
+        os.makedirs(folder, exist_ok=True)
+        base = os.path.join(folder, page["name"])
+        with open(base + ".html", "w", encoding="utf-8") as f:
+            f.write(page["html"])
+        with open(base + ".json", "w", encoding="utf-8") as f:
+            json.dump({"status": page["status"], "headers": page["headers"]}, f, ensure_ascii=False, indent=2)
+
+
+def load_challenge_corpus(directory: str) -> list[dict]:
+    """Corpus sauvegardé (même disposition que `save_challenge_corpus`) ; le .json est facultatif,
+    ce qui permet d'y déposer directement des pages réelles enregistrées depuis le navigateur."""
+    corpus = []
+    for label in ("challenge", "normal"):
+        folder = os.path.join(directory, label)
+        if not os.path.isdir(folder):
+            continue
+        for fname in sorted(os.listdir(folder)):
+            if not fname.endswith((".html", ".htm")):
+                continue
+            base = os.path.join(folder, os.path.splitext(fname)[0])
+            with open(os.path.join(folder, fname), encoding="utf-8", errors="replace") as f:
+                html = f.read()
+            meta = {}
+            if os.path.exists(base + ".json"):
+                with open(base + ".json", encoding="utf-8") as f:
+                    meta = json.load(f)
+            corpus.append({"name": fname, "label": label, "status": meta.get("status"),
+                           "headers": meta.get("headers") or {}, "html": html})
+    return corpus
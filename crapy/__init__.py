@@ -0,0 +1,51 @@
+"""crapy : scraper listing → URLs produits → fiches (`python -m crapy --help`).
+
+Un module par étape du pipeline ; les noms ré-exportés ici forment l'API utilisée par
+l'interface (`crapy_gui`), les benchmarks et les scripts."""
+
+from .browser import BrowserSession
+from .challenge import classify_challenge, looks_like_bot_challenge
+from .cli import main
+from .engine import CrawlEngine, OrderedEmitter
+from .extraction import (
+    PRODUCT_FIELDS,
+    ExtractionPlan,
+    SelectorPlan,
+    build_extraction_profile,
+    compile_css,
+    element_text,
+    extract_in_page,
+    extract_product_info,
+    extract_product_info_soup,
+    parse_html,
+)
+from .httpclient import DEFAULT_FETCH_MODES_PATH, FetchModes, HttpClient, HttpPage
+from .metrics import METRIC_QUANTILES, Metrics, percentile, prom_escape
+from .pacing import CircuitBreaker, FetchError, HostLimiter, RetryScheduler
+from .pagination import Pagination, detect_pagination
+from .profiles import DEFAULT_PROFILES_PATH, PROFILE_DRIFT, PROFILE_WINDOW, ProfileStore, learn_profile
+from .resources import RESOURCE_PRESETS, ResourcePolicy
+from .sinks import CsvSink, JsonlSink, JsonSink, ParquetSink, RecordSink, open_sink
+from .stores import (
+    DEFAULT_CACHE_PATH,
+    DEFAULT_FINGERPRINTS_PATH,
+    DEFAULT_JOURNAL_PATH,
+    CachedPage,
+    CrawlJournal,
+    FingerprintStore,
+    HtmlCache,
+)
+from .urls import (
+    DEFAULT_SEEN_PATH,
+    SeenSet,
+    UrlCanonicalizer,
+    UrlRules,
+    document_base,
+    extract_all_hrefs,
+    filter_by_prefix,
+    hrefs_to_absolute,
+    normalize_url,
+    resolve_hrefs_offline,
+    select_urls,
+)
+from .util import read_json_file, replace_file, write_json_file
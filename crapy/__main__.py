@@ -0,0 +1,8 @@
+"""`python -m crapy <commande>` : voir `python -m crapy --help` (sans commande : l'interface Tk)."""
+
+import sys
+
+from .cli import main
+
+if __name__ == "__main__":
+    sys.exit(main())
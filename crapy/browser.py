@@ -0,0 +1,333 @@
+"""Navigateur : session Chromium partagée, navigation d'une page et attentes adaptatives."""
+
+import asyncio
+import random
+import threading
+import time
+
+from playwright.async_api import async_playwright
+
+from .challenge import classify_challenge
+from .metrics import Metrics
+from .pacing import FetchError, as_fetch_error
+from .resources import ResourcePolicy
+
+
+async def imitate_entry_mouse_clicks(page, min_clicks: int = 1, max_clicks: int = 3):
+    """Imite quelques mouvements/clics souris dans des zones non interactives."""
+    candidates = await page.evaluate(
+        """
+        () => {
+            const width = Math.max(window.innerWidth || 0, 1);
+            const height = Math.max(window.innerHeight || 0, 1);
+            const points = [
+                [Math.floor(width * 0.1), Math.floor(height * 0.2)],
+                [Math.floor(width * 0.15), Math.floor(height * 0.82)],
+                [Math.floor(width * 0.88), Math.floor(height * 0.18)],
+                [Math.floor(width * 0.9), Math.floor(height * 0.84)],
+                [Math.floor(width * 0.5), Math.floor(height * 0.94)],
+            ];
+            const nonInteractive = (x, y) => {
+                const el = document.elementFromPoint(x, y);
+                if (!el) return false;
+                return !el.closest('a, button, input, select, textarea, [role="button"], [onclick]');
+            };
+
+            const safePoints = points.filter(([x, y]) => nonInteractive(x, y));
+            return safePoints.length ? safePoints : [[Math.floor(width * 0.08), Math.floor(height * 0.9)]];
+        }
+        """
+    )
+
+    click_count = random.randint(max(1, min_clicks), max(min_clicks, max_clicks))
+    for _ in range(click_count):
+        x, y = random.choice(candidates)
+        await page.mouse.move(x, y, steps=random.randint(12, 28))
+        await page.wait_for_timeout(random.randint(120, 260))
+        await page.mouse.click(x, y, delay=random.randint(40, 120))
+        await page.wait_for_timeout(random.randint(180, 420))
+
+
+async def build_browser_context(browser):
+    context = await browser.new_context(
+        locale="fr-FR",
+        timezone_id="Europe/Paris",
+        viewport={"width": random.choice([1280, 1366, 1440]), "height": random.choice([820, 900, 960])},
+        user_agent=random.choice([
+            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+            "(KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36",
+            "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 "
+            "(KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36",
+        ]),
+        extra_http_headers={
+            "Accept-Language": "fr-FR,fr;q=0.9,en-US;q=0.8,en;q=0.7",
+            "DNT": "1",
+            "Upgrade-Insecure-Requests": "1",
+        },
+    )
+    await context.add_init_script(
+        """
+        Object.defineProperty(navigator, 'webdriver', { get: () => undefined });
+        Object.defineProperty(navigator, 'languages', { get: () => ['fr-FR', 'fr', 'en-US'] });
+        Object.defineProperty(navigator, 'platform', { get: () => 'Win32' });
+        """
+    )
+    return context
+
+
+# Vrai quand chaque groupe de sélecteurs a au moins un élément rempli (texte, src ou content).
+READY_SELECTORS_JS = """(groups) => groups.every((group) => group.some((sel) => {
+    for (const el of document.querySelectorAll(sel)) {
+        if ((el.textContent || '').trim() || el.getAttribute('src') || el.getAttribute('content')) return true;
+    }
+    return false;
+}))"""
+# Nombre de liens de la page qui commencent par l'un des préfixes produits (tous si aucun).
+PRODUCT_LINK_COUNT_JS = """(prefixes) => {
+    let n = 0;
+    for (const a of document.querySelectorAll('a[href]')) {
+        if (!prefixes.length || prefixes.some((prefix) => a.href.startsWith(prefix))) n++;
+    }
+    return n;
+}"""
+
+
+def readiness_selectors(profile: dict | None) -> list[list[str]]:
+    """Groupes de sélecteurs à attendre sur une fiche : titre, description et images du profil."""
+    if not profile:
+        return []
+    return [[profile[key]] for key in ("title", "description", "images") if profile.get(key)]
+
+
+async def wait_for_condition(page, js: str, arg, timeout_ms: float) -> bool:
+    """`page.wait_for_function` borné : True si la condition devient vraie avant `timeout_ms`."""
+    if timeout_ms <= 0:
+        return False
+    try:
+        await page.wait_for_function(js, arg=arg, timeout=timeout_ms, polling=100)
+        return True
+    except Exception:
+        return False
+
+
+async def wait_until_ready(page, js: str, arg, ceiling_ms: int) -> float:
+    """Attend la condition, `ceiling_ms` au plus ; retourne le temps réellement attendu (ms)."""
+    t0 = time.perf_counter()
+    if not await wait_for_condition(page, js, arg, ceiling_ms):
+        # Condition jamais vraie (ou invalide) : on retombe sur l'attente fixe.
+        remaining = ceiling_ms - (time.perf_counter() - t0) * 1000
+        if remaining > 0:
+            await page.wait_for_timeout(remaining)
+    return (time.perf_counter() - t0) * 1000
+
+
+async def goto_page(page, url: str, wait_until: str, wait_ms: int, ready=None, metrics=None, read=None) -> tuple:
+    """Retourne (response, html) en une seule tentative ; tout échec remonte en FetchError
+    classée, la reprise éventuelle revient à l'appelant (RetryScheduler).
+
+    `ready(page)` remplace l'attente fixe de `wait_ms` après le chargement. Avec `metrics`,
+    chaque étape (goto, wait, content, challenge) est chronométrée. `read(page)` remplace
+    `page.content()` : il renvoie (début du HTML, taille, résultat) et c'est ce résultat qui est
+    retourné à la place du HTML."""
+    metrics = metrics or Metrics()
+    try:
+        with metrics.stage("goto", url):
+            response = await page.goto(url, wait_until=wait_until)
+        with metrics.stage("wait", url):
+            if ready:
+                await ready(page)
+            else:
+                await page.wait_for_timeout(wait_ms)
+        with metrics.stage("content" if read is None else "evaluate", url):
+            if read is None:
+                html = result = await page.content()
+                size = None
+            else:
+                html, size, result = await read(page)
+        status, headers = (response.status, response.headers) if response else (None, None)
+        with metrics.stage("challenge", url):
+            blocked = classify_challenge(html, status, headers, size)
+    except Exception as e:
+        raise as_fetch_error(e) from e
+    if blocked:
+        raise FetchError("challenge", f"challenge anti-bot détecté ({blocked})")
+    return response, result
+
+
+# Attentes fixes d'origine, gardées comme plafonds de l'attente adaptative.
+LISTING_SCROLLS = 4
+LISTING_SCROLL_WAIT_MS = 550
+PRODUCT_SCROLL_WAIT_MS = 400
+
+
+class WaitStats:
+    """Latence économisée par l'attente adaptative par rapport aux attentes fixes."""
+
+    def __init__(self):
+        self.pages = 0
+        self.waited_ms = 0.0
+        self.fixed_ms = 0.0
+
+    def add(self, waited_ms: float, fixed_ms: float) -> None:
+        self.pages += 1
+        self.waited_ms += waited_ms
+        self.fixed_ms += fixed_ms
+
+    def summary(self) -> str:
+        saved = max(0.0, self.fixed_ms - self.waited_ms)
+        return (
+            f"attente adaptative: {self.pages} page(s), {self.waited_ms / self.pages:.0f} ms en moyenne, "
+            f"−{saved / self.pages:.0f} ms/page ({saved / 1000:.1f}s au total)"
+        )
+
+
+class BrowserSession:
+    """Chromium lancé une seule fois et pool de contextes chauds, recyclés après `max_pages`
+    navigations ou au-delà de `max_heap_mb`. `run` passe par une boucle asyncio dans son propre
+    thread : navigateur et contextes survivent d'un run à l'autre."""
+
+    def __init__(self, headless: bool = True, max_pages: int = 50, max_heap_mb: int = 512):
+        self.headless = headless
+        self.max_pages = max(1, max_pages)
+        self.max_heap_mb = max_heap_mb
+        self.policy = None  # ResourcePolicy du run en cours : les contextes lui renvoient leurs requêtes
+        self.launch_ms = 0.0
+        self.context_ms = 0.0  # coût moyen de création d'un contexte + page
+        self._contexts_built = 0
+        self._playwright = None
+        self._browser = None
+        self._routed = False
+        self._idle = []
+        self._served = {}
+        self._loop = None
+        self._thread = None
+        self._run = {}
+
+    def run(self, coro):
+        """Exécute `coro` dans la boucle de la session (créée au premier appel) et attend le résultat."""
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=self._loop.run_forever, name="crapy-browser", daemon=True)
+            self._thread.start()
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    async def start(self, headless: bool | None = None, policy: ResourcePolicy | None = None):
+        """Prépare un run : relance Chromium seulement s'il n'est pas déjà ouvert (ou si le mode
+        headless change) et vide le pool si l'interception des requêtes doit changer."""
+        headless = self.headless if headless is None else headless
+        routed = bool(policy and policy.intercepts)
+        self._run = {"cold_start": False, "warm": 0, "fresh": 0, "recycled": 0}
+        self.policy = policy
+        if self._browser is not None and (headless != self.headless or not self._browser.is_connected()):
+            await self.aclose()
+        if self._browser is None:
+            t0 = time.perf_counter()
+            self._playwright = await async_playwright().start()
+            self._browser = await self._playwright.chromium.launch(
+                headless=headless,
+                args=["--disable-blink-features=AutomationControlled"],
+            )
+            self.launch_ms = (time.perf_counter() - t0) * 1000
+            self.headless = headless
+            self._run["cold_start"] = True
+        if routed != self._routed:
+            await self.drain()
+            self._routed = routed
+
+    async def acquire(self, timeout_s: float = 70):
+        """Page d'un contexte chaud du pool, ou d'un contexte neuf si le pool est vide."""
+        if self._idle:
+            page = self._idle.pop()
+            self._run["warm"] += 1
+        else:
+            t0 = time.perf_counter()
+            context = await build_browser_context(self._browser)
+            context.on("response", self._on_response)
+            if self._routed:
+                await context.route("**/*", self._route)
+            page = await context.new_page()
+            self._served[page] = 0
+            page.on("domcontentloaded", self._count)
+            elapsed = (time.perf_counter() - t0) * 1000
+            self._contexts_built += 1
+            self.context_ms += (elapsed - self.context_ms) / self._contexts_built
+            self._run["fresh"] += 1
+        page.set_default_timeout(timeout_s * 1000)
+        return page
+
+    async def release(self, page):
+        """Rend la page au pool, ou ferme son contexte s'il a assez servi ou trop grossi."""
+        try:
+            worn = self._served.get(page, 0) >= self.max_pages
+            if not worn and self.max_heap_mb:
+                heap = await page.evaluate("() => (performance.memory && performance.memory.usedJSHeapSize) || 0")
+                worn = (heap or 0) > self.max_heap_mb * 1024 * 1024
+            if not worn:
+                # Page vidée (plus de scripts actifs) ; cookies et cache HTTP du contexte restent chauds.
+                await page.goto("about:blank")
+                self._idle.append(page)
+                return
+        except Exception:
+            pass
+        self._run["recycled"] += 1
+        await self._discard(page)
+
+    async def drain(self):
+        idle, self._idle = self._idle, []
+        for page in idle:
+            await self._discard(page)
+
+    async def _discard(self, page):
+        self._served.pop(page, None)
+        try:
+            await page.context.close()
+        except Exception:
+            pass
+
+    def _count(self, page):
+        if page.url != "about:blank":
+            self._served[page] = self._served.get(page, 0) + 1
+
+    async def _route(self, route):
+        if self.policy:
+            await self.policy.handle(route)
+        else:
+            await route.continue_()
+
+    def _on_response(self, response):
+        if self.policy:
+            self.policy.on_response(response)
+
+    def summary(self) -> str:
+        """Temps gagné sur ce run par rapport à un démarrage à froid (lancement + contextes neufs)."""
+        run = self._run
+        saved = run["warm"] * self.context_ms + (0.0 if run["cold_start"] else self.launch_ms)
+        return (
+            f"session navigateur: {'lancée' if run['cold_start'] else 'réutilisée'}, "
+            f"{run['warm']} contexte(s) chaud(s), {run['fresh']} neuf(s), {run['recycled']} recyclé(s), "
+            f"≈{saved / 1000:.1f}s gagnées vs démarrage à froid"
+        )
+
+    async def aclose(self):
+        await self.drain()
+        if self._browser is not None:
+            try:
+                await self._browser.close()
+            finally:
+                self._browser = None
+                await self._playwright.stop()
+                self._playwright = None
+        self._served.clear()
+
+    def close(self):
+        """Ferme navigateur et boucle dédiée (fin de programme / fenêtre fermée)."""
+        if self._loop is None:
+            return
+        try:
+            self.run(self.aclose())
+        finally:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=5)
+            self._loop.close()
+            self._loop = None
+            self._thread = None
@@ -0,0 +1,93 @@
+"""Détection des pages de challenge anti-bot (statut, en-têtes, titre, début du document)."""
+
+import re
+
+
+# Détection des pages de challenge : statut, en-têtes, <title> et début du document seulement.
+# Les mots isolés (« robot », « captcha », « cloudflare ») apparaissent sur des fiches
+# ordinaires (jeu « Captcha », catégorie robots, scripts cdnjs.cloudflare.com) et les
+# fournisseurs injectent leurs propres scripts sur les pages normales qu'ils protègent
+# (/cdn-cgi/challenge-platform/scripts/jsd/, _Incapsula_Resource?SWJIYLWA=) : on ne cherche
+# que des marqueurs propres aux pages de blocage, et les indices faibles exigent une petite
+# page ou un statut de refus.
+CHALLENGE_SCAN_CHARS = 20_000
+CHALLENGE_MAX_PAGE_CHARS = 64_000
+BLOCKING_STATUSES = (401, 403, 429, 503)
+# Comparé à chaque segment du titre (« Attention Required! | Cloudflare ») pris en entier.
+CHALLENGE_TITLE_RE = re.compile(
+    r"\W*(just a moment|un instant|one moment|please wait|veuillez patienter"
+    r"|attention required|access denied|accès refusé|access to this page has been denied"
+    r"|are you a robot|êtes-vous un robot|verify you are human|vérification de sécurité"
+    r"|security check|pardon our interruption|ddos-guard|captcha|bot verification|robot check)\W*",
+    re.I,
+)
+TITLE_SEPARATOR_RE = re.compile(r"\s[|\-–—:]\s")
+TITLE_RE = re.compile(r"<title[^>]*>(.*?)</title>", re.I | re.S)
+# Marqueurs qui n'existent que sur les pages de blocage des fournisseurs.
+CHALLENGE_MARKERS = {
+    "/cdn-cgi/challenge-platform/h/": "cloudflare",
+    "window._cf_chl_opt": "cloudflare",
+    "cf-browser-verification": "cloudflare",
+    "captcha-delivery.com": "datadome",
+    "_incapsula_resource?cwudnsai": "imperva",
+    "_incapsula_resource?swudnsai": "imperva",
+    "incapsula incident id": "imperva",
+    "px-captcha": "perimeterx",
+    "sucuri-cloudproxy": "sucuri",
+    "ddos-guard": "ddos-guard",
+}
+# Indices faibles, aussi présents sur des pages légitimes (formulaire de contact, fiche d'un
+# robot jouet) : un seul suffit avec un statut de refus ; sur une petite page en 200, il faut
+# un widget captcha *et* une formule d'avertissement.
+CHALLENGE_WIDGETS = (
+    "g-recaptcha", "recaptcha/api", "h-captcha", "hcaptcha.com", "challenges.cloudflare.com/turnstile",
+)
+CHALLENGE_WORDING = (
+    "verify you are human", "vérifier que vous êtes humain", "unusual traffic", "trafic inhabituel",
+    "are you a robot", "êtes-vous un robot", "enable javascript and cookies", "activer javascript et les cookies",
+    "enter the characters you see below", "make sure you're not a robot",
+)
+
+
+def classify_challenge(
+    html: str, status: int | None = None, headers: dict | None = None, size: int | None = None
+) -> str | None:
+    """Nom du blocage détecté (fournisseur ou indice), ou None pour une page normale.
+
+    `size` donne la taille de la page quand `html` n'en est que le début (extraction dans la page)."""
+    headers = {k.lower(): str(v).lower() for k, v in (headers or {}).items()}
+    if headers.get("cf-mitigated") == "challenge":
+        return "cloudflare"
+    if "x-sucuri-block" in headers:
+        return "sucuri"
+    if headers.get("x-amzn-waf-action") in ("challenge", "captcha"):
+        return "aws-waf"
+    refused = status in BLOCKING_STATUSES
+    if refused and ("x-datadome" in headers or "x-dd-b" in headers):
+        return "datadome"
+    if refused and "akamaighost" in headers.get("server", ""):
+        return "akamai"
+
+    head = html[:CHALLENGE_SCAN_CHARS].lower()
+    for marker, vendor in CHALLENGE_MARKERS.items():
+        if marker in head:
+            return vendor
+    if not refused and (len(html) if size is None else size) >= CHALLENGE_MAX_PAGE_CHARS:
+        return None
+    match = TITLE_RE.search(head)
+    title = " ".join(match.group(1).split()) if match else ""
+    widget = next((hint for hint in CHALLENGE_WIDGETS if hint in head), None)
+    wording = next((hint for hint in CHALLENGE_WORDING if hint in head), None)
+    if refused:
+        if title and any(CHALLENGE_TITLE_RE.fullmatch(part) for part in TITLE_SEPARATOR_RE.split(title)):
+            return f"titre: {title[:60]}"
+        return widget or wording
+    # En 200, le titre ne suffit pas (jeu « Captcha | Jeu d'ambiance ») : seul son premier
+    # segment compte, et il faut en plus un widget ou une formule d'avertissement.
+    if title and CHALLENGE_TITLE_RE.fullmatch(TITLE_SEPARATOR_RE.split(title)[0]) and (widget or wording):
+        return f"titre: {title[:60]}"
+    return widget if widget and wording else None
+
+
+def looks_like_bot_challenge(html: str, status: int | None = None, headers: dict | None = None) -> bool:
+    return classify_challenge(html, status, headers) is not None
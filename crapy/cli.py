@@ -0,0 +1,561 @@
+"""Ligne de commande (`python -m crapy`) ; sans sous-commande, l'interface Tk."""
+
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+from .browser import BrowserSession
+from .engine import CrawlEngine
+from .extraction import PRODUCT_FIELDS
+from .httpclient import DEFAULT_FETCH_MODES_PATH, FetchModes, HttpClient
+from .metrics import PROFILERS, Metrics
+from .profiles import DEFAULT_PROFILES_PATH, ProfileStore
+from .resources import DEFAULT_BLOCKED_DOMAINS, RESOURCE_PRESETS, ResourcePolicy
+from .sinks import OUTPUT_HELP, open_sink
+from .stores import (
+    DEFAULT_CACHE_PATH,
+    DEFAULT_FINGERPRINTS_PATH,
+    DEFAULT_JOURNAL_PATH,
+    CrawlJournal,
+    FingerprintStore,
+    HtmlCache,
+)
+from .urls import (
+    DEFAULT_SEEN_CAPACITY,
+    DEFAULT_SEEN_ERROR,
+    DEFAULT_SEEN_PATH,
+    DEFAULT_STRIP_PARAMS,
+    SeenSet,
+    UrlCanonicalizer,
+    UrlRules,
+)
+from .util import log_stderr
+
+
+def read_url_file(path: str) -> list[str]:
+    f = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    try:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m crapy",
+        description="Scraper listing → fiches produits. Sans sous-commande : interface graphique.",
+    )
+    sub = parser.add_subparsers(dest="command")
+
+    cache_opts = argparse.ArgumentParser(add_help=False)
+    cache_opts.add_argument("--cache", help=f"cache HTML SQLite (ex: {DEFAULT_CACHE_PATH})")
+    cache_opts.add_argument("--cache-ttl", type=float, default=24, help="durée de validité d'une page en cache (heures)")
+    cache_opts.add_argument("--cache-max-mb", type=int, default=512, help="taille max du cache sur disque (Mo)")
+
+    url_opts = argparse.ArgumentParser(add_help=False)
+    url_opts.add_argument("--include", action="append", default=[], metavar="RULE",
+                          help="URLs produits retenues : préfixe, glob avec *, ou re:regex ; @fichier = une règle "
+                               "par ligne (répétable, s'ajoute à --prefix)")
+    url_opts.add_argument("--exclude", action="append", default=[], metavar="RULE",
+                          help="URLs produits écartées (même syntaxe, répétable)")
+    url_opts.add_argument("--strip-params", default=",".join(DEFAULT_STRIP_PARAMS),
+                          help="paramètres retirés des URLs (globs séparés par des virgules, '' = aucun)")
+    url_opts.add_argument("--keep-query-order", action="store_true", help="ne trie pas les paramètres des URLs")
+    url_opts.add_argument("--strict-urls", action="store_true",
+                          help="dédoublonne sans ignorer le / final (ni la casse avec --fold-case)")
+    url_opts.add_argument("--fold-case", action="store_true",
+                          help="dédoublonne aussi sans tenir compte de la casse du chemin (schéma et hôte le sont toujours)")
+    url_opts.add_argument("--raw-urls", action="store_true", help="URLs gardées telles quelles (aucune canonisation)")
+    url_opts.add_argument("--seen", help=f"URLs déjà scrapées, ignorées aux runs suivants (ex: {DEFAULT_SEEN_PATH})")
+    url_opts.add_argument("--seen-capacity", type=int, default=DEFAULT_SEEN_CAPACITY,
+                          help=f"nb d'URLs prévu, à la création du fichier --seen (défaut: {DEFAULT_SEEN_CAPACITY})")
+    url_opts.add_argument("--seen-error", type=float, default=DEFAULT_SEEN_ERROR,
+                          help=f"taux de faux positifs visé à la création (défaut: {DEFAULT_SEEN_ERROR})")
+
+    crawl = sub.add_parser(
+        "crawl", parents=[cache_opts, url_opts], help="récupère les URLs d'un listing puis scrape les fiches, sans interface"
+    )
+    crawl.add_argument("--listing", help="URL catégorie (listing), ex: .../page1.htm")
+    crawl.add_argument("--prefix", help="préfixe des URLs produits (commence par)")
+    crawl.add_argument("--urls-file", help="fichier d'URLs produits (une par ligne, '-' = stdin) au lieu du listing")
+    crawl.add_argument("--pages", type=int, default=1,
+                       help="nb max de pages listing (défaut: 1) ; arrêt dès qu'une page n'apporte aucun produit")
+    crawl.add_argument("--limit", type=int, default=0, help="nb max de fiches à scraper (0 = toutes)")
+    crawl.add_argument("--all-domains", action="store_true", help="ne pas restreindre au domaine du listing")
+    crawl.add_argument("--two-phase", action="store_true",
+                       help="lit tout le listing avant de scraper (par défaut les fiches partent dès leur page listing)")
+    crawl.add_argument("--timeout", type=int, default=70, help="timeout navigation en secondes")
+    crawl.add_argument("--wait-ms", type=int, default=2500,
+                       help="attente max après chargement (ms) ; on rend la main dès que la page est prête")
+    crawl.add_argument("--fixed-wait", action="store_true",
+                       help="attend toujours --wait-ms (et les pauses de défilement) comme avant")
+    crawl.add_argument("--delay-min", type=int, default=900, help="pause de départ min entre deux requêtes (ms)")
+    crawl.add_argument("--delay-max", type=int, default=1900, help="pause de départ max entre deux requêtes (ms)")
+    crawl.add_argument("--max-rate", type=float, default=2.0,
+                       help="débit max par domaine (req/s), même si le site répond vite (défaut: 2)")
+    crawl.add_argument("--concurrency", type=int, default=1, help="pages visitées en parallèle (défaut: 1)")
+    crawl.add_argument("--per-host", type=int, default=2, help="visites simultanées max par domaine (défaut: 2)")
+    crawl.add_argument("--parse-workers", type=int, default=0,
+                       help="process dédiés à l'extraction (0 = dans la boucle navigateur)")
+    crawl.add_argument("--resources", choices=list(RESOURCE_PRESETS), default="full",
+                       help="ressources chargées: full (tout), no-media (sans images/vidéos/polices), "
+                            "dom-only (DOM + scripts seulement)")
+    crawl.add_argument("--block-domain", action="append", default=[],
+                       help="domaine à bloquer (répétable ; s'ajoute à la liste pub/analytics hors 'full')")
+    crawl.add_argument("--headful", action="store_true", help="affiche le navigateur")
+    crawl.add_argument("--offline", action="store_true", help="n'utilise que le cache (aucune navigation)")
+    crawl.add_argument("--fetch", choices=["browser", "auto"], default="browser",
+                       help="auto: tente chaque fiche en HTTP simple, navigateur seulement si le HTML "
+                            "serveur est incomplet (mode appris par domaine)")
+    crawl.add_argument("--fetch-modes", default=DEFAULT_FETCH_MODES_PATH,
+                       help=f"fichier JSON des modes par domaine avec --fetch auto (défaut: {DEFAULT_FETCH_MODES_PATH})")
+    crawl.add_argument("--extract", choices=["python", "page"], default="python",
+                       help="page: fiches extraites dans le navigateur (un page.evaluate, sans transférer le DOM) "
+                            "dès que le domaine a un profil")
+    crawl.add_argument("--profiles", default=DEFAULT_PROFILES_PATH,
+                       help=f"profils d'extraction appris par domaine ('' = non mémorisés ; défaut: {DEFAULT_PROFILES_PATH})")
+    crawl.add_argument("--journal", help=f"journal SQLite pour reprendre un crawl interrompu (ex: {DEFAULT_JOURNAL_PATH})")
+    crawl.add_argument("--resume", action="store_true", help="reprend les URLs pending/failed du journal, sans listing")
+    crawl.add_argument("--retry-failed", action="store_true", help="ne retente que les URLs failed du journal")
+    crawl.add_argument("--metrics", metavar="PATH", help="durées par étape/URL, compteurs et percentiles en JSON")
+    crawl.add_argument("--metrics-prom", metavar="PATH",
+                       help="mêmes métriques au format textfile Prometheus (node_exporter), ex: /var/lib/node_exporter/crapy.prom")
+    crawl.add_argument("--profile", choices=PROFILERS,
+                       help="profile l'extraction (cProfile, ou pyinstrument s'il est installé)")
+    crawl.add_argument("--profile-out", default="crapy_profile",
+                       help="fichier du profil, sans extension (.prof pour cProfile, .html pour pyinstrument)")
+    crawl.add_argument("--incremental", metavar="PATH",
+                       help=f"empreintes SQLite des fiches (ex: {DEFAULT_FINGERPRINTS_PATH}) : la sortie ne contient "
+                            "que le delta new/changed/removed (champ 'change')")
+    crawl.add_argument("-o", "--output", default="-", help=OUTPUT_HELP)
+
+    worker_opts = argparse.ArgumentParser(add_help=False)
+    worker_opts.add_argument("--journal", required=True, help="journal SQLite partagé (file de travail et fiches)")
+    worker_opts.add_argument("--lease-s", type=float, default=300,
+                             help="durée du bail (s) : passé ce délai sans nouvelle d'un worker, ses URLs sont reprises")
+    worker_opts.add_argument("--host-cap", type=int, default=4,
+                             help="URLs d'un même domaine en cours au plus, tous workers confondus (0 = illimité)")
+    worker_opts.add_argument("--concurrency", type=int, default=2,
+                             help="pages en parallèle par worker (= URLs louées au plus par worker)")
+    worker_opts.add_argument("--per-host", type=int, default=2, help="visites simultanées max par domaine et par worker")
+    worker_opts.add_argument("--max-rate", type=float, default=2.0,
+                             help="débit max par domaine (req/s) ; le coordinateur le répartit entre ses workers")
+    worker_opts.add_argument("--timeout", type=int, default=70, help="timeout navigation en secondes")
+    worker_opts.add_argument("--wait-ms", type=int, default=2500, help="attente max après chargement (ms)")
+    worker_opts.add_argument("--resources", choices=list(RESOURCE_PRESETS), default="full")
+    worker_opts.add_argument("--fetch", choices=["browser", "auto"], default="browser")
+    worker_opts.add_argument("--fetch-modes", default=DEFAULT_FETCH_MODES_PATH)
+    worker_opts.add_argument("--profiles", default=DEFAULT_PROFILES_PATH)
+    worker_opts.add_argument("--extract", choices=["python", "page"], default="python")
+    worker_opts.add_argument("--headful", action="store_true", help="affiche le navigateur")
+
+    worker = sub.add_parser("worker", parents=[worker_opts],
+                            help="scrape les URLs louées dans un journal partagé (un navigateur par worker)")
+    worker.add_argument("--worker-id", default="", help="nom du worker (défaut: machine-pid)")
+
+    coordinator = sub.add_parser("coordinator", parents=[worker_opts, url_opts],
+                                 help="remplit le journal, lance N workers et fusionne leurs fiches")
+    coordinator.add_argument("--workers", type=int, default=2, help="workers locaux à lancer (0 = externes seulement)")
+    coordinator.add_argument("--listing", help="URL catégorie (listing) dont les fiches alimentent la file")
+    coordinator.add_argument("--prefix", help="préfixe des URLs produits")
+    coordinator.add_argument("--pages", type=int, default=1, help="nb max de pages listing")
+    coordinator.add_argument("--urls-file", help="fichier d'URLs produits ('-' = stdin) au lieu du listing")
+    coordinator.add_argument("--retry-failed", action="store_true", help="remet les URLs failed en attente")
+    coordinator.add_argument("-o", "--output", default="-", help="fiches fusionnées : " + OUTPUT_HELP)
+
+    export = sub.add_parser("export", help="exporte les fiches d'un journal de crawl")
+    export.add_argument("--journal", required=True, help="journal SQLite")
+    export.add_argument("-o", "--output", default="-", help=OUTPUT_HELP)
+
+    replay = sub.add_parser("replay", parents=[cache_opts], help="ré-extrait les fiches du cache, sans navigateur")
+    replay.add_argument("--prefix", default="", help="préfixe des URLs produits à rejouer")
+    replay.add_argument("-o", "--output", default="-", help=OUTPUT_HELP)
+
+    return parser
+
+
+def open_cache(args) -> HtmlCache | None:
+    if not args.cache:
+        return None
+    return HtmlCache(args.cache, ttl_s=args.cache_ttl * 3600, max_bytes=args.cache_max_mb * 1024 * 1024)
+
+
+def url_rules(args) -> UrlRules:
+    def expand(values):
+        return [rule for value in values for rule in (read_url_file(value[1:]) if value.startswith("@") else [value])]
+
+    return UrlRules(include=[args.prefix or "", *expand(args.include)], exclude=expand(args.exclude))
+
+
+def url_canonicalizer(args) -> UrlCanonicalizer | None:
+    if args.raw_urls:
+        return None
+    return UrlCanonicalizer(
+        strip_params=[p.strip() for p in args.strip_params.split(",")],
+        sort_query=not args.keep_query_order,
+        fold_slash=not args.strict_urls,
+        fold_case=args.fold_case and not args.strict_urls,
+    )
+
+
+def open_seen(args) -> SeenSet | None:
+    if not args.seen:
+        return None
+    return SeenSet(args.seen, capacity=args.seen_capacity, error_rate=args.seen_error)
+
+
+def run_replay(args) -> int:
+    if not args.cache:
+        log_stderr("✗ --cache est requis.")
+        return 2
+    engine = CrawlEngine(cache=open_cache(args), offline=True)
+    t0 = time.perf_counter()
+    with open_sink(args.output) as sink:
+        engine.replay(args.prefix, on_result=sink, keep_rows=False)
+    engine.logger(f"✓ Rejoué: {sink.count} fiche(s) en {time.perf_counter() - t0:.1f}s")
+    return 0
+
+
+def run_export(args) -> int:
+    journal = CrawlJournal(args.journal)
+    with open_sink(args.output) as sink:
+        for row in journal.iter_rows():
+            sink.write(row)
+    log_stderr(f"✓ Exporté: {sink.count} fiche(s) | " + " ".join(f"{k}={v}" for k, v in journal.counts().items()))
+    journal.close()
+    return 0
+
+
+def run_crawl(args) -> int:
+    if args.offline and not args.cache:
+        log_stderr("✗ --offline nécessite --cache.")
+        return 2
+    if (args.resume or args.retry_failed) and not args.journal:
+        log_stderr("✗ --resume / --retry-failed nécessitent --journal.")
+        return 2
+    if args.seen and args.incremental:
+        # Les fiches ignorées seraient comptées comme retirées du catalogue.
+        log_stderr("✗ --seen et --incremental ne vont pas ensemble.")
+        return 2
+    metrics = Metrics(profiler=args.profile)
+    journal = CrawlJournal(args.journal) if args.journal else None
+    # Un seul Chromium pour le listing et les fiches.
+    session = None if args.offline else BrowserSession(headless=not args.headful)
+    try:
+        return crawl_with_engine(args, journal, session, metrics)
+    finally:
+        if session:
+            session.close()
+        # Aussi après un échec : le textfile Prometheus sert justement à surveiller les runs ratés.
+        save_metrics(args, metrics)
+
+
+def save_metrics(args, metrics: Metrics) -> None:
+    if args.metrics:
+        metrics.save_json(args.metrics)
+    if args.metrics_prom:
+        metrics.save_prometheus(args.metrics_prom)
+    if args.profile:
+        path = args.profile_out + (".prof" if args.profile == "cprofile" else ".html")
+        metrics.save_profile(path)
+        log_stderr(f"  profil {args.profile}: {path}")
+
+
+def crawl_with_engine(
+    args, journal: CrawlJournal | None, session: BrowserSession | None, metrics: Metrics | None = None
+) -> int:
+    engine = CrawlEngine(
+        timeout_s=args.timeout,
+        wait_ms=args.wait_ms,
+        adaptive_wait=not args.fixed_wait,
+        headless=not args.headful,
+        delay_min=args.delay_min,
+        delay_max=args.delay_max,
+        concurrency=args.concurrency,
+        per_host=args.per_host,
+        max_rate=args.max_rate,
+        parse_workers=args.parse_workers,
+        cache=open_cache(args),
+        offline=args.offline,
+        journal=journal,
+        resource_policy=ResourcePolicy(
+            args.resources,
+            blocked_domains=(DEFAULT_BLOCKED_DOMAINS if args.resources != "full" else ()) + tuple(args.block_domain),
+        ),
+        http_client=HttpClient(timeout_s=args.timeout) if args.fetch == "auto" else None,
+        fetch_modes=FetchModes(args.fetch_modes or None) if args.fetch == "auto" else None,
+        profiles=ProfileStore(args.profiles or None),
+        incremental=FingerprintStore(args.incremental) if args.incremental else None,
+        metrics=metrics,
+        in_page_extract=args.extract == "page",
+        canonicalizer=url_canonicalizer(args),
+        seen=open_seen(args),
+        session=session,
+    )
+    rules = url_rules(args)
+    if args.retry_failed:
+        urls = journal.urls("failed")
+    elif args.resume:
+        urls = journal.urls("pending", "failed")
+    elif args.urls_file:
+        urls = engine.fresh_urls(read_url_file(args.urls_file), rules)
+        if engine.known_urls:
+            engine.logger(f"→ {engine.known_urls} URL(s) déjà scrapée(s) lors d'un run précédent (ignorées)")
+    elif args.listing and (args.prefix or args.include):
+        engine.logger(f"→ Listing: {args.listing}")
+        engine.logger(f"→ {'Règles' if args.include or args.exclude else 'Prefix'}: {rules}")
+        if args.two_phase:
+            urls = engine.collect_urls(
+                args.listing,
+                rules,
+                max_pages=args.pages,
+                only_same_domain=not args.all_domains,
+            )
+        else:
+            urls = None
+    else:
+        engine.logger("✗ --listing et --prefix ou --include (ou --urls-file) sont requis.")
+        return 2
+
+    fields = (*PRODUCT_FIELDS, "change") if engine.incremental else PRODUCT_FIELDS
+    with open_sink(args.output, fields=fields) as sink:
+        if urls is None:
+            engine.logger("→ Scrape en flux pendant le listing")
+            results = engine.crawl(
+                args.listing,
+                rules,
+                max_pages=args.pages,
+                only_same_domain=not args.all_domains,
+                on_result=sink,
+                limit=max(0, args.limit),
+                keep_rows=False,
+            )
+        else:
+            if args.limit > 0:
+                urls = urls[:args.limit]
+            engine.logger(f"→ Scrape {len(urls)} fiche(s)")
+            engine.scrape(urls, on_result=sink, keep_rows=False)
+        if engine.incremental:
+            # Les retraits ne se déduisent que d'un parcours complet du catalogue.
+            if args.limit > 0 or args.resume or args.retry_failed:
+                engine.logger("  incrémental: run partiel, retraits non calculés")
+                engine.incremental.flush()
+            else:
+                for row in engine.incremental.finish_run(rules):
+                    sink({**row, "change": "removed"})
+    engine.logger(f"✓ Terminé: {sink.count} fiche(s)")
+    if engine.incremental:
+        engine.logger(f"  incrémental: {engine.incremental.summary()}")
+        engine.incremental.close()
+    if engine.seen is not None:
+        engine.logger(f"  URLs vues: {engine.seen.summary()}")
+        engine.seen.close()
+    if journal:
+        engine.logger("  journal: " + " ".join(f"{k}={v}" for k, v in journal.counts().items()))
+        journal.close()
+    if engine.cache:
+        engine.logger(f"  cache: {engine.cache.hits} lue(s), {engine.cache.misses} manquée(s)")
+    if engine.http_client:
+        engine.http_client.close()
+    return 0
+
+
+WORKER_POLL_S = 2.0
+WORKER_BUSY_POLL_S = 0.2
+COORDINATOR_POLL_S = 5.0
+
+
+def run_worker(args) -> int:
+    """Worker : loue des URLs dans le journal partagé, les scrape avec son propre navigateur et y
+    enregistre les fiches, jusqu'à ce qu'il ne reste plus rien en attente."""
+    owner = args.worker_id or f"{socket.gethostname()}-{os.getpid()}"
+    # Écritures validées une à une : les autres workers ne doivent pas attendre un lot ouvert.
+    journal = CrawlJournal(args.journal, batch_size=1)
+    session = BrowserSession(headless=not args.headful)
+    engine = CrawlEngine(
+        timeout_s=args.timeout,
+        wait_ms=args.wait_ms,
+        headless=not args.headful,
+        concurrency=args.concurrency,
+        per_host=args.per_host,
+        max_rate=args.max_rate,
+        journal=journal,
+        resource_policy=ResourcePolicy(
+            args.resources, blocked_domains=DEFAULT_BLOCKED_DOMAINS if args.resources != "full" else ()
+        ),
+        http_client=HttpClient(timeout_s=args.timeout) if args.fetch == "auto" else None,
+        fetch_modes=FetchModes(args.fetch_modes or None) if args.fetch == "auto" else None,
+        profiles=ProfileStore(args.profiles or None),
+        in_page_extract=args.extract == "page",
+        session=session,
+        logger=lambda message: log_stderr(f"[{owner}] {message}"),
+    )
+    stop = threading.Event()
+
+    def heartbeat():
+        while not stop.wait(args.lease_s / 3):
+            journal.renew(owner, args.lease_s)
+
+    async def leased_batches():
+        # On ne loue que pour les pages libres : une URL louée d'avance dans la file interne
+        # bloquerait sa part du plafond par domaine pendant que les autres workers attendent.
+        while True:
+            free = args.concurrency - journal.leases().get(owner, 0)
+            urls = journal.lease(owner, free, args.lease_s, args.host_cap) if free > 0 else []
+            if urls:
+                yield urls
+            elif free <= 0:
+                await asyncio.sleep(WORKER_BUSY_POLL_S)
+            elif journal.counts()["pending"]:
+                # URLs louées ailleurs (ou chez nous, en cours) : un bail expiré sera repris.
+                await asyncio.sleep(WORKER_POLL_S)
+            else:
+                return
+
+    threading.Thread(target=heartbeat, daemon=True).start()
+    engine.logger(f"→ Worker sur {args.journal} ({args.concurrency} page(s), bail {args.lease_s:.0f}s)")
+    try:
+        engine.run_sync(engine.scrape_stream(leased_batches(), keep_rows=False))
+    finally:
+        stop.set()
+        journal.release(owner)
+        session.close()
+        if engine.http_client:
+            engine.http_client.close()
+        engine.logger("✓ Worker terminé: " + " ".join(f"{k}={v}" for k, v in journal.counts().items()))
+        journal.close()
+    return 0
+
+
+def worker_command(args, worker_id: str, workers: int) -> list[str]:
+    """Ligne de commande d'un worker local ; le débit max par domaine est partagé entre workers."""
+    command = [
+        sys.executable, "-m", "crapy", "worker",
+        "--journal", args.journal,
+        "--worker-id", worker_id,
+        "--lease-s", str(args.lease_s),
+        "--host-cap", str(args.host_cap),
+        "--concurrency", str(args.concurrency),
+        "--per-host", str(args.per_host),
+        "--max-rate", str(args.max_rate / max(1, workers)),
+        "--timeout", str(args.timeout),
+        "--wait-ms", str(args.wait_ms),
+        "--resources", args.resources,
+        "--fetch", args.fetch,
+        "--fetch-modes", args.fetch_modes,
+        "--profiles", args.profiles,
+        "--extract", args.extract,
+    ]
+    if args.headful:
+        command.append("--headful")
+    return command
+
+
+def worker_env() -> dict:
+    """Environnement d'un worker local : `python -m crapy` y trouve ce même paquet, quel que soit
+    le dossier courant."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    path = os.environ.get("PYTHONPATH")
+    return {**os.environ, "PYTHONPATH": root + (os.pathsep + path if path else "")}
+
+
+def run_coordinator(args) -> int:
+    """Remplit la frontière du journal (listing ou fichier d'URLs), lance `--workers` workers
+    locaux, suit l'avancement, puis fusionne les fiches de tous les workers dans `-o`.
+    Avec `--seen`, seul le coordinateur lit et complète le fichier des URLs déjà scrapées."""
+    journal = CrawlJournal(args.journal)
+    seen = open_seen(args)
+    try:
+        if args.retry_failed:
+            log_stderr(f"→ {journal.requeue_failed()} URL(s) failed remise(s) en attente")
+        rules = url_rules(args)
+        from_listing = not args.urls_file and args.listing and (args.prefix or args.include)
+        session = BrowserSession(headless=not args.headful) if from_listing else None
+        try:
+            engine = CrawlEngine(timeout_s=args.timeout, wait_ms=args.wait_ms, headless=not args.headful,
+                                 max_rate=args.max_rate, canonicalizer=url_canonicalizer(args), seen=seen,
+                                 session=session, journal=journal)
+            if args.urls_file:
+                journal.add_urls(engine.fresh_urls(read_url_file(args.urls_file), rules))
+            elif from_listing:
+                engine.logger(f"→ Listing: {args.listing}")
+                journal.add_urls(engine.collect_urls(args.listing, rules, max_pages=args.pages))
+        finally:
+            if session:
+                session.close()
+        if engine.known_urls:
+            log_stderr(f"→ {engine.known_urls} URL(s) déjà scrapée(s) lors d'un run précédent (ignorées)")
+        log_stderr("→ Frontière: " + " ".join(f"{k}={v}" for k, v in journal.counts().items()))
+
+        env = worker_env()
+        workers = [
+            subprocess.Popen(worker_command(args, f"w{i + 1}", args.workers), env=env) for i in range(args.workers)
+        ]
+        if not workers:
+            log_stderr("→ Aucun worker local : en attente des workers externes (python -m crapy worker)")
+        t0 = time.perf_counter()
+        start_done = journal.counts()["done"]
+        try:
+            while journal.counts()["pending"] and (not workers or any(w.poll() is None for w in workers)):
+                time.sleep(COORDINATOR_POLL_S)
+                counts = journal.counts()
+                rate = (counts["done"] - start_done) / (time.perf_counter() - t0)
+                leases = " ".join(f"{owner}={n}" for owner, n in sorted(journal.leases().items()))
+                log_stderr(f"  pending={counts['pending']} done={counts['done']} failed={counts['failed']} "
+                           f"| {rate:.2f} fiche(s)/s | en cours: {leases or '-'}")
+            for worker in workers:
+                worker.wait()
+        finally:
+            for worker in workers:
+                if worker.poll() is None:
+                    worker.terminate()
+
+        with open_sink(args.output) as sink:
+            for row in journal.iter_rows():
+                sink(row)
+                if seen is not None:
+                    seen.add(engine.url_key(row["url"]))
+        if seen is not None:
+            log_stderr(f"  URLs vues: {seen.summary()}")
+        counts = journal.counts()
+        log_stderr(f"✓ Fusion: {sink.count} fiche(s) → {args.output} | "
+                   + " ".join(f"{k}={v}" for k, v in counts.items()))
+        failed_workers = [w.args[w.args.index("--worker-id") + 1] for w in workers if w.returncode]
+        if failed_workers:
+            log_stderr(f"⚠️ worker(s) en erreur: {', '.join(failed_workers)}")
+        if counts["pending"]:
+            log_stderr(f"⚠️ {counts['pending']} URL(s) encore en attente (relancer le coordinateur ou des workers)")
+            return 1
+        return 1 if failed_workers else 0
+    finally:
+        if seen is not None:
+            seen.close()
+        journal.close()
+
+
+def main(argv=None) -> int:
+    args = build_arg_parser().parse_args(argv)
+    commands = {
+        "crawl": run_crawl,
+        "replay": run_replay,
+        "export": run_export,
+        "worker": run_worker,
+        "coordinator": run_coordinator,
+    }
+    if args.command in commands:
+        try:
+            return commands[args.command](args)
+        except Exception as e:
+            log_stderr(f"✗ Erreur: {e}")
+            return 1
+    # Tk n'est importé que pour l'interface : les commandes ci-dessus tournent sans lui.
+    from crapy_gui import App
+
+    App().mainloop()
+    return 0
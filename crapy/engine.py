@@ -0,0 +1,1094 @@
+"""Moteur de crawl : listing, fiches et ordre de publication."""
+
+import asyncio
+import functools
+import json
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from urllib.parse import urlparse
+
+from .browser import (
+    LISTING_SCROLLS,
+    LISTING_SCROLL_WAIT_MS,
+    PRODUCT_LINK_COUNT_JS,
+    PRODUCT_SCROLL_WAIT_MS,
+    READY_SELECTORS_JS,
+    BrowserSession,
+    WaitStats,
+    goto_page,
+    imitate_entry_mouse_clicks,
+    readiness_selectors,
+    wait_for_condition,
+    wait_until_ready,
+)
+from .challenge import looks_like_bot_challenge
+from .extraction import (
+    PROFILE_KEYS,
+    build_extraction_profile,
+    extract_in_page,
+    extract_product_info,
+    extract_with_hits,
+    parse_html,
+)
+from .httpclient import FetchModes, HttpClient, filled_fields
+from .metrics import Metrics
+from .pacing import (
+    LISTING_ATTEMPTS,
+    CircuitBreaker,
+    FetchError,
+    HostLimiter,
+    RetryScheduler,
+    as_fetch_error,
+    response_feedback,
+    status_error,
+)
+from .pagination import CLICK_LOAD_MORE_JS, LOAD_MORE_RE, Pagination, detect_pagination
+from .profiles import ProfileStore
+from .resources import ResourcePolicy
+from .stores import GONE_STATUSES, CachedPage, CrawlJournal, FingerprintStore, HtmlCache, validators
+from .urls import (
+    SeenSet,
+    UrlCanonicalizer,
+    UrlRules,
+    document_base,
+    extract_all_hrefs,
+    hrefs_to_absolute,
+    resolve_hrefs_offline,
+    select_urls,
+)
+from .util import log_stderr
+
+
+# Fiches terminées gardées au plus en attente d'une fiche plus ancienne (reprise différée) ;
+# au-delà, OrderedEmitter publie sans attendre et la retardataire sortira hors ordre.
+ORDER_WINDOW = 1000
+
+
+class OrderedEmitter:
+    """Tampon de réordonnancement : publie les fiches dans l'ordre des URLs d'entrée,
+    quel que soit l'ordre dans lequel pages et process d'extraction les terminent.
+
+    Le tampon est borné à `window` fiches : derrière une fiche en reprise différée, les
+    suivantes sont publiées quand même une fois la fenêtre pleine, et la retardataire sort dès
+    qu'elle arrive (`late` les compte)."""
+
+    def __init__(self, on_result=None, keep_rows: bool = True, window: int = ORDER_WINDOW):
+        self.on_result = on_result
+        self.keep_rows = keep_rows
+        self.window = max(1, window)
+        self.rows = []
+        self.late = 0
+        self._next = 0
+        self._ready = {}
+
+    def push(self, index: int, row: dict | None):
+        if index < self._next:
+            # Sautée quand la fenêtre a débordé : publiée hors ordre.
+            self.late += 1
+            self.emit(row)
+            return
+        self._ready[index] = row
+        if len(self._ready) > self.window:
+            self._next = min(self._ready)
+        while self._next in self._ready:
+            self._next += 1
+            self.emit(self._ready.pop(self._next - 1))
+
+    def emit(self, row: dict | None):
+        if row is not None:
+            if self.keep_rows:
+                self.rows.append(row)
+            if self.on_result:
+                self.on_result(row)
+
+
+class CrawlEngine:
+    """Pipeline listing → URLs produits → fiches, utilisable sans Tk (CLI, cron, conteneur).
+
+    Les fiches passent par un pool de `concurrency` pages (au plus `per_host` par site) et sortent
+    dans l'ordre des URLs. Le reste est facultatif : cache et rejeu hors ligne, journal de reprise,
+    HTTP simple d'abord, profils d'extraction, re-scrape incrémental, URLs déjà vues."""
+
+    def __init__(
+        self,
+        timeout_s: int = 70,
+        wait_ms: int = 2500,
+        headless: bool = True,
+        delay_min: int = 900,
+        delay_max: int = 1900,
+        concurrency: int = 1,
+        per_host: int = 2,
+        max_rate: float = 2.0,
+        parse_workers: int = 0,
+        cache: HtmlCache | None = None,
+        offline: bool = False,
+        journal: CrawlJournal | None = None,
+        resource_policy: ResourcePolicy | None = None,
+        adaptive_wait: bool = True,
+        http_client: HttpClient | None = None,
+        fetch_modes: FetchModes | None = None,
+        profiles: ProfileStore | None = None,
+        incremental: FingerprintStore | None = None,
+        metrics: Metrics | None = None,
+        in_page_extract: bool = False,
+        canonicalizer: UrlCanonicalizer | None = None,
+        seen: SeenSet | None = None,
+        session: BrowserSession | None = None,
+        logger=log_stderr,
+    ):
+        self.timeout_s = timeout_s
+        self.wait_ms = wait_ms
+        self.headless = headless
+        self.delay_min = delay_min
+        self.delay_max = delay_max
+        self.concurrency = max(1, concurrency)
+        self.per_host = max(1, per_host)
+        self.max_rate = max_rate
+        self.host_rates = {}  # rythme appris par hôte, conservé d'une étape (et d'un run) à l'autre
+        self.parse_workers = max(0, parse_workers)
+        self.cache = cache
+        self.offline = offline
+        self.journal = journal
+        self.resource_policy = resource_policy
+        self.adaptive_wait = adaptive_wait
+        self.wait_stats = WaitStats()
+        self.http_client = None if offline else http_client
+        self.fetch_modes = fetch_modes if fetch_modes is not None else FetchModes()
+        self.http_pages = 0
+        self.profiles = profiles if profiles is not None else ProfileStore()
+        self._profiles_used = set()
+        self.incremental = incremental
+        self._validators = {}  # url -> (ETag, Last-Modified) de la dernière réponse, jusqu'à record()
+        self._probe_client = None
+        # Hôtes qui ignorent les requêtes conditionnelles (200 au lieu de 304) : plus de sonde.
+        self._no_probe_hosts: set[str] = set()
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.in_page_extract = in_page_extract and not offline
+        self.in_page_pages = 0
+        self.in_page_bytes = 0
+        self.canonicalizer = canonicalizer
+        self.seen = seen
+        self.known_urls = 0
+        self.session = session
+        self._leased = []
+        self._open_session = None
+        self.logger = logger
+
+    @asynccontextmanager
+    async def open_browser(self):
+        if self.offline:
+            yield None
+            return
+        if self._open_session is not None:
+            # Déjà ouvert par l'étape englobante (listing lu pendant le scrape en mode flux).
+            yield self._open_session
+            return
+        session = self.session or BrowserSession(self.headless)
+        await session.start(self.headless, self.resource_policy)
+        self._open_session = session
+        try:
+            yield session
+        finally:
+            self._open_session = None
+            leased, self._leased = self._leased, []
+            for page in leased:
+                await session.release(page)
+            if self.session:
+                self.logger(f"  {session.summary()}")
+            else:
+                await session.aclose()
+            if self.resource_policy:
+                self.logger(f"  {self.resource_policy.summary()}")
+            if self.wait_stats.pages:
+                self.logger(f"  {self.wait_stats.summary()}")
+
+    async def new_page(self, session):
+        if session is None:
+            return None
+        page = await session.acquire(self.timeout_s)
+        self._leased.append(page)
+        return page
+
+    def new_limiter(self) -> HostLimiter:
+        return HostLimiter(
+            self.per_host,
+            self.delay_min,
+            self.delay_max,
+            self.max_rate,
+            rates=self.host_rates,
+            robots_fetch=None if self.offline else self.fetch_robots,
+            logger=self.logger,
+        )
+
+    def fetch_robots(self, url: str) -> str | None:
+        client = self.http_client or HttpClient(timeout_s=10)
+        try:
+            fetched = client.get(url)
+        finally:
+            if client is not self.http_client:
+                client.close()
+        return fetched.html if fetched.status == 200 else None
+
+    def run_sync(self, coro):
+        # Avec une session partagée, tout passe par sa boucle : navigateur et contextes restent ouverts.
+        if self.session and not self.offline:
+            return self.session.run(coro)
+        return asyncio.run(coro)
+
+    def collect_urls(
+        self, listing_url: str, prefix: str | UrlRules, max_pages: int = 1, only_same_domain: bool = True
+    ) -> list[str]:
+        """Parcourt les pages listing et retourne les URLs produits uniques filtrées par préfixe
+        (ou par des `UrlRules`)."""
+        return self.run_sync(self.collect_urls_async(listing_url, prefix, max_pages, only_same_domain))
+
+    def scrape(self, urls: list[str], on_result=None, keep_rows: bool = True) -> list[dict]:
+        """Scrape les fiches produits; `on_result(row)` est appelé dès qu'une fiche est extraite.
+
+        Avec `keep_rows=False` les fiches ne sont pas accumulées (mémoire constante, liste vide
+        en retour) : `on_result` est alors le seul consommateur."""
+        return self.run_sync(self.scrape_async(urls, on_result, keep_rows))
+
+    async def collect_urls_async(
+        self, listing_url: str, prefix: str | UrlRules, max_pages: int = 1, only_same_domain: bool = True
+    ) -> list[str]:
+        return [
+            url
+            async for batch in self.iter_product_urls(listing_url, prefix, max_pages, only_same_domain)
+            for url in batch
+        ]
+
+    async def iter_product_urls(
+        self,
+        listing_url: str,
+        prefix: str | UrlRules,
+        max_pages: int = 1,
+        only_same_domain: bool = True,
+        limiter: HostLimiter | None = None,
+    ):
+        """Parcourt les pages listing et produit, page par page, les nouvelles URLs produits
+        (filtrées par préfixe, dédupliquées au fil de l'eau). Avec un `limiter` (mode flux),
+        les pages listing partagent le rythme par hôte des fiches.
+
+        La pagination est détectée sur la première page ; la page suivante est préchargée dans
+        une 2e page navigateur pendant le traitement de la courante, et le parcours s'arrête dès
+        qu'une page n'apporte aucune URL produit nouvelle (`max_pages` reste un plafond).
+        Les URLs sont canonisées (`canonicalizer`) avant filtrage et déduplication ; celles déjà
+        scrapées lors d'un run précédent (`seen`) ne sont pas reproduites."""
+        max_pages = max(1, max_pages)
+        limiter = limiter or self.new_limiter()
+        rules = UrlRules.of(prefix)
+        keys = set()
+        known = self.known_urls
+        visited = {listing_url}
+        async with self.open_browser() as session:
+            page = await self.new_page(session)
+            spare = None
+            prefetch = None
+            page_url = listing_url
+            pagination = None
+            try:
+                for idx in range(1, max_pages + 1):
+                    self.logger(f"  [{idx}/{max_pages}] {page_url}")
+                    if prefetch is not None:
+                        loaded, prefetch = await prefetch, None
+                        page, spare = spare, page
+                    elif pagination is not None and pagination.in_page:
+                        loaded = await self.advance_listing(page, pagination, rules)
+                    else:
+                        loaded = await self.load_listing(page, page_url, rules, limiter, first=idx == 1)
+                    if loaded is None:
+                        break
+                    html, base_url, navigated = loaded
+                    base_url = document_base(html, base_url)
+
+                    if pagination is None:
+                        pagination = detect_pagination(page_url, html, base_url)
+                        self.logger(f"    ↳ pagination: {pagination.kind}")
+                    next_url = None
+                    if idx < max_pages and not pagination.in_page:
+                        next_url = pagination.next_url(page_url, html, base_url)
+                        if next_url in visited:
+                            next_url = None
+                        elif next_url:
+                            visited.add(next_url)
+                        if next_url and page is not None:
+                            # Préchargement : la page suivante se charge pendant qu'on traite celle-ci.
+                            spare = spare or await self.new_page(session)
+                            prefetch = asyncio.create_task(
+                                self.load_listing(spare, next_url, rules, limiter)
+                            )
+
+                    with self.metrics.stage("hrefs", page_url):
+                        hrefs = extract_all_hrefs(html)
+                        if page is None:
+                            abs_links = resolve_hrefs_offline(hrefs, base_url)
+                        else:
+                            abs_links = await hrefs_to_absolute(page, hrefs, base_url=base_url)
+                    links = select_urls(
+                        abs_links, rules, self.canonicalizer, keys, base_url=listing_url if only_same_domain else ""
+                    )
+                    fresh = self.unseen(links)
+                    self.logger(
+                        f"    ✓ href: {len(hrefs)} | absolus: {len(abs_links)} | nouveaux produits: {len(links)}"
+                        + (f" (dont {len(links) - len(fresh)} déjà vu(s))" if len(fresh) < len(links) else "")
+                    )
+                    if not links:
+                        if idx > 1:
+                            self.logger("    ↳ aucune URL produit nouvelle : fin du listing")
+                        break
+                    if fresh:
+                        yield fresh
+                    if pagination.in_page:
+                        if page is None:
+                            break
+                        continue
+                    if not next_url:
+                        break
+                    page_url = next_url
+            finally:
+                if prefetch is not None:
+                    prefetch.cancel()
+                    await asyncio.gather(prefetch, return_exceptions=True)
+
+        self.logger(f"✓ liens produits uniques après filtre: {len(keys)}")
+        if self.known_urls > known:
+            self.logger(f"  dont {self.known_urls - known} déjà scrapé(s) lors d'un run précédent (ignorés)")
+        if not keys:
+            raise RuntimeError(
+                "0 lien produit après filtre.\n"
+                "Teste un prefix plus large: https://www.king-jouet.com/jeu-jouet/\n"
+                "ou colle le début exact d’une URL produit."
+            )
+
+    async def load_listing(
+        self, page, page_url: str, rules: UrlRules, limiter: HostLimiter, first: bool = False
+    ) -> tuple | None:
+        """Charge une page listing (cache ou navigateur). Retourne (html, base_url, naviguée),
+        ou None si la page n'existe pas (HTTP >= 400) ; au-delà de la 1re page, une page
+        illisible termine simplement la pagination.
+
+        Les échecs transitoires (réseau, 429/5xx, challenge) repassent par un RetryScheduler :
+        délai selon le type d'échec et Retry-After, attendu hors du créneau de l'hôte pour que
+        les fiches du même domaine continuent pendant la pause."""
+        retries = RetryScheduler(asyncio.Queue(), max_attempts=LISTING_ATTEMPTS)
+        try:
+            cached = self.cache_lookup(page_url)
+            if cached:
+                if cached.status and cached.status >= 400:
+                    return None
+                return cached.html, cached.final_url, False
+            await retries.put((0, page_url))
+            while True:
+                item = await retries.queue.get()
+                try:
+                    r, html = await self.open_listing(page, page_url, rules, limiter)
+                    break
+                except FetchError as e:
+                    tries = retries.attempts.get(0, 0) + 1
+                    delay = retries.fail(item, e)
+                    if delay is None:
+                        if tries > 1:
+                            raise FetchError(
+                                e.kind, f"Impossible d'ouvrir {page_url} après {tries} tentative(s) ({e})."
+                            ) from e
+                        raise
+                    self.metrics.count("retry")
+                    self.logger(f"    ↻ {e.kind}: {e} — nouvelle tentative dans {delay:.0f}s")
+            retries.settle(0)
+        except Exception as e:
+            if first:
+                raise
+            self.logger(f"    ⚠️ {page_url}: {e} (fin du listing)")
+            return None
+        finally:
+            retries.cancel()
+        base_url = page.url
+        status = r.status if r else None
+        if self.cache:
+            self.cache.put(page_url, status, html, final_url=base_url)
+        if status and status >= 400:
+            self.logger(f"    ↳ HTTP {status} : fin du listing")
+            return None
+        return html, base_url, True
+
+    async def open_listing(self, page, page_url: str, rules: UrlRules, limiter: HostLimiter) -> tuple:
+        """Une tentative sur une page listing, dans le créneau de l'hôte. Retourne (response,
+        html) ; lève FetchError sur un échec transitoire (dont 429/5xx)."""
+        t0 = time.perf_counter()
+        async with limiter.slot(page_url):
+            self.metrics.add("pace", time.perf_counter() - t0, page_url)
+            try:
+                with self.metrics.stage("listing", page_url):
+                    if self.adaptive_wait:
+                        r, html = await self.open_listing_adaptive(page, page_url, rules)
+                    else:
+                        r, html = await self.open_listing_fixed(page, page_url)
+            except Exception as e:
+                limiter.feedback(page_url, failed=True)
+                self.metrics.response(None)
+                raise as_fetch_error(e) from e
+        limiter.feedback(page_url, *response_feedback(r))
+        self.metrics.response(r.status if r else None, html)
+        transient = status_error(r.status, r.headers.get("retry-after")) if r else None
+        if transient:
+            raise transient
+        return r, html
+
+    async def advance_listing(self, page, pagination: Pagination, rules: UrlRules) -> tuple | None:
+        """Page suivante sans changer d'URL : clic sur « voir plus » ou défilement. Retourne
+        (html, base_url, True), ou None si aucun lien produit n'est apparu."""
+        if page is None:
+            return None
+        prefixes = rules.prefixes
+        count = await page.evaluate(PRODUCT_LINK_COUNT_JS, prefixes)
+        grew_js = f"([prefixes, n]) => ({PRODUCT_LINK_COUNT_JS})(prefixes) > n"
+        if pagination.kind == "load-more":
+            if not await page.evaluate(CLICK_LOAD_MORE_JS, LOAD_MORE_RE.pattern):
+                return None
+            grew = await wait_for_condition(page, grew_js, [prefixes, count], self.wait_ms)
+        else:
+            grew = False
+            for _ in range(LISTING_SCROLLS):
+                n = await page.evaluate(PRODUCT_LINK_COUNT_JS, prefixes)
+                await page.mouse.wheel(0, 2200)
+                if not await wait_for_condition(page, grew_js, [prefixes, n], LISTING_SCROLL_WAIT_MS):
+                    break
+                grew = True
+        if not grew:
+            return None
+        return await page.content(), page.url, True
+
+    def crawl(
+        self,
+        listing_url: str,
+        prefix: str | UrlRules,
+        max_pages: int = 1,
+        only_same_domain: bool = True,
+        on_result=None,
+        limit: int = 0,
+        keep_rows: bool = True,
+    ) -> list[dict]:
+        """Mode flux : les fiches trouvées sur une page listing partent au scrape sans attendre
+        la fin du listing ; durée ≈ max(listing, fiches) au lieu de leur somme."""
+        return self.run_sync(
+            self.crawl_async(listing_url, prefix, max_pages, only_same_domain, on_result, limit, keep_rows)
+        )
+
+    async def crawl_async(
+        self,
+        listing_url: str,
+        prefix: str | UrlRules,
+        max_pages: int = 1,
+        only_same_domain: bool = True,
+        on_result=None,
+        limit: int = 0,
+        keep_rows: bool = True,
+    ) -> list[dict]:
+        limiter = self.new_limiter()
+        batches = self.iter_product_urls(listing_url, prefix, max_pages, only_same_domain, limiter=limiter)
+        return await self.scrape_stream(batches, on_result, limiter=limiter, limit=limit, keep_rows=keep_rows)
+
+    async def scrape_async(self, urls: list[str], on_result=None, keep_rows: bool = True) -> list[dict]:
+        if self.journal:
+            self.journal.add_urls(urls)
+            todo = self.journal.todo(urls)
+            if len(todo) < len(urls):
+                self.logger(f"→ Journal: {len(urls) - len(todo)} fiche(s) déjà traitée(s), {len(todo)} à faire")
+            urls = todo
+        if not urls:
+            return []
+
+        async def single_batch():
+            yield urls
+
+        return await self.scrape_stream(single_batch(), on_result, total=len(urls), keep_rows=keep_rows)
+
+    async def scrape_stream(
+        self,
+        batches,
+        on_result=None,
+        total: int | None = None,
+        limiter: HostLimiter | None = None,
+        limit: int = 0,
+        keep_rows: bool = True,
+    ) -> list[dict]:
+        """Scrape les URLs reçues par lots (`async for batch in batches`) au fur et à mesure.
+
+        Sans `total` (flux venu du listing), chaque lot passe par le journal et `limit` arrête
+        la lecture des lots une fois atteint."""
+        pool_size = max(1, min(self.concurrency, total or self.concurrency))
+        queue = asyncio.Queue(maxsize=pool_size * 2)
+        limiter = limiter or self.new_limiter()
+        retries = RetryScheduler(queue)
+        breaker = CircuitBreaker(logger=self.logger)
+        emitter = OrderedEmitter(on_result, keep_rows=keep_rows)
+        loop = asyncio.get_running_loop()
+
+        parse_pool = None
+        if self.parse_workers > 0:
+            # "spawn" : pas de fork d'un processus qui fait tourner Playwright (et Tk côté GUI).
+            parse_pool = ProcessPoolExecutor(self.parse_workers, mp_context=multiprocessing.get_context("spawn"))
+        # Backpressure : au plus 2 pages HTML par process en attente d'extraction.
+        parse_slots = asyncio.Semaphore(self.parse_workers * 2 or 1)
+        parse_tasks = set()
+
+        async def extract_in_pool(idx, url, html, profile):
+            try:
+                with self.metrics.stage("extract", url):
+                    row, hits = await loop.run_in_executor(parse_pool, extract_with_hits, url, html, profile)
+                self.check_profile(url, hits)
+                row = self.record(url, row)
+            except Exception as e:
+                row = self.skip(url, f"extraction impossible ({e})", state="failed")
+            finally:
+                parse_slots.release()
+            emitter.push(idx, row)
+
+        failure = []
+
+        async def enqueue():
+            count = 0
+            async for batch in batches:
+                if self.incremental:
+                    self.incremental.see(batch)
+                if total is None and self.journal:
+                    self.journal.add_urls(batch)
+                    todo = self.journal.todo(batch)
+                    if len(todo) < len(batch):
+                        self.logger(f"→ Journal: {len(batch) - len(todo)} fiche(s) déjà traitée(s)")
+                    batch = todo
+                for url in batch:
+                    if limit and count >= limit:
+                        return
+                    await retries.put((count, url))
+                    count += 1
+
+        async def feed():
+            try:
+                await enqueue()
+            except Exception as e:
+                # Listing en échec : les fiches déjà en file sont terminées avant de remonter l'erreur.
+                failure.append(e)
+            finally:
+                await batches.aclose()
+            # Les reprises différées repassent par la file : on attend qu'il n'en reste plus (hors du
+            # finally, pour qu'une annulation après un worker en erreur ne reste pas bloquée ici).
+            await retries.drained()
+            for _ in range(pool_size):
+                await queue.put(None)
+
+        def failed(idx: int, url: str, e: FetchError) -> bool:
+            """Échec transitoire : reprise différée, ou abandon après MAX_ATTEMPTS."""
+            breaker.failure(url)
+            delay = retries.fail((idx, url), e)
+            if delay is None:
+                emitter.push(idx, self.skip(url, f"{e.kind}: {e}", state="failed"))
+            else:
+                self.metrics.count("retry")
+                self.logger(f"    ↻ {e.kind}: {e} — nouvelle tentative dans {delay:.0f}s")
+            return False
+
+        async def attempt(page, idx: int, url: str) -> bool:
+            """Traite une fiche ; False si elle a été remise à plus tard ou abandonnée."""
+            wait_s = breaker.check(url)
+            if wait_s is None:
+                self.metrics.count("breaker_open")
+                emitter.push(idx, self.skip(url, "domaine en panne (disjoncteur)", state="failed"))
+                retries.abandon(idx)
+                return False
+            if wait_s > 0:
+                retries.defer((idx, url), wait_s)
+                return False
+            tries = retries.attempts.get(idx, 0)
+            label = f"{idx + 1}/{total}" if total else f"{idx + 1}"
+            if tries:
+                label += f", reprise {tries}"
+            http_row = None
+            use_http = self.http_client and self.fetch_modes.get(url) != "browser"
+            if self.incremental and not use_http and await self.probe_unchanged(url, label, limiter):
+                emitter.push(idx, None)
+                return True
+            if use_http:
+                try:
+                    done, http_row = await self.scrape_http(url, label, limiter)
+                except FetchError as e:
+                    return failed(idx, url, e)
+                if done:
+                    emitter.push(idx, http_row)
+                    return True
+            # Avant le profil (1re fiche), l'attente reste fixe : le profil se construit sur une page complète.
+            profile = self.profiles.get(url)
+            ready_groups = readiness_selectors(profile) if self.adaptive_wait else None
+            # Sans profil (apprentissage) ou pour comparer au HTML serveur, il faut le HTML complet.
+            in_page = profile if self.in_page_extract and http_row is None else None
+            try:
+                html = await self.fetch_product(page, url, label, limiter, ready_groups, in_page)
+            except FetchError as e:
+                return failed(idx, url, e)
+            breaker.success(url)
+            if html is None:
+                emitter.push(idx, None)
+            elif isinstance(html, dict):
+                self.check_profile(url, html["hits"])
+                emitter.push(idx, self.record(url, html["row"]))
+            elif http_row is not None:
+                # HTML serveur incomplet : le rendu navigateur dit si le domaine a besoin de JavaScript.
+                row = self.extract_inline(url, html)
+                # Dans les deux cas, le HTML serveur reste sous le seuil de `scrape_http` : le
+                # garder en mode http ferait chaque fiche deux fois (HTTP, puis Chromium).
+                if filled_fields(row) > filled_fields(http_row):
+                    reason = "rendu JavaScript nécessaire"
+                else:
+                    reason = "HTML serveur incomplet, le rendu n'apporte rien"
+                self.set_fetch_mode(url, "browser", reason)
+                emitter.push(idx, self.record(url, row))
+            elif parse_pool is None or profile is None:
+                emitter.push(idx, self.record(url, self.extract_inline(url, html)))
+            else:
+                # Le fetcher passe à l'URL suivante pendant qu'un process extrait la fiche.
+                await parse_slots.acquire()
+                task = asyncio.create_task(extract_in_pool(idx, url, html, profile))
+                parse_tasks.add(task)
+                task.add_done_callback(parse_tasks.discard)
+            return True
+
+        async def work(page):
+            while True:
+                item = await queue.get()
+                if item is None:
+                    return
+                with self.metrics.stage("page", item[1]):
+                    done = await attempt(page, *item)
+                if done:
+                    retries.settle(item[0])
+
+        try:
+            async with self.open_browser() as session:
+                pages = await asyncio.gather(*(self.new_page(session) for _ in range(pool_size)))
+                if pool_size > 1:
+                    self.logger(f"→ Pool: {pool_size} pages, max {self.per_host} par domaine")
+                if parse_pool:
+                    self.logger(f"→ Extraction dans {self.parse_workers} process")
+                tasks = [asyncio.create_task(feed()), *(asyncio.create_task(work(page)) for page in pages)]
+                try:
+                    await asyncio.gather(*tasks)
+                finally:
+                    # Un worker en erreur : les autres tâches ne doivent pas survivre au run
+                    # (avec une session partagée, la boucle asyncio, elle, continue).
+                    for task in tasks:
+                        task.cancel()
+            await asyncio.gather(*parse_tasks)
+            if failure:
+                raise failure[0]
+            if limiter.rates:
+                self.logger(f"  {limiter.summary()}")
+            if retries.failures:
+                self.logger(f"  {retries.summary()}")
+            if emitter.late:
+                self.logger(f"  {emitter.late} fiche(s) publiée(s) hors ordre (fenêtre de {emitter.window} pleine)")
+            if breaker.opened:
+                self.logger(f"  {breaker.summary()}")
+            if self.http_client:
+                self.logger(
+                    f"  HTTP simple: {self.http_pages} fiche(s) sans navigateur, "
+                    f"{self.http_client.reused} connexion(s) réutilisée(s)"
+                )
+            if self.in_page_pages:
+                self.logger(
+                    f"  extraction dans la page: {self.in_page_pages} fiche(s), "
+                    f"{self.in_page_bytes / self.in_page_pages / 1024:.1f} Ko/fiche transférés"
+                )
+            if self.metrics.durations:
+                self.logger(f"  {self.metrics.summary()}")
+        finally:
+            retries.cancel()
+            self.fetch_modes.save()
+            self.profiles.save()
+            if self._probe_client:
+                self._probe_client.close()
+                self._probe_client = None
+            if self.incremental:
+                self.incremental.flush()
+            if parse_pool:
+                parse_pool.shutdown(cancel_futures=True)
+            if self.journal:
+                self.journal.flush()
+
+        return emitter.rows
+
+    def cache_lookup(self, url: str) -> CachedPage | None:
+        """Page servie par le cache (même expirée en mode hors ligne) ; lève une erreur si
+        on est hors ligne et que la page n'y est pas."""
+        cached = self.cache.get(url, allow_expired=self.offline) if self.cache else None
+        if cached:
+            self.metrics.count("cache_hit")
+            self.logger("    ↺ cache")
+        elif self.offline:
+            raise RuntimeError(f"hors ligne: {url} absente du cache")
+        return cached
+
+    async def fetch_product(
+        self, page, url: str, label: str, limiter: HostLimiter, ready_groups: list | None = None,
+        in_page: dict | None = None,
+    ) -> str | dict | None:
+        """Visite une fiche et retourne son HTML, ou None si elle doit être ignorée ; lève
+        FetchError sur un échec transitoire (l'appelant décide de la reprise).
+
+        Avec `ready_groups`, on rend la main dès que les sélecteurs du profil matchent
+        (`wait_ms` devient un plafond) au lieu d'attendre `wait_ms` à chaque fois.
+        Avec le profil `in_page`, la fiche est extraite dans la page et le résultat de
+        `extract_in_page` ({"row", "hits", …}) remplace le HTML (qui n'est alors pas mis en cache)."""
+        self.logger(f"  [{label}] {url}")
+        try:
+            cached = self.cache_lookup(url)
+        except RuntimeError as e:
+            return self.skip(url, str(e), state="failed")
+        if cached:
+            if cached.status and cached.status >= 400:
+                return self.skip_http(url, cached.status)
+            return cached.html
+
+        async def ready(page):
+            waited = await wait_until_ready(page, READY_SELECTORS_JS, ready_groups, self.wait_ms)
+            # Le HTML est lu avant le défilement : les 400 ms qui suivaient ne servaient qu'au rythme.
+            self.note_wait(waited, self.wait_ms + PRODUCT_SCROLL_WAIT_MS)
+
+        t0 = time.perf_counter()
+        async with limiter.slot(url):
+            self.metrics.add("pace", time.perf_counter() - t0, url)
+            try:
+                r, html = await goto_page(
+                    page,
+                    url,
+                    wait_until="domcontentloaded",
+                    wait_ms=self.wait_ms,
+                    ready=ready if ready_groups else None,
+                    metrics=self.metrics,
+                    read=functools.partial(self.read_fields, url=url, profile=in_page) if in_page else None,
+                )
+                with self.metrics.stage("clicks", url):
+                    await imitate_entry_mouse_clicks(page)
+            except Exception as e:
+                # Pas de pause sur place : l'appelant remet l'URL à plus tard (RetryScheduler).
+                limiter.feedback(url, failed=True)
+                self.metrics.response(None)
+                raise as_fetch_error(e) from e
+            limiter.feedback(url, *response_feedback(r))
+            if self.incremental and r:
+                self._validators[url] = validators(r.headers)
+
+            with self.metrics.stage("scroll", url):
+                await page.mouse.wheel(0, 1400)
+                if not ready_groups:
+                    await page.wait_for_timeout(PRODUCT_SCROLL_WAIT_MS)
+
+        st = r.status if r else None
+        self.metrics.response(st, html if in_page is None else None)
+        transient = status_error(st, r.headers.get("retry-after")) if st else None
+        if transient:
+            # 429/5xx : ni cache ni journal, la fiche sera retentée.
+            raise transient
+        if self.cache and in_page is None:
+            self.cache.put(url, st, html, final_url=page.url)
+        if st and st >= 400:
+            return self.skip_http(url, st)
+        return html
+
+    async def read_fields(self, page, url: str, profile: dict) -> tuple:
+        """Lecture pour `goto_page` en mode extraction dans la page."""
+        fields = await extract_in_page(page, url, profile)
+        self.in_page_pages += 1
+        self.in_page_bytes += len(json.dumps(fields["row"], ensure_ascii=False)) + len(fields["head"])
+        self.metrics.count("in_page_extract")
+        return fields["head"], fields["size"], fields
+
+    async def open_listing_fixed(self, page, page_url: str) -> tuple:
+        """Ouvre une page listing avec les attentes fixes (`wait_ms` puis défilements)."""
+        r, _ = await goto_page(
+            page,
+            page_url,
+            wait_until="domcontentloaded",
+            wait_ms=self.wait_ms,
+            metrics=self.metrics,
+        )
+        with self.metrics.stage("clicks", page_url):
+            await imitate_entry_mouse_clicks(page)
+
+        for _ in range(LISTING_SCROLLS):
+            await page.mouse.wheel(0, 2200)
+            await page.wait_for_timeout(LISTING_SCROLL_WAIT_MS)
+
+        return r, await page.content()
+
+    async def open_listing_adaptive(self, page, page_url: str, rules: UrlRules) -> tuple:
+        """Ouvre une page listing et défile tant que le nombre de liens produits augmente.
+
+        Plafonds : `wait_ms` pour le premier lien, puis LISTING_SCROLLS défilements de
+        LISTING_SCROLL_WAIT_MS, soit l'attente fixe d'origine au pire."""
+        waited = {"ready": 0.0}
+        prefixes = rules.prefixes
+
+        async def ready(page):
+            waited["ready"] = await wait_until_ready(
+                page, f"(prefixes) => ({PRODUCT_LINK_COUNT_JS})(prefixes) > 0", prefixes, self.wait_ms
+            )
+
+        r, _ = await goto_page(
+            page,
+            page_url,
+            wait_until="domcontentloaded",
+            wait_ms=self.wait_ms,
+            metrics=self.metrics,
+            ready=ready,
+        )
+        with self.metrics.stage("clicks", page_url):
+            await imitate_entry_mouse_clicks(page)
+
+        t0 = time.perf_counter()
+        for _ in range(LISTING_SCROLLS):
+            count = await page.evaluate(PRODUCT_LINK_COUNT_JS, prefixes)
+            await page.mouse.wheel(0, 2200)
+            grew = await wait_for_condition(
+                page,
+                f"([prefixes, n]) => ({PRODUCT_LINK_COUNT_JS})(prefixes) > n",
+                [prefixes, count],
+                LISTING_SCROLL_WAIT_MS,
+            )
+            if not grew:
+                break
+        scroll_ms = (time.perf_counter() - t0) * 1000
+        self.note_wait(waited["ready"] + scroll_ms, self.wait_ms + LISTING_SCROLLS * LISTING_SCROLL_WAIT_MS)
+        return r, await page.content()
+
+    def note_wait(self, waited_ms: float, fixed_ms: float) -> None:
+        self.wait_stats.add(waited_ms, fixed_ms)
+        self.logger(f"    ⏱ prêt en {waited_ms:.0f} ms (−{max(0.0, fixed_ms - waited_ms):.0f} ms)")
+
+    async def scrape_http(self, url: str, label: str, limiter: HostLimiter) -> tuple:
+        """Tente la fiche avec le client HTTP. Retourne (terminé, fiche) ; terminé=False renvoie
+        au navigateur, avec la fiche HTTP incomplète (à comparer au rendu) si elle existe.
+        Lève FetchError sur 429/5xx (reprise différée, comme `fetch_product`)."""
+        if self.cache and self.cache.contains(url):
+            return False, None
+        self.logger(f"  [{label}] {url} (http)")
+        loop = asyncio.get_running_loop()
+        conditional = self.incremental.conditional_headers(url) if self.incremental else None
+        t0 = time.perf_counter()
+        async with limiter.slot(url):
+            self.metrics.add("pace", time.perf_counter() - t0, url)
+            t0 = time.perf_counter()
+            try:
+                fetched = await loop.run_in_executor(None, self.http_client.get, url, conditional)
+            except Exception as e:
+                limiter.feedback(url, failed=True)
+                self.metrics.add("http", time.perf_counter() - t0, url)
+                self.metrics.response(None)
+                self.logger(f"    ↻ HTTP impossible ({e}), passage au navigateur")
+                return False, None
+            limiter.feedback(url, fetched.status, time.perf_counter() - t0, fetched.headers.get("retry-after"))
+            self.metrics.add("http", time.perf_counter() - t0, url)
+            self.metrics.response(fetched.status, fetched.html)
+        if fetched.status == 304 and conditional:
+            return True, self.not_modified(url)
+        if fetched.status in GONE_STATUSES:
+            if self.cache:
+                self.cache.put(url, fetched.status, fetched.html, final_url=fetched.final_url)
+            return True, self.skip_http(url, fetched.status)
+        if fetched.status != 429 and (
+            fetched.status in (401, 403) or looks_like_bot_challenge(fetched.html, fetched.status, fetched.headers)
+        ):
+            # Accès refusé ou challenge au client HTTP : le navigateur prend le relais pour ce domaine.
+            self.set_fetch_mode(url, "browser", f"HTTP {fetched.status} refusé sans navigateur")
+            return False, None
+        # 429/5xx : c'est le serveur qui sature, le navigateur frapperait aussitôt le même hôte.
+        # L'erreur remonte au RetryScheduler, comme pour une visite navigateur.
+        error = status_error(fetched.status, fetched.headers.get("retry-after"))
+        if error:
+            raise error
+        if fetched.status >= 400:
+            return False, None
+
+        row = self.extract_inline(url, fetched.html)
+        if filled_fields(row) < 3:
+            return False, row
+        if self.cache:
+            self.cache.put(url, fetched.status, fetched.html, final_url=fetched.final_url)
+        self.set_fetch_mode(url, "http", "HTML serveur complet")
+        self.http_pages += 1
+        if self.incremental:
+            self._validators[url] = validators(fetched.headers)
+        return True, self.record(url, row)
+
+    def set_fetch_mode(self, url: str, mode: str, reason: str) -> None:
+        if self.fetch_modes.set(url, mode):
+            self.logger(f"    ⚙ {urlparse(url).netloc}: mode {mode} ({reason})")
+
+    async def probe_unchanged(self, url: str, label: str, limiter: HostLimiter) -> bool:
+        """Requête conditionnelle avant le navigateur pour une fiche déjà connue : True si le
+        serveur répond 304 (la visite complète est évitée)."""
+        host = urlparse(url).netloc
+        if host in self._no_probe_hosts:
+            return False
+        conditional = self.incremental.conditional_headers(url)
+        if not conditional or self.offline or (self.cache and self.cache.contains(url)):
+            return False
+        if self._probe_client is None:
+            self._probe_client = self.http_client or HttpClient(timeout_s=10)
+        loop = asyncio.get_running_loop()
+        t0 = time.perf_counter()
+        async with limiter.slot(url):
+            self.metrics.add("pace", time.perf_counter() - t0, url)
+            t0 = time.perf_counter()
+            try:
+                fetched = await loop.run_in_executor(None, self._probe_client.get, url, conditional)
+            except Exception:
+                limiter.feedback(url, failed=True)
+                self.metrics.add("probe", time.perf_counter() - t0, url)
+                self.metrics.response(None)
+                return False
+            limiter.feedback(url, fetched.status, time.perf_counter() - t0, fetched.headers.get("retry-after"))
+            self.metrics.add("probe", time.perf_counter() - t0, url)
+            self.metrics.response(fetched.status, fetched.html)
+        if fetched.status == 200 and host not in self._no_probe_hosts:
+            # Le serveur renvoie la page entière malgré If-None-Match : chaque sonde doublerait la visite.
+            self._no_probe_hosts.add(host)
+            self.logger(f"    ⚙ {host}: requêtes conditionnelles ignorées (200), plus de sonde")
+        if fetched.status != 304:
+            return False
+        self.logger(f"  [{label}] {url}")
+        self.not_modified(url)
+        return True
+
+    def not_modified(self, url: str) -> None:
+        self.metrics.count("not_modified")
+        self.logger("    = inchangée (304)")
+        self.incremental.not_modified(url)
+        if self.journal:
+            self.journal.mark_skipped(url, "inchangée (304)")
+        return None
+
+    def url_key(self, url: str) -> str:
+        return self.canonicalizer.key(url) if self.canonicalizer else url
+
+    def unseen(self, urls: list[str]) -> list[str]:
+        """Retire les URLs déjà scrapées lors d'un run précédent (`seen`)."""
+        if self.seen is None:
+            return urls
+        fresh = [url for url in urls if self.url_key(url) not in self.seen or not self.confirm_seen(url)]
+        self.known_urls += len(urls) - len(fresh)
+        return fresh
+
+    def confirm_seen(self, url: str) -> bool:
+        """Vérifie un « déjà vu » du filtre de Bloom auprès du store incrémental et du journal :
+        un faux positif ne doit pas écarter une fiche pour toujours. Sans store qui connaisse
+        l'URL (ni journal réutilisé, ni --incremental), le filtre fait foi."""
+        forms = self.canonicalizer.variants(url) if self.canonicalizer else {url}
+        exhaustive = forms is not None
+        forms = forms or {self.canonicalizer.canonical(url), self.url_key(url)}
+        verdicts = []
+        if self.incremental:
+            # Le store garde toutes les fiches enregistrées : une URL absente n'a jamais été scrapée,
+            # sauf si la casse du chemin est ignorée (formes non énumérables).
+            verdicts.append(True if self.incremental.known(forms) else (False if exhaustive else None))
+        if self.journal:
+            verdicts.append(self.journal.scraped(forms))
+        if True in verdicts or False not in verdicts:
+            return True
+        self.metrics.count("seen_false_positive")
+        self.logger(f"    ⚠ {url}: marquée vue par --seen mais inconnue du journal/store, visitée quand même")
+        return False
+
+    def fresh_urls(self, urls: list[str], rules: UrlRules | None = None) -> list[str]:
+        """URLs fournies telles quelles (fichier, stdin) : canonisées, filtrées par les `rules`,
+        dédupliquées et sans celles déjà scrapées."""
+        return self.unseen(select_urls(urls, rules, self.canonicalizer))
+
+    def record(self, url: str, row: dict) -> dict | None:
+        """Journalise la fiche extraite ; en incrémental, None si elle n'a pas changé depuis le
+        run précédent, sinon la fiche avec son `change` ("new" ou "changed")."""
+        if self.journal:
+            self.journal.mark_done(url, row)
+        if self.seen is not None:
+            self.seen.add(self.url_key(url))
+        if self.incremental:
+            change = self.incremental.update(url, row, *self._validators.pop(url, ("", "")))
+            if change is None:
+                self.metrics.count("unchanged")
+                self.logger("    = inchangée")
+                return None
+            row = {**row, "change": change}
+        return row
+
+    def skip(self, url: str, reason: str, state: str = "skipped") -> None:
+        """Journalise une fiche abandonnée : `failed` (à retenter) ou `skipped` (définitif)."""
+        self.logger(f"    ⚠️ {url}: {reason} (skip)")
+        self.metrics.count(state)
+        if self.journal:
+            if state == "failed":
+                self.journal.mark_failed(url, reason)
+            else:
+                self.journal.mark_skipped(url, reason)
+        return None
+
+    def skip_http(self, url: str, status: int) -> None:
+        if self.incremental and status in GONE_STATUSES:
+            self.incremental.gone(url)
+        # 429 et 5xx sont transitoires : à retenter ; les autres 4xx sont définitifs.
+        return self.skip(url, f"HTTP {status}", state="failed" if status == 429 or status >= 500 else "skipped")
+
+    def replay(self, prefix: str = "", on_result=None, keep_rows: bool = True) -> list[dict]:
+        """Ré-extrait toutes les fiches du cache (filtrées par préfixe), sans navigateur."""
+        emitter = OrderedEmitter(on_result, keep_rows=keep_rows)
+        for idx, url in enumerate(self.cache.entries(prefix)):
+            cached = self.cache.get(url, allow_expired=True)
+            if not cached or (cached.status and cached.status >= 400):
+                emitter.push(idx, None)
+                continue
+            emitter.push(idx, self.extract_inline(url, cached.html))
+        self.profiles.save()
+        return emitter.rows
+
+    def extract_inline(self, url: str, html: str) -> dict:
+        """Un seul parse par page. Sans profil pour le domaine, la fiche est extraite avec un profil
+        construit sur elle-même et, si elle est complète, sert d'échantillon d'apprentissage ;
+        avec un profil (appris ou mémorisé), ses sélecteurs passent en premier et sont surveillés."""
+        with self.metrics.profiled():
+            with self.metrics.stage("parse", url):
+                tree = parse_html(html)
+            with self.metrics.stage("extract", url):
+                return self.extract_tree(url, html, tree)
+
+    def extract_tree(self, url: str, html: str, tree) -> dict:
+        profile = self.profiles.get(url)
+        if profile is None:
+            row = extract_product_info(url, html, build_extraction_profile(html, tree=tree), tree=tree)
+            if filled_fields(row) == 3:
+                learned = self.profiles.learn(url, tree)
+                if learned:
+                    self._profiles_used.add(urlparse(url).netloc)
+                    self.log_profile(url, learned, f"appris sur {learned['samples']} fiches")
+            return row
+        host = urlparse(url).netloc
+        if host not in self._profiles_used:
+            self._profiles_used.add(host)
+            self.log_profile(url, profile, f"mémorisé le {profile.get('learned_at', '?')}")
+        hits = {}
+        row = extract_product_info(url, html, profile, tree=tree, hits=hits)
+        self.check_profile(url, hits)
+        return row
+
+    def check_profile(self, url: str, hits: dict) -> None:
+        drift = self.profiles.validate(url, hits)
+        if drift:
+            self._profiles_used.discard(urlparse(url).netloc)
+            self.logger(f"    ⚠️ Profil {urlparse(url).netloc} en baisse ({drift}) : réapprentissage")
+
+    def log_profile(self, url: str, profile: dict, how: str) -> None:
+        confidence = profile.get("confidence", {})
+        self.logger(
+            f"    ✓ Profil extraction {urlparse(url).netloc} ({how}): "
+            + " | ".join(f"{key}={profile.get(key) or 'auto'} ({confidence.get(key, 0):.0%})" for key in PROFILE_KEYS)
+        )
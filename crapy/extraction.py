@@ -0,0 +1,596 @@
+"""Extraction des fiches : sélecteurs CSS compilés pour lxml, plan d'extraction, variante dans la page."""
+
+import functools
+import re
+
+from bs4 import BeautifulSoup
+from lxml import etree
+
+from .challenge import CHALLENGE_SCAN_CHARS
+from .util import log_stderr
+
+
+PRODUCT_FIELDS = ("url", "title", "description", "image", "images")
+
+# Chaînes de repli communes au profil et à l'extraction.
+TITLE_FALLBACKS = ["h1.text-trabaldo", "h1"]
+IMAGE_FALLBACKS = ["img[src*='/storage/']", "img[src]"]
+PROFILE_KEYS = ("title", "description", "images")
+PROFILE_DESCRIPTION_CANDIDATES = [
+    ".product-description",
+    "#description",
+    ".description",
+    "[class*='description']",
+    "[id*='description']",
+    ".productDetail",
+]
+DESCRIPTION_FALLBACKS = [
+    "p.MsoNormal",
+    "#description", ".description", "[class*='description']",
+    ".product-description", "[id*='description']",
+    ".ficheProduit", ".productDetail", "[class*='detail']"
+]
+OG_TITLE = "meta[property='og:title']"
+OG_IMAGE = "meta[property='og:image']"
+META_DESCRIPTION = "meta[name='description']"
+
+# BeautifulSoup stocke ces attributs en listes et soupsieve les recompare joints par un espace.
+MULTI_VALUED_ATTRS = {"class", "rel", "rev", "accept-charset", "headers", "accesskey", "dropzone"}
+
+_CSS_PART_RE = re.compile(
+    r"""
+    \.(?P<cls>-?[_a-zA-Z][\w-]*)
+    | \#(?P<id>[\w-]+)
+    | \[\s*(?P<attr>[_a-zA-Z][\w-]*)\s*
+      (?:(?P<op>[~|^$*]?=)\s*(?:"(?P<dq>[^"]*)"|'(?P<sq>[^']*)'|(?P<bare>[\w-]+))\s*)?\]
+    """,
+    re.VERBOSE,
+)
+_CSS_TAG_RE = re.compile(r"(?P<tag>\*|[a-zA-Z][\w-]*)?")
+
+# Équivalent de `Tag.get_text(" ", strip=True)` : BeautifulSoup ignore les commentaires et les textes
+# de script/style/template/rt/rp (types de chaînes dédiés).
+_TEXT_NODES = etree.XPath(
+    "descendant::text()[not(ancestor::script or ancestor::style or ancestor::template"
+    " or ancestor::rt or ancestor::rp)]",
+    smart_strings=False,
+)
+
+
+def _attr_check(attr: str, op: str | None, value: str):
+    if op is None:
+        return lambda el: el.get(attr) is not None
+    if op in ("^=", "$=", "*=") and not value:
+        # En CSS, ^="" / $="" / *="" ne correspondent jamais.
+        return lambda el: False
+
+    test = {
+        "=": lambda v: v == value,
+        "~=": lambda v: value in v.split(),
+        "|=": lambda v: v == value or v.startswith(value + "-"),
+        "^=": lambda v: v.startswith(value),
+        "$=": lambda v: v.endswith(value),
+        "*=": lambda v: value in v,
+    }[op]
+    multi = attr in MULTI_VALUED_ATTRS
+    # Sans espace dans la valeur, elle doit figurer telle quelle dans l'attribut brut : rejet rapide.
+    quick = value if value and not any(ch.isspace() for ch in value) else ""
+
+    def check(el):
+        v = el.get(attr)
+        if v is None or quick not in v:
+            return False
+        if multi:
+            v = " ".join(v.split())
+        return test(v)
+
+    return check
+
+
+def compile_css(selector: str) -> tuple[str, str | None, callable]:
+    """Traduit un sélecteur CSS simple (tag, .classe, #id, [attr op valeur]) en (tag, attribut clé, prédicat).
+
+    Le prédicat (None si le tag suffit) reproduit exactement la sémantique soupsieve ; le tag et l'attribut clé servent
+    à n'essayer le prédicat que sur les éléments susceptibles de correspondre.
+    Les combinateurs (espace, >, virgule…) et pseudo-classes lèvent ValueError.
+    """
+    sel = selector.strip()
+    m = _CSS_TAG_RE.match(sel)
+    tag = (m.group("tag") or "*").lower()
+    pos = m.end()
+    checks = []
+    key_attr = None
+    while pos < len(sel):
+        m = _CSS_PART_RE.match(sel, pos)
+        if not m:
+            raise ValueError(f"sélecteur non supporté: {selector!r}")
+        pos = m.end()
+        if m.group("cls"):
+            cls = m.group("cls")
+            checks.append(lambda el, cls=cls: cls in (v := el.get("class") or "") and cls in v.split())
+            key_attr = key_attr or "class"
+        elif m.group("id"):
+            ident = m.group("id")
+            checks.append(lambda el, ident=ident: el.get("id") == ident)
+            key_attr = key_attr or "id"
+        else:
+            attr = m.group("attr").lower()
+            op = m.group("op")
+            value = next((v for v in (m.group("dq"), m.group("sq"), m.group("bare")) if v is not None), "")
+            checks.append(_attr_check(attr, op, value))
+            key_attr = key_attr or attr
+
+    if not checks:
+        return tag, key_attr, None
+    if len(checks) == 1:
+        return tag, key_attr, checks[0]
+
+    def predicate(el):
+        for check in checks:
+            if not check(el):
+                return False
+        return True
+
+    return tag, key_attr, predicate
+
+
+def parse_html(html: str):
+    """Parse la page une seule fois avec lxml (même parseur que BeautifulSoup "lxml", sans l'arbre Python)."""
+    parser = etree.HTMLParser()
+    try:
+        parser.feed(html or "")
+        return parser.close()
+    except etree.XMLSyntaxError:
+        return None
+
+
+def element_text(el) -> str:
+    return " ".join(t for t in (part.strip() for part in _TEXT_NODES(el)) if t)
+
+
+class SelectorPlan:
+    """Plusieurs sélecteurs compilés en un seul parcours de l'arbre : chaque élément n'est testé
+    que par les sélecteurs de son tag. Un sélecteur garde sa première correspondance (comme
+    `select_one`), sauf ceux de `collect_all` ; dans une chaîne de `chains`, une correspondance
+    rend inutiles les suivants."""
+
+    def __init__(self, selectors, collect_all=(), chains=()):
+        self.selectors = list(dict.fromkeys(sel for sel in selectors if sel))
+        position = {sel: i for i, sel in enumerate(self.selectors)}
+        collect_all = set(collect_all)
+        self._collect_all = [sel in collect_all for sel in self.selectors]
+        self._supersedes = [[] for _ in self.selectors]
+        for chain in chains:
+            chain = [position[sel] for sel in dict.fromkeys(chain) if sel in position]
+            for rank, index in enumerate(chain):
+                self._supersedes[index].extend(chain[rank + 1:])
+        # Table de dispatch construite une fois pour toutes.
+        self._by_tag, self._any = {}, []
+        for index, sel in enumerate(self.selectors):
+            tag, key_attr, predicate = compile_css(sel)
+            if tag == "*":
+                self._any.append((index, key_attr, predicate))
+            else:
+                self._by_tag.setdefault(tag, []).append((index, predicate))
+        self._tags = tuple(self._by_tag) if not self._any else None
+
+    def match(self, root) -> dict[str, list]:
+        buckets = [[] for _ in self.selectors]
+        if root is None or not self.selectors:
+            return dict(zip(self.selectors, buckets))
+        collect_all, supersedes = self._collect_all, self._supersedes
+        by_tag, any_sel = self._by_tag, self._any
+        done = [False] * len(self.selectors)
+        active = len(self.selectors)
+        hits = []  # réutilisée d'un élément à l'autre
+        elements = root.iter(*self._tags) if self._tags is not None else root.iter(etree.Element)
+        for el in elements:
+            for index, predicate in by_tag.get(el.tag, ()):
+                if not done[index] and (predicate is None or predicate(el)):
+                    hits.append(index)
+            for index, key_attr, predicate in any_sel:
+                if not done[index] and (key_attr is None or el.get(key_attr) is not None) \
+                        and (predicate is None or predicate(el)):
+                    hits.append(index)
+            if not hits:
+                continue
+            for index in hits:
+                buckets[index].append(el)
+                if collect_all[index] or done[index]:  # done : supplanté par un sélecteur prioritaire
+                    continue
+                done[index] = True
+                active -= 1
+                for later in supersedes[index]:
+                    if not done[later]:
+                        done[later] = True
+                        active -= 1
+            hits.clear()
+            if not active:
+                break
+        return dict(zip(self.selectors, buckets))
+
+
+_PROFILE_PLAN = SelectorPlan(
+    ["h1.text-trabaldo", "p.MsoNormal", *PROFILE_DESCRIPTION_CANDIDATES, IMAGE_FALLBACKS[0]],
+    collect_all=["p.MsoNormal"],
+)
+
+
+def build_extraction_profile(html: str, tree=None) -> dict:
+    """Construit un profil de sélecteurs à partir d'une fiche exemple."""
+    found = _PROFILE_PLAN.match(tree if tree is not None else parse_html(html))
+
+    profile = {
+        "title": "h1",
+        "description": "",
+        "images": "img[src]",
+    }
+
+    if found["h1.text-trabaldo"]:
+        profile["title"] = "h1.text-trabaldo"
+
+    # Cible d'abord le pattern rencontré sur trabaldogino
+    if any(len(element_text(p)) > 120 for p in found["p.MsoNormal"]):
+        profile["description"] = "p.MsoNormal"
+    else:
+        for sel in PROFILE_DESCRIPTION_CANDIDATES:
+            els = found[sel]
+            if els and len(element_text(els[0])) > 80:
+                profile["description"] = sel
+                break
+
+    if found[IMAGE_FALLBACKS[0]]:
+        profile["images"] = IMAGE_FALLBACKS[0]
+
+    return profile
+
+
+class ExtractionPlan:
+    """Profil d'extraction précompilé. Un passage cherche le titre, les images du premier
+    sélecteur, l'og:image et la description (profil, sinon meta) ; les replis (og:title, autres
+    sélecteurs d'images, descriptions de secours, paragraphes) ne sont évalués que si ce passage
+    ne suffit pas, et ne l'empêchent donc pas de s'arrêter tôt."""
+
+    def __init__(self, profile: dict | None = None):
+        profile = profile or {}
+        self.title_selectors = [sel for sel in [profile.get("title"), *TITLE_FALLBACKS] if sel]
+        self.image_selectors = list(dict.fromkeys(sel for sel in [profile.get("images"), *IMAGE_FALLBACKS] if sel))
+        self.description_selector = profile.get("description") or ""
+        self.profile_selectors = {key: profile[key] for key in PROFILE_KEYS if profile.get(key)}
+        description_chain = [self.description_selector, META_DESCRIPTION]
+        self.selectors = SelectorPlan(
+            [*self.title_selectors, self.image_selectors[0], OG_IMAGE, *description_chain],
+            collect_all=[self.image_selectors[0]],
+            chains=[self.title_selectors, description_chain],
+        )
+        self.og_title = SelectorPlan([OG_TITLE])
+        self.image_fallbacks = [SelectorPlan([sel], collect_all=[sel]) for sel in self.image_selectors[1:]]
+        self.description_fallbacks = SelectorPlan(DESCRIPTION_FALLBACKS)
+        # Plan réduit aux sélecteurs du profil (un par champ) quand le profil est complet.
+        self.lean = None
+        if len(self.profile_selectors) == len(PROFILE_KEYS):
+            self.lean = SelectorPlan(
+                [profile["title"], profile["images"], OG_IMAGE, profile["description"]],
+                collect_all=[profile["images"]],
+            )
+
+    def run_lean(self, url: str, root) -> dict | None:
+        """Une seule recherche par champ ; None si un sélecteur du profil ne donne rien (le plan
+        complet prend alors le relais). Même résultat que `run` quand les trois trouvent."""
+        if self.lean is None:
+            return None
+        found = self.lean.match(root)
+        title_el = found[self.profile_selectors["title"]]
+        desc_el = found[self.profile_selectors["description"]]
+        title = element_text(title_el[0]) if title_el else ""
+        description = element_text(desc_el[0]) if desc_el else ""
+        images = list(dict.fromkeys(
+            src for src in ((img.get("src") or "").strip() for img in found[self.profile_selectors["images"]]) if src
+        ))
+        if not (title and description and images):
+            return None
+        ogi = found[OG_IMAGE][0] if found[OG_IMAGE] else None
+        og_img = (ogi.get("content") or "").strip() if ogi is not None else ""
+        if og_img and og_img not in images:
+            images.insert(0, og_img)
+        return {"url": url, "title": title, "description": description, "image": images[0], "images": ";".join(images)}
+
+    def run(self, url: str, root, hits: dict | None = None) -> dict:
+        found = self.selectors.match(root)
+        if hits is not None:
+            for key, sel in self.profile_selectors.items():
+                hits[key] = bool(found[sel])
+
+        # TITLE
+        title = ""
+        h1 = next((found[sel][0] for sel in self.title_selectors if found[sel]), None)
+        if h1 is not None:
+            title = element_text(h1)
+        if not title:
+            ogt = self.og_title.match(root)[OG_TITLE]
+            if ogt and ogt[0].get("content"):
+                title = ogt[0].get("content").strip()
+
+        # IMAGES
+        images = []
+        seen_images = set()
+        for sel, fallback in zip(self.image_selectors, [None, *self.image_fallbacks]):
+            for img in (found if fallback is None else fallback.match(root))[sel]:
+                src = (img.get("src") or "").strip()
+                if not src or src in seen_images:
+                    continue
+                seen_images.add(src)
+                images.append(src)
+            if images:
+                break
+
+        ogi = found[OG_IMAGE][0] if found[OG_IMAGE] else None
+        if ogi is not None and ogi.get("content"):
+            og_img = ogi.get("content").strip()
+            if og_img and og_img not in seen_images:
+                images.insert(0, og_img)
+                seen_images.add(og_img)
+
+        image = images[0] if images else ""
+
+        # DESCRIPTION
+        description = ""
+        md = found[META_DESCRIPTION][0] if found[META_DESCRIPTION] else None
+        if md is not None and md.get("content"):
+            description = md.get("content").strip()
+
+        if self.description_selector and found[self.description_selector]:
+            description = element_text(found[self.description_selector][0])
+
+        if not description:
+            fallbacks = self.description_fallbacks.match(root)
+            for sel in DESCRIPTION_FALLBACKS:
+                if fallbacks[sel]:
+                    txt = element_text(fallbacks[sel][0])
+                    if len(txt) > 60:
+                        description = txt
+                        break
+
+        if not description and root is not None:
+            paras = sorted((element_text(p) for p in root.iter("p")), key=len, reverse=True)
+            for p in paras[:10]:
+                if len(p) > 80:
+                    description = p
+                    break
+
+        return {
+            "url": url,
+            "title": title,
+            "description": description,
+            "image": image,
+            "images": ";".join(images),
+        }
+
+
+@functools.lru_cache(maxsize=64)
+def _compiled_plan(title: str, description: str, images: str) -> ExtractionPlan:
+    return ExtractionPlan({"title": title, "description": description, "images": images})
+
+
+def extract_product_info(url: str, html: str, profile: dict | None = None, tree=None, hits: dict | None = None) -> dict:
+    """Extrait une fiche ; `tree` permet de réutiliser un arbre déjà parsé (un seul parse par page).
+
+    Avec un profil appris marqué `lean`, seuls ses sélecteurs sont cherchés tant qu'ils trouvent.
+    `hits` reçoit, par champ du profil, si son sélecteur a trouvé quelque chose."""
+    profile = profile or {}
+    try:
+        plan = _compiled_plan(profile.get("title") or "", profile.get("description") or "", profile.get("images") or "")
+    except ValueError as e:
+        # Signalé à chaque fiche : un écart entre les deux extractions doit se voir.
+        log_stderr(f"    ⚠️ {url}: {e}, extraction BeautifulSoup (lente) en repli")
+        return extract_product_info_soup(url, html, profile)
+    root = tree if tree is not None else parse_html(html)
+    if profile.get("lean"):
+        row = plan.run_lean(url, root)
+        if row is not None:
+            if hits is not None:
+                hits.update(dict.fromkeys(plan.profile_selectors, True))
+            return row
+    return plan.run(url, root, hits)
+
+
+def extract_with_hits(url: str, html: str, profile: dict | None = None) -> tuple:
+    """(fiche, hits) : version de `extract_product_info` pour les process d'extraction."""
+    hits = {}
+    return extract_product_info(url, html, profile, hits=hits), hits
+
+
+# Même extraction que `ExtractionPlan.run`, exécutée dans la page : un seul page.evaluate et
+# seuls les champs reviennent par le pipe Playwright (pas le DOM sérialisé). Les textes suivent
+# `element_text` (nœuds texte hors script/style/template/rt/rp, `str.strip`, joints par une espace)
+# et les longueurs sont comptées en points de code, comme `len` en Python.
+EXTRACT_FIELDS_JS = r"""([url, profile, sel, scanChars]) => {
+    const WS = "[\\t\\n\\v\\f\\r \\x1c-\\x1f\\x85\\xa0\\u1680\\u2000-\\u200a\\u2028\\u2029\\u202f\\u205f\\u3000]";
+    const STRIP = new RegExp(`^${WS}+|${WS}+$`, "g");
+    const SKIP = new Set(["SCRIPT", "STYLE", "TEMPLATE", "RT", "RP"]);
+    const strip = (s) => s.replace(STRIP, "");
+    const len = (s) => { let n = 0; for (const _ of s) n++; return n; };
+    const text = (el) => {
+        const parts = [];
+        const walk = (node) => {
+            for (const child of node.childNodes) {
+                if (child.nodeType === 3) {
+                    const t = strip(child.data);
+                    if (t) parts.push(t);
+                } else if (child.nodeType === 1 && !SKIP.has(child.tagName.toUpperCase())) {
+                    walk(child);
+                }
+            }
+        };
+        walk(el);
+        return parts.join(" ");
+    };
+    // Un sélecteur appris que le navigateur refuse ne trouve simplement rien.
+    const first = (s) => { try { return s ? document.querySelector(s) : null; } catch (e) { return null; } };
+    const all = (s) => { try { return s ? Array.from(document.querySelectorAll(s)) : []; } catch (e) { return []; } };
+    const content = (s) => { const el = first(s); return el ? el.getAttribute("content") : null; };
+
+    const hits = {};
+    for (const key of ["title", "description", "images"]) if (profile[key]) hits[key] = first(profile[key]) !== null;
+
+    let title = "";
+    for (const s of [profile.title, ...sel.title].filter(Boolean)) {
+        const el = first(s);
+        if (el) { title = text(el); break; }
+    }
+    if (!title) { const c = content(sel.og_title); if (c) title = strip(c); }
+
+    const images = [];
+    const seen = new Set();
+    for (const s of [profile.images, ...sel.images].filter(Boolean)) {
+        for (const img of all(s)) {
+            const src = strip(img.getAttribute("src") || "");
+            if (!src || seen.has(src)) continue;
+            seen.add(src);
+            images.push(src);
+        }
+        if (images.length) break;
+    }
+    const og = content(sel.og_image);
+    if (og) {
+        const src = strip(og);
+        if (src && !seen.has(src)) { images.unshift(src); seen.add(src); }
+    }
+
+    let description = "";
+    const md = content(sel.meta_description);
+    if (md) description = strip(md);
+    if (profile.description) { const el = first(profile.description); if (el) description = text(el); }
+    if (!description) {
+        for (const s of sel.description) {
+            const el = first(s);
+            if (el) { const t = text(el); if (len(t) > 60) { description = t; break; } }
+        }
+    }
+    if (!description) {
+        const paras = all("p").map(text).sort((a, b) => len(b) - len(a));
+        for (const p of paras.slice(0, 10)) if (len(p) > 80) { description = p; break; }
+    }
+
+    // Début du document pour la détection de challenge, sérialisé côté navigateur seulement.
+    const html = document.documentElement.outerHTML;
+    return {
+        row: {url, title, description, image: images[0] || "", images: images.join(";")},
+        hits,
+        head: html.slice(0, scanChars),
+        size: html.length,
+    };
+}"""
+EXTRACT_FIELDS_SELECTORS = {
+    "title": TITLE_FALLBACKS,
+    "images": IMAGE_FALLBACKS,
+    "description": DESCRIPTION_FALLBACKS,
+    "og_title": OG_TITLE,
+    "og_image": OG_IMAGE,
+    "meta_description": META_DESCRIPTION,
+}
+
+
+async def extract_in_page(page, url: str, profile: dict) -> dict:
+    """{"row", "hits", "head", "size"} : fiche extraite dans la page avec le profil, plus le début du
+    HTML et sa taille (pour `classify_challenge`)."""
+    profile = {key: profile.get(key) or "" for key in PROFILE_KEYS}
+    return await page.evaluate(EXTRACT_FIELDS_JS, [url, profile, EXTRACT_FIELDS_SELECTORS, CHALLENGE_SCAN_CHARS])
+
+
+def extract_product_info_soup(url: str, html: str, profile: dict | None = None) -> dict:
+    """Implémentation BeautifulSoup d'origine : référence des benchmarks et repli pour les sélecteurs
+    que `compile_css` ne sait pas traduire."""
+    soup = BeautifulSoup(html, "lxml")
+    profile = profile or {}
+
+    # TITLE
+    title = ""
+    title_selectors = [
+        profile.get("title"),
+        "h1.text-trabaldo",
+        "h1",
+    ]
+    h1 = None
+    for sel in title_selectors:
+        if not sel:
+            continue
+        h1 = soup.select_one(sel)
+        if h1:
+            break
+    if h1:
+        title = h1.get_text(" ", strip=True)
+    if not title:
+        ogt = soup.select_one("meta[property='og:title']")
+        if ogt and ogt.get("content"):
+            title = ogt["content"].strip()
+
+    # IMAGES
+    images = []
+    image_selectors = [
+        profile.get("images"),
+        "img[src*='/storage/']",
+        "img[src]",
+    ]
+    seen_images = set()
+    for sel in image_selectors:
+        if not sel:
+            continue
+        for img in soup.select(sel):
+            src = (img.get("src") or "").strip()
+            if not src or src in seen_images:
+                continue
+            seen_images.add(src)
+            images.append(src)
+        if images:
+            break
+
+    ogi = soup.select_one("meta[property='og:image']")
+    if ogi and ogi.get("content"):
+        og_img = ogi["content"].strip()
+        if og_img and og_img not in seen_images:
+            images.insert(0, og_img)
+            seen_images.add(og_img)
+
+    image = images[0] if images else ""
+
+    # DESCRIPTION
+    description = ""
+    md = soup.select_one("meta[name='description']")
+    if md and md.get("content"):
+        description = md["content"].strip()
+
+    desc_selector = profile.get("description")
+    if desc_selector:
+        el = soup.select_one(desc_selector)
+        if el:
+            description = el.get_text(" ", strip=True)
+
+    if not description:
+        for sel in [
+            "p.MsoNormal",
+            "#description", ".description", "[class*='description']",
+            ".product-description", "[id*='description']",
+            ".ficheProduit", ".productDetail", "[class*='detail']"
+        ]:
+            el = soup.select_one(sel)
+            if el:
+                txt = el.get_text(" ", strip=True)
+                if len(txt) > 60:
+                    description = txt
+                    break
+
+    if not description:
+        paras = sorted((p.get_text(" ", strip=True) for p in soup.select("p")), key=len, reverse=True)
+        for p in paras[:10]:
+            if len(p) > 80:
+                description = p
+                break
+
+    return {
+        "url": url,
+        "title": title,
+        "description": description,
+        "image": image,
+        "images": ";".join(images),
+    }
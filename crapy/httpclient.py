@@ -0,0 +1,171 @@
+"""Client HTTP simple (sans navigateur) et mode de récupération retenu par domaine."""
+
+import http.client
+import re
+import threading
+import zlib
+from typing import NamedTuple
+from urllib.parse import urljoin, urlparse, urlsplit
+
+from .util import file_lock, read_json_file, write_json_file
+
+
+DEFAULT_FETCH_MODES_PATH = "crapy_fetch_modes.json"
+HTTP_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36"
+    ),
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "fr-FR,fr;q=0.9,en-US;q=0.8,en;q=0.7",
+    "Accept-Encoding": "gzip, deflate",
+    "DNT": "1",
+    "Upgrade-Insecure-Requests": "1",
+}
+REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+_META_CHARSET_RE = re.compile(rb"""<meta[^>]+charset=["']?([\w-]+)""", re.I)
+
+
+class HttpPage(NamedTuple):
+    url: str
+    final_url: str
+    status: int
+    html: str
+    headers: dict
+
+
+def decode_body(body: bytes, headers: dict) -> str:
+    """Décompresse (gzip/deflate) puis décode selon le charset de l'en-tête ou du <meta>."""
+    encoding = headers.get("content-encoding", "").lower()
+    if encoding == "gzip":
+        body = zlib.decompress(body, 16 + zlib.MAX_WBITS)
+    elif encoding == "deflate":
+        try:
+            body = zlib.decompress(body)
+        except zlib.error:
+            body = zlib.decompress(body, -zlib.MAX_WBITS)
+    charset = None
+    m = re.search(r"charset=([\w-]+)", headers.get("content-type", ""), re.I)
+    if m:
+        charset = m.group(1)
+    else:
+        m = _META_CHARSET_RE.search(body[:4096])
+        if m:
+            charset = m.group(1).decode("ascii")
+    try:
+        return body.decode(charset or "utf-8", errors="replace")
+    except LookupError:
+        return body.decode("utf-8", errors="replace")
+
+
+class HttpClient:
+    """Client HTTP/1.1 keep-alive (`http.client`) : les connexions sont gardées ouvertes et
+    réutilisées par hôte. Thread-safe, le moteur l'appelle depuis le pool de threads d'asyncio."""
+
+    def __init__(self, timeout_s: float = 30, max_idle_per_host: int = 4, max_redirects: int = 5):
+        self.timeout_s = timeout_s
+        self.max_idle_per_host = max_idle_per_host
+        self.max_redirects = max_redirects
+        self.requests = 0
+        self.reused = 0
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    def _connection(self, scheme: str, netloc: str):
+        key = (scheme, netloc)
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                self.reused += 1
+                return key, idle.pop()
+        cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        return key, cls(netloc, timeout=self.timeout_s)
+
+    def _release(self, key, conn):
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_idle_per_host:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def _request(self, url: str, headers: dict | None = None) -> tuple:
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https"):
+            raise ValueError(f"schéma non supporté: {url}")
+        path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        while True:
+            key, conn = self._connection(parts.scheme, parts.netloc)
+            reused = conn.sock is not None
+            try:
+                conn.request("GET", path, headers={**HTTP_HEADERS, **headers} if headers else HTTP_HEADERS)
+                resp = conn.getresponse()
+                body = resp.read()
+            except (http.client.HTTPException, OSError):
+                conn.close()
+                # Connexion keep-alive fermée entre-temps par le serveur : on en prend une autre.
+                if reused:
+                    continue
+                raise
+            headers = {k.lower(): v for k, v in resp.getheaders()}
+            if resp.will_close:
+                conn.close()
+            else:
+                self._release(key, conn)
+            self.requests += 1
+            return resp.status, headers, body
+
+    def get(self, url: str, headers: dict | None = None) -> HttpPage:
+        """GET en suivant les redirections ; `headers` s'ajoute aux en-têtes par défaut
+        (requêtes conditionnelles If-None-Match / If-Modified-Since)."""
+        current = url
+        for _ in range(self.max_redirects + 1):
+            status, headers_out, body = self._request(current, headers)
+            if status in REDIRECT_STATUSES and headers_out.get("location"):
+                current = urljoin(current, headers_out["location"])
+                continue
+            return HttpPage(url, current, status, decode_body(body, headers_out), headers_out)
+        raise RuntimeError(f"trop de redirections: {url}")
+
+    def close(self):
+        with self._lock:
+            conns = [c for idle in self._idle.values() for c in idle]
+            self._idle.clear()
+        for conn in conns:
+            conn.close()
+
+
+class FetchModes:
+    """Mode de récupération retenu par domaine : "http" (le HTML serveur suffit) ou "browser"
+    (rendu JavaScript nécessaire). Persisté en JSON si `path` est donné ; comme pour
+    `ProfileStore`, `save` fusionne sous verrou avec ce que les autres workers ont écrit."""
+
+    def __init__(self, path: str | None = None):
+        self.path = path
+        self.modes = read_json_file(path, {})
+        self._changed = {}  # hôte -> mode décidé par ce process depuis le dernier `save`
+
+    def get(self, url: str) -> str | None:
+        return self.modes.get(urlparse(url).netloc)
+
+    def set(self, url: str, mode: str) -> bool:
+        """Retourne True si le mode du domaine change."""
+        host = urlparse(url).netloc
+        if self.modes.get(host) == mode:
+            return False
+        self.modes[host] = mode
+        self._changed[host] = mode
+        return True
+
+    def save(self):
+        if not (self.path and self._changed):
+            return
+        with file_lock(self.path):
+            modes = {**read_json_file(self.path, {}), **self._changed}
+            write_json_file(self.path, modes, sort_keys=True)
+        self.modes = modes
+        self._changed = {}
+
+
+def filled_fields(row: dict) -> int:
+    return sum(1 for key in ("title", "description", "image") if row.get(key))
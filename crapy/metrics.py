@@ -0,0 +1,184 @@
+"""Métriques d'un run : durées par étape, compteurs, export JSON et Prometheus, profilage."""
+
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from .util import replace_file, write_json_file
+
+
+METRIC_QUANTILES = (0.5, 0.9, 0.95, 0.99)
+METRICS_MAX_URLS = 50_000  # au-delà, seules les durées agrégées sont gardées
+PROFILERS = ("cprofile", "pyinstrument")
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Quantile `q` (0..1) par interpolation linéaire entre les valeurs triées."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    pos = (len(ordered) - 1) * q
+    low = int(pos)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (pos - low)
+
+
+def prom_escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Metrics:
+    """Instrumentation d'un run : durée de chaque étape (goto, attente, clics, content, parse…)
+    par URL et agrégée, compteurs (reprises, skips, classes de statut HTTP, octets) et
+    percentiles de latence, exportables en JSON et en textfile Prometheus.
+
+    Avec `profiler` ("cprofile" ou "pyinstrument"), le chemin chaud de l'extraction est
+    profilé (`profiled()`), puis sauvegardé par `save_profile`."""
+
+    def __init__(self, max_urls: int = METRICS_MAX_URLS, profiler: str | None = None):
+        self.started_at = time.time()
+        self.max_urls = max_urls
+        self.durations: dict[str, list[float]] = {}
+        self.per_url: dict[str, dict[str, float]] = {}
+        self.counters: Counter = Counter()
+        self.statuses: Counter = Counter()
+        self.bytes = 0
+        self.profiler_kind = profiler
+        self._profiler = None
+        if profiler == "cprofile":
+            import cProfile
+            self._profiler = cProfile.Profile()
+        elif profiler == "pyinstrument":
+            try:
+                from pyinstrument import Profiler
+            except ImportError:
+                raise RuntimeError("profilage pyinstrument: installer pyinstrument (pip install pyinstrument)") from None
+            self._profiler = Profiler(async_mode="disabled")
+        elif profiler:
+            raise ValueError(f"profileur inconnu: {profiler} ({', '.join(PROFILERS)})")
+
+    @contextmanager
+    def stage(self, name: str, url: str | None = None):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - t0, url)
+
+    def add(self, name: str, seconds: float, url: str | None = None) -> None:
+        self.durations.setdefault(name, []).append(seconds)
+        if url is None:
+            return
+        timings = self.per_url.get(url)
+        if timings is None:
+            if len(self.per_url) >= self.max_urls:
+                return
+            timings = self.per_url[url] = {}
+        timings[name] = timings.get(name, 0.0) + seconds
+
+    def count(self, name: str, n: int = 1) -> None:
+        self.counters[name] += n
+
+    def response(self, status: int | None, html: str | None = None) -> None:
+        """Classe de statut (2xx, 3xx…, "none" sans réponse) et taille du HTML reçu."""
+        self.statuses[f"{status // 100}xx" if status else "none"] += 1
+        if html:
+            self.bytes += len(html.encode("utf-8", "replace"))
+
+    @contextmanager
+    def profiled(self):
+        if self._profiler is None:
+            yield
+            return
+        if self.profiler_kind == "cprofile":
+            self._profiler.enable()
+        else:
+            self._profiler.start()
+        try:
+            yield
+        finally:
+            if self.profiler_kind == "cprofile":
+                self._profiler.disable()
+            else:
+                self._profiler.stop()
+
+    def save_profile(self, path: str) -> None:
+        """cProfile : statistiques binaires (pstats, snakeviz) ; pyinstrument : rapport HTML."""
+        if self._profiler is None:
+            return
+        if self.profiler_kind == "cprofile":
+            self._profiler.dump_stats(path)
+            return
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self._profiler.output_html())
+
+    def stage_stats(self) -> dict[str, dict]:
+        stats = {}
+        for name, values in self.durations.items():
+            stats[name] = {
+                "count": len(values),
+                "total_s": sum(values),
+                "mean_s": sum(values) / len(values),
+                "max_s": max(values),
+                **{f"p{round(q * 100)}_s": percentile(values, q) for q in METRIC_QUANTILES},
+            }
+        return stats
+
+    def snapshot(self, per_url: bool = True) -> dict:
+        data = {
+            "started_at": self.started_at,
+            "duration_s": time.time() - self.started_at,
+            "stages": self.stage_stats(),
+            "counters": dict(self.counters),
+            "http_status": dict(self.statuses),
+            "html_bytes": self.bytes,
+        }
+        if per_url:
+            data["urls"] = self.per_url
+        return data
+
+    def save_json(self, path: str, per_url: bool = True) -> None:
+        write_json_file(path, self.snapshot(per_url))
+
+    def prometheus(self) -> str:
+        """Format texte d'exposition Prometheus (pour le textfile collector de node_exporter)."""
+        lines = [
+            "# HELP crapy_stage_seconds Durée des étapes du crawl.",
+            "# TYPE crapy_stage_seconds summary",
+        ]
+        for name, values in sorted(self.durations.items()):
+            stage = prom_escape(name)
+            for q in METRIC_QUANTILES:
+                lines.append(f'crapy_stage_seconds{{stage="{stage}",quantile="{q}"}} {percentile(values, q):.6f}')
+            lines.append(f'crapy_stage_seconds_sum{{stage="{stage}"}} {sum(values):.6f}')
+            lines.append(f'crapy_stage_seconds_count{{stage="{stage}"}} {len(values)}')
+        lines += ["# HELP crapy_events_total Événements du crawl (reprises, skips, cache…).",
+                  "# TYPE crapy_events_total counter"]
+        lines += [f'crapy_events_total{{event="{prom_escape(k)}"}} {v}' for k, v in sorted(self.counters.items())]
+        lines += ["# HELP crapy_http_responses_total Réponses par classe de statut HTTP.",
+                  "# TYPE crapy_http_responses_total counter"]
+        lines += [f'crapy_http_responses_total{{class="{k}"}} {v}' for k, v in sorted(self.statuses.items())]
+        lines += [
+            "# HELP crapy_html_bytes_total Octets de HTML reçus.",
+            "# TYPE crapy_html_bytes_total counter",
+            f"crapy_html_bytes_total {self.bytes}",
+            "# HELP crapy_run_duration_seconds Durée du run.",
+            "# TYPE crapy_run_duration_seconds gauge",
+            f"crapy_run_duration_seconds {time.time() - self.started_at:.3f}",
+            "# HELP crapy_last_run_timestamp_seconds Fin du dernier run (epoch).",
+            "# TYPE crapy_last_run_timestamp_seconds gauge",
+            f"crapy_last_run_timestamp_seconds {time.time():.0f}",
+        ]
+        return "\n".join(lines) + "\n"
+
+    def save_prometheus(self, path: str) -> None:
+        # Écriture atomique : le collector ne doit jamais lire un fichier à moitié écrit.
+        text = self.prometheus()
+        replace_file(path, lambda f: f.write(text))
+
+    def summary(self, top: int = 6) -> str:
+        stats = sorted(self.stage_stats().items(), key=lambda item: -item[1]["total_s"])[:top]
+        return "étapes: " + " | ".join(
+            f"{name} {s['total_s']:.1f}s (p50 {s['p50_s'] * 1000:.0f} ms, p95 {s['p95_s'] * 1000:.0f} ms)"
+            for name, s in stats
+        )
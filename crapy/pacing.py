@@ -0,0 +1,424 @@
+"""Rythme et reprises : échecs classés, débit adaptatif par hôte, reprises différées, disjoncteur."""
+
+import asyncio
+import email.utils
+import http.client
+import random
+import socket
+import time
+from collections import Counter
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from urllib import robotparser
+from urllib.parse import urlparse, urlsplit, urlunsplit
+
+from .httpclient import HTTP_HEADERS
+
+
+# Types d'échec : les transitoires sont retentés plus tard (délai de base en s, doublé à chaque
+# tentative), les autres abandonnés tout de suite. Un DNS introuvable ne se réglera pas en
+# quelques secondes : c'est le disjoncteur du domaine qui s'en charge.
+RETRY_BACKOFF_S = {
+    "timeout": 5.0,
+    "network": 5.0,
+    "http-5xx": 10.0,
+    "http-429": 15.0,
+    "challenge": 30.0,
+}
+FAILURE_KINDS = (*RETRY_BACKOFF_S, "dns", "other")
+
+
+class FetchError(RuntimeError):
+    """Échec de chargement classé (`kind` parmi FAILURE_KINDS)."""
+
+    def __init__(self, kind: str, message: str, retry_after=None):
+        super().__init__(message)
+        self.kind = kind
+        self.retry_after = retry_after
+
+    @property
+    def retryable(self) -> bool:
+        return self.kind in RETRY_BACKOFF_S
+
+
+def classify_exception(e: Exception) -> str:
+    if isinstance(e, FetchError):
+        return e.kind
+    msg = str(e)
+    if isinstance(e, socket.gaierror) or "ERR_NAME_NOT_RESOLVED" in msg or "ERR_NAME_RESOLUTION" in msg:
+        return "dns"
+    if isinstance(e, TimeoutError) or type(e).__name__ == "TimeoutError" or "ERR_TIMED_OUT" in msg:
+        return "timeout"
+    if isinstance(e, (OSError, http.client.HTTPException)) or "net::ERR_" in msg:
+        return "network"
+    return "other"
+
+
+def as_fetch_error(e: Exception) -> FetchError:
+    return e if isinstance(e, FetchError) else FetchError(classify_exception(e), str(e))
+
+
+def status_error(status: int, retry_after=None) -> FetchError | None:
+    """FetchError pour un statut HTTP transitoire (429, 5xx), None sinon."""
+    if status == 429:
+        return FetchError("http-429", "HTTP 429", retry_after)
+    if status >= 500:
+        return FetchError("http-5xx", f"HTTP {status}", retry_after)
+    return None
+
+
+# Rythme adaptatif par hôte (AIMD) : +RATE_STEP req/s après chaque réponse saine, débit divisé
+# par deux sur 429/503, erreur ou latence qui double ; jamais au-delà du plafond configuré ni de
+# ce qu'impose robots.txt, jamais en deçà d'une requête par minute.
+RATE_STEP = 0.1
+RATE_DECREASE = 0.5
+MIN_RATE = 1 / 60
+LATENCY_SLOWDOWN = 2.0
+RETRY_AFTER_MAX_S = 600
+
+
+def parse_retry_after(value) -> float | None:
+    """Secondes demandées par un en-tête Retry-After (délai en secondes ou date HTTP)."""
+    if not value:
+        return None
+    value = str(value).strip()
+    if value.isdigit():
+        return min(float(value), RETRY_AFTER_MAX_S)
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, min((when - datetime.now(timezone.utc)).total_seconds(), RETRY_AFTER_MAX_S))
+
+
+def robots_interval(text: str, user_agent: str) -> float | None:
+    """Intervalle minimal entre deux requêtes imposé par robots.txt (Crawl-delay ou Request-rate)."""
+    parser = robotparser.RobotFileParser()
+    parser.parse(text.splitlines())
+    intervals = []
+    delay = parser.crawl_delay(user_agent)
+    if delay:
+        intervals.append(float(delay))
+    rate = parser.request_rate(user_agent)
+    if rate and rate.requests:
+        intervals.append(rate.seconds / rate.requests)
+    return max(intervals) if intervals else None
+
+
+def response_feedback(response) -> tuple:
+    """(status, latence jusqu'au premier octet en s, Retry-After) d'une réponse Playwright."""
+    if response is None:
+        return None, None, None
+    timing = response.request.timing or {}
+    ttfb_ms = timing.get("responseStart", -1)
+    latency = ttfb_ms / 1000 if ttfb_ms and ttfb_ms > 0 else None
+    return response.status, latency, response.headers.get("retry-after")
+
+
+class HostRate:
+    """Seau à jetons d'un hôte : un jeton par requête, regarni à `rate` jetons par seconde."""
+
+    def __init__(self, rate: float, max_rate: float):
+        self.max_rate = max_rate
+        self.rate = min(rate, max_rate)
+        self.tokens = 1.0
+        self.updated = time.monotonic()
+        self.latency = None  # moyenne glissante du temps de réponse (s)
+        self.paused_until = 0.0  # Retry-After en cours
+        self.robots_interval = None
+        self.robots_checked = False
+        self.slowdowns = 0
+
+    def take(self) -> float:
+        """Prend un jeton et retourne l'attente (s) avant de pouvoir partir."""
+        now = time.monotonic()
+        self.tokens = min(1.0, self.tokens + (now - self.updated) * self.rate) - 1.0
+        self.updated = now
+        wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        return max(wait, self.paused_until - now)
+
+    def cap(self, max_rate: float) -> None:
+        self.max_rate = min(self.max_rate, max_rate)
+        self.rate = min(self.rate, self.max_rate)
+
+    def slow_down(self) -> None:
+        self.rate = max(MIN_RATE, self.rate * RATE_DECREASE)
+        self.slowdowns += 1
+
+    def speed_up(self) -> None:
+        self.rate = min(self.max_rate, self.rate + RATE_STEP)
+
+
+class HostLimiter:
+    """Politesse par hôte : N visites simultanées au plus, départs cadencés par un seau à jetons
+    dont le débit s'adapte aux réponses (`feedback`), sous les plafonds `max_rate` et Crawl-delay.
+    Les états par hôte (`rates`) peuvent être partagés entre limiteurs."""
+
+    def __init__(
+        self,
+        per_host: int = 2,
+        delay_min: int = 900,
+        delay_max: int = 1900,
+        max_rate: float = 2.0,
+        rates: dict | None = None,
+        robots_fetch=None,
+        logger=None,
+    ):
+        self.per_host = max(1, per_host)
+        self.start_rate = 2000 / max(1, delay_min + delay_max)
+        self.max_rate = max(MIN_RATE, max_rate)
+        self.rates = rates if rates is not None else {}
+        self.robots_fetch = robots_fetch
+        self.logger = logger
+        self._slots = {}
+        self._locks = {}
+
+    def host_rate(self, url: str) -> HostRate:
+        host = urlparse(url).netloc
+        state = self.rates.get(host)
+        if state is None:
+            state = self.rates[host] = HostRate(self.start_rate, self.max_rate)
+        return state
+
+    @asynccontextmanager
+    async def slot(self, url: str):
+        host = urlparse(url).netloc
+        sem = self._slots.setdefault(host, asyncio.Semaphore(self.per_host))
+        lock = self._locks.setdefault(host, asyncio.Lock())
+        state = self.host_rate(url)
+        async with sem:
+            async with lock:
+                if not state.robots_checked:
+                    await self.check_robots(url, state)
+                wait_s = state.take()
+                if wait_s > 0:
+                    # Un peu d'irrégularité, comme l'ancienne pause aléatoire (jamais sous le plafond).
+                    await asyncio.sleep(wait_s * random.uniform(1.0, 1.2))
+            yield
+
+    async def check_robots(self, url: str, state: HostRate) -> None:
+        state.robots_checked = True
+        if self.robots_fetch is None:
+            return
+        parts = urlsplit(url)
+        robots_url = urlunsplit((parts.scheme, parts.netloc, "/robots.txt", "", ""))
+        loop = asyncio.get_running_loop()
+        try:
+            text = await loop.run_in_executor(None, self.robots_fetch, robots_url)
+        except Exception:
+            return
+        interval = robots_interval(text, HTTP_HEADERS["User-Agent"]) if text else None
+        if interval:
+            state.robots_interval = interval
+            state.cap(1 / interval)
+            self.log(f"    ⚙ {parts.netloc}: robots.txt impose {interval:g}s entre deux requêtes")
+
+    def feedback(
+        self, url: str, status: int | None = None, latency_s: float | None = None,
+        retry_after=None, failed: bool = False,
+    ) -> None:
+        """Ajuste le débit de l'hôte d'après une réponse (ou un échec réseau/challenge)."""
+        state = self.host_rate(url)
+        if status in (429, 503) or failed or (status and status >= 500):
+            state.slow_down()
+            pause_s = parse_retry_after(retry_after)
+            if pause_s:
+                state.paused_until = max(state.paused_until, time.monotonic() + pause_s)
+            self.log(
+                f"    🐢 {urlparse(url).netloc}: {status or 'échec'}, {state.rate:.2f} req/s"
+                + (f", reprise dans {pause_s:.0f}s" if pause_s else "")
+            )
+            return
+        if latency_s is None:
+            return
+        if state.latency is not None and latency_s > LATENCY_SLOWDOWN * state.latency:
+            state.slow_down()
+        else:
+            state.speed_up()
+        state.latency = latency_s if state.latency is None else 0.8 * state.latency + 0.2 * latency_s
+
+    def log(self, msg: str) -> None:
+        if self.logger:
+            self.logger(msg)
+
+    def summary(self) -> str:
+        parts = []
+        for host, state in self.rates.items():
+            detail = f"{host} {state.rate:.2f} req/s"
+            if state.robots_interval:
+                detail += f" (robots {state.robots_interval:g}s)"
+            if state.slowdowns:
+                detail += f", {state.slowdowns} ralentissement(s)"
+            parts.append(detail)
+        return "rythme: " + "; ".join(parts)
+
+
+MAX_ATTEMPTS = 3
+LISTING_ATTEMPTS = 3
+
+
+BREAKER_THRESHOLD = 5
+BREAKER_COOLDOWN_S = 60.0
+BREAKER_MAX_TRIPS = 3
+BREAKER_PROBE_WAIT_S = 5.0
+BREAKER_HEAL_SUCCESSES = 20  # succès consécutifs qui effacent une ouverture du disjoncteur
+
+
+def retry_delay(error: FetchError, attempt: int) -> float:
+    """Délai avant la tentative suivante : base du type d'échec doublée à chaque fois, ou le
+    Retry-After du serveur s'il est plus long."""
+    delay = RETRY_BACKOFF_S[error.kind] * 2 ** (attempt - 1) * random.uniform(1.0, 1.5)
+    return max(delay, parse_retry_after(error.retry_after) or 0.0)
+
+
+class RetryScheduler:
+    """Reprises différées : une URL en échec transitoire repart dans la file de travail après
+    `retry_delay`, pendant que les workers passent aux suivantes.
+
+    Compte les éléments en cours (`put` → `settle`/abandon) pour que le producteur sache quand
+    plus aucune reprise ne peut arriver (`drained`)."""
+
+    def __init__(self, queue: asyncio.Queue, max_attempts: int = MAX_ATTEMPTS):
+        self.queue = queue
+        self.max_attempts = max(1, max_attempts)
+        self.attempts = {}  # idx -> échecs déjà subis
+        self.failures = Counter()  # échecs par type
+        self.retried = 0
+        self.recovered = 0
+        self.gave_up = 0
+        self._outstanding = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._timers = set()
+
+    async def put(self, item) -> None:
+        self._outstanding += 1
+        self._idle.clear()
+        await self.queue.put(item)
+
+    def defer(self, item, delay_s: float) -> None:
+        """Remet `item` dans la file dans `delay_s` secondes (il reste en cours d'ici là)."""
+        task = asyncio.create_task(self._requeue(item, delay_s))
+        self._timers.add(task)
+        task.add_done_callback(self._timers.discard)
+
+    async def _requeue(self, item, delay_s: float) -> None:
+        await asyncio.sleep(delay_s)
+        await self.queue.put(item)
+
+    def fail(self, item, error: FetchError) -> float | None:
+        """Note un échec ; retourne le délai avant reprise, ou None si l'URL est abandonnée."""
+        idx = item[0]
+        self.failures[error.kind] += 1
+        attempt = self.attempts.get(idx, 0) + 1
+        if not error.retryable or attempt >= self.max_attempts:
+            self.abandon(idx)
+            return None
+        self.attempts[idx] = attempt
+        self.retried += 1
+        delay = retry_delay(error, attempt)
+        self.defer(item, delay)
+        return delay
+
+    def abandon(self, idx: int) -> None:
+        self.attempts.pop(idx, None)
+        self.gave_up += 1
+        self._done()
+
+    def settle(self, idx: int) -> None:
+        if self.attempts.pop(idx, None):
+            self.recovered += 1
+        self._done()
+
+    def _done(self) -> None:
+        self._outstanding -= 1
+        if self._outstanding <= 0:
+            self._idle.set()
+
+    async def drained(self) -> None:
+        await self._idle.wait()
+
+    def cancel(self) -> None:
+        for task in list(self._timers):
+            task.cancel()
+
+    def summary(self) -> str:
+        kinds = ", ".join(f"{kind} ×{n}" for kind, n in self.failures.most_common())
+        return (
+            f"échecs: {kinds} ; {self.retried} reprise(s), {self.recovered} récupérée(s), "
+            f"{self.gave_up} abandon(s)"
+        )
+
+
+class CircuitBreaker:
+    """Disjoncteur par domaine : après BREAKER_THRESHOLD échecs consécutifs, pause de
+    BREAKER_COOLDOWN_S (doublée à chaque ouverture) puis une seule requête sonde. Au bout de
+    BREAKER_MAX_TRIPS ouvertures le domaine est abandonné ; `heal_after` succès consécutifs
+    effacent une ouverture."""
+
+    def __init__(self, threshold: int = BREAKER_THRESHOLD, cooldown_s: float = BREAKER_COOLDOWN_S,
+                 max_trips: int = BREAKER_MAX_TRIPS, heal_after: int = BREAKER_HEAL_SUCCESSES, logger=None):
+        self.threshold = max(1, threshold)
+        self.cooldown_s = cooldown_s
+        self.max_trips = max(1, max_trips)
+        self.heal_after = max(1, heal_after)
+        self.logger = logger
+        self._failures = {}
+        self._successes = Counter()
+        self._open_until = {}
+        self._probing = set()
+        self.trips = Counter()  # ouvertures en cours de décompte (pause, abandon)
+        self.opened = Counter()  # toutes les ouvertures du run (bilan)
+
+    def check(self, url: str) -> float | None:
+        """0 : la requête peut partir ; > 0 : secondes avant de réessayer ; None : domaine abandonné."""
+        host = urlparse(url).netloc
+        if self.trips[host] >= self.max_trips:
+            return None
+        if host not in self._open_until:
+            return 0.0
+        remaining = self._open_until[host] - time.monotonic()
+        if remaining > 0:
+            return remaining
+        if host in self._probing:
+            return BREAKER_PROBE_WAIT_S
+        self._probing.add(host)
+        return 0.0
+
+    def success(self, url: str) -> None:
+        host = urlparse(url).netloc
+        self._failures[host] = 0
+        self._probing.discard(host)
+        if self._open_until.pop(host, None) is not None and self.logger:
+            self.logger(f"    ✓ {host}: disjoncteur refermé")
+        if self.trips[host] and self.trips[host] < self.max_trips:
+            self._successes[host] += 1
+            if self._successes[host] >= self.heal_after:
+                self.trips[host] -= 1
+                self._successes[host] = 0
+
+    def failure(self, url: str) -> None:
+        host = urlparse(url).netloc
+        self._failures[host] = self._failures.get(host, 0) + 1
+        probe_failed = host in self._probing
+        self._probing.discard(host)
+        self._successes[host] = 0
+        if self._failures[host] < self.threshold and not probe_failed:
+            return
+        self.trips[host] += 1
+        self.opened[host] += 1
+        self._failures[host] = 0
+        if self.trips[host] >= self.max_trips:
+            self._open_until.pop(host, None)
+            msg = f"    ⛔ {host}: {self.trips[host]} coupures, URLs restantes abandonnées"
+        else:
+            pause_s = self.cooldown_s * 2 ** (self.trips[host] - 1)
+            self._open_until[host] = time.monotonic() + pause_s
+            msg = f"    ⛔ {host}: échecs en série, domaine en pause {pause_s:.0f}s"
+        if self.logger:
+            self.logger(msg)
+
+    def summary(self) -> str:
+        return "disjoncteur: " + ", ".join(f"{host} ({n} ouverture(s))" for host, n in self.opened.items())
@@ -0,0 +1,109 @@
+"""Détection du schéma de pagination d'un listing."""
+
+import re
+from typing import NamedTuple
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+
+from .extraction import element_text, parse_html
+
+
+PAGE_PARAMS = ("page", "p", "pg", "paged", "pagenum", "pageNumber")
+LOAD_MORE_RE = re.compile(
+    r"\b(?:voir|charger|afficher)\s+plus\b|\bplus de (?:produits|résultats|articles)\b|\b(?:load|show|view)\s+more\b",
+    re.I,
+)
+_PAGE_SUFFIX_RE = re.compile(r"page(\d+)\.htm$")
+# Clique le premier bouton/lien visible « voir plus » ; False s'il n'y en a pas.
+CLICK_LOAD_MORE_JS = """(pattern) => {
+    const re = new RegExp(pattern, 'i');
+    for (const el of document.querySelectorAll('button, a, [role="button"]')) {
+        if (el.offsetParent !== null && re.test(el.textContent || '')) {
+            el.scrollIntoView({ block: 'center' });
+            el.click();
+            return true;
+        }
+    }
+    return false;
+}"""
+
+
+class Pagination(NamedTuple):
+    """Schéma de pagination d'un listing, détecté sur sa première page.
+
+    `kind` : "suffix" (pageN.htm), "query" (?page=N), "rel-next" (<link/a rel="next">),
+    "load-more" (bouton « voir plus ») ou "scroll" (défilement infini). `hint` est l'URL de
+    la page 2 trouvée dans les liens quand la première page n'a pas de numéro."""
+
+    kind: str
+    param: str = ""
+    hint: str = ""
+
+    @property
+    def in_page(self) -> bool:
+        """Pages suivantes chargées dans la même page navigateur (pas d'URL à précharger)."""
+        return self.kind in ("load-more", "scroll")
+
+    def next_url(self, url: str, html: str = "", base_url: str = "") -> str | None:
+        if self.kind == "suffix":
+            m = _PAGE_SUFFIX_RE.search(urlsplit(url).path)
+            if not m:
+                return self.hint or None
+            parts = urlsplit(url)
+            path = parts.path[:m.start()] + f"page{int(m.group(1)) + 1}.htm"
+            return urlunsplit(parts._replace(path=path))
+        if self.kind == "query":
+            parts = urlsplit(url)
+            query = parse_qsl(parts.query, keep_blank_values=True)
+            current = next((int(v) for k, v in query if k == self.param and v.isdigit()), None)
+            if current is None:
+                return self.hint or None
+            query = [(k, str(current + 1) if k == self.param else v) for k, v in query]
+            return urlunsplit(parts._replace(query=urlencode(query)))
+        if self.kind == "rel-next":
+            return find_rel_next(html, base_url or url)
+        return None
+
+
+def find_rel_next(html: str, base_url: str, tree=None) -> str | None:
+    root = tree if tree is not None else parse_html(html)
+    for el in root.iter("link", "a"):
+        href = el.get("href")
+        if href and "next" in (el.get("rel") or "").lower().split():
+            return urljoin(base_url, href)
+    return None
+
+
+def detect_pagination(url: str, html: str, base_url: str = "") -> Pagination:
+    """Détecte le schéma de pagination : d'abord l'URL, puis rel="next", puis les liens vers la
+    page 2 du même chemin, puis un bouton « voir plus » ; à défaut, défilement infini."""
+    base_url = base_url or url
+    parts = urlsplit(url)
+    if _PAGE_SUFFIX_RE.search(parts.path):
+        return Pagination("suffix")
+    query = dict(parse_qsl(parts.query))
+    for param in PAGE_PARAMS:
+        if query.get(param, "").isdigit():
+            return Pagination("query", param)
+
+    root = parse_html(html)
+    if find_rel_next(html, base_url, tree=root):
+        return Pagination("rel-next")
+    directory = parts.path.rsplit("/", 1)[0]
+    for a in root.iter("a"):
+        href = a.get("href")
+        if not href:
+            continue
+        target = urlsplit(urljoin(base_url, href))
+        if target.netloc != parts.netloc:
+            continue
+        if target.path.rsplit("/", 1)[0] in (directory, parts.path.rstrip("/")) and target.path.endswith("page2.htm"):
+            return Pagination("suffix", hint=urlunsplit(target._replace(fragment="")))
+        if target.path == parts.path:
+            target_query = dict(parse_qsl(target.query))
+            for param in PAGE_PARAMS:
+                if target_query.get(param) == "2":
+                    return Pagination("query", param, hint=urlunsplit(target._replace(fragment="")))
+    for el in root.iter("button", "a"):
+        if LOAD_MORE_RE.search(element_text(el)):
+            return Pagination("load-more")
+    return Pagination("scroll")
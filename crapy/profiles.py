@@ -0,0 +1,160 @@
+"""Profils d'extraction appris par domaine."""
+
+import re
+import time
+from collections import deque
+from urllib.parse import urlparse
+
+from .extraction import (
+    IMAGE_FALLBACKS,
+    PROFILE_DESCRIPTION_CANDIDATES,
+    PROFILE_KEYS,
+    SelectorPlan,
+    element_text,
+)
+from .util import file_lock, read_json_file, write_json_file
+
+
+DEFAULT_PROFILES_PATH = "crapy_profiles.json"
+PROFILE_SAMPLES = 3  # fiches complètes observées avant de fixer le profil d'un domaine
+LEAN_CONFIDENCE = 0.9  # au-delà (pour chaque champ), extraction réduite aux sélecteurs du profil
+PROFILE_WINDOW = 20  # fiches observées avant de juger le taux de réussite d'un profil
+PROFILE_DRIFT = 0.25  # baisse tolérée du taux de réussite par rapport à la confiance apprise
+
+_CSS_NAME_RE = re.compile(r"-?[_a-zA-Z][\w-]*\Z")
+
+
+def profile_candidates(tree) -> dict[str, list[str]]:
+    """Sélecteurs candidats par champ, du plus spécifique au plus générique : ceux déjà connus
+    et ceux déduits de la page (classes du h1, du plus long paragraphe, dossier de l'og:image)."""
+    title = ["h1.text-trabaldo"]
+    description = ["p.MsoNormal"]
+    images = [IMAGE_FALLBACKS[0]]
+    if tree is not None:
+        h1 = next((el for el in tree.iter("h1") if element_text(el)), None)
+        if h1 is not None:
+            title += [f"h1.{cls}" for cls in (h1.get("class") or "").split() if _CSS_NAME_RE.match(cls)]
+        longest = max(tree.iter("p"), key=lambda el: len(element_text(el)), default=None)
+        if longest is not None and len(element_text(longest)) > 120:
+            description += [f"p.{cls}" for cls in (longest.get("class") or "").split() if _CSS_NAME_RE.match(cls)]
+            parent = longest.getparent()
+            if parent is not None and _CSS_NAME_RE.match(parent.get("id") or ""):
+                description.append(f"#{parent.get('id')}")
+        og = next((el for el in tree.iter("meta") if el.get("property") == "og:image"), None)
+        segment = urlparse((og.get("content") or "").strip()).path.split("/")[1:2] if og is not None else []
+        if segment and segment[0] and "'" not in segment[0] and "." not in segment[0]:
+            images.insert(0, f"img[src*='/{segment[0]}/']")
+    title += ["[itemprop='name']", "h1"]
+    description += [*PROFILE_DESCRIPTION_CANDIDATES, "[itemprop='description']"]
+    images += ["img[itemprop='image']", "img[src]"]
+    return {
+        "title": list(dict.fromkeys(title)),
+        "description": list(dict.fromkeys(description)),
+        "images": list(dict.fromkeys(images)),
+    }
+
+
+def _field_ok(key: str, elements: list) -> bool:
+    if not elements:
+        return False
+    if key == "images":
+        return any((el.get("src") or "").strip() for el in elements)
+    size = len(element_text(elements[0]))
+    return 3 <= size <= 300 if key == "title" else size > 80
+
+
+def learn_profile(trees: list) -> dict:
+    """Profil appris sur plusieurs fiches : pour chaque champ, le sélecteur qui réussit le plus
+    souvent (à égalité, le plus spécifique), avec sa confiance = part des fiches réussies."""
+    candidates = {key: [] for key in PROFILE_KEYS}
+    for tree in trees:
+        for key, sels in profile_candidates(tree).items():
+            candidates[key] += [sel for sel in sels if sel not in candidates[key]]
+    plan = SelectorPlan([sel for sels in candidates.values() for sel in sels], collect_all=candidates["images"])
+    scores = {key: dict.fromkeys(sels, 0) for key, sels in candidates.items()}
+    for tree in trees:
+        found = plan.match(tree)
+        for key, sels in candidates.items():
+            for sel in sels:
+                scores[key][sel] += _field_ok(key, found[sel])
+
+    profile = {"confidence": {}, "samples": len(trees)}
+    for key in PROFILE_KEYS:
+        best = max(scores[key].values())
+        # max() garde le premier ex aequo : le plus spécifique.
+        sel = next(sel for sel in candidates[key] if scores[key][sel] == best) if best else ""
+        profile[key] = sel
+        profile["confidence"][key] = round(best / max(1, len(trees)), 3)
+    profile["lean"] = all(profile[key] and profile["confidence"][key] >= LEAN_CONFIDENCE for key in PROFILE_KEYS)
+    return profile
+
+
+class ProfileStore:
+    """Profils d'extraction par domaine, appris sur PROFILE_SAMPLES fiches complètes et gardés
+    d'un run à l'autre (JSON si `path` est donné). `validate` oublie un profil dont un sélecteur
+    décroche (PROFILE_WINDOW, PROFILE_DRIFT) ; `save` fusionne sous verrou, le fichier peut être
+    partagé entre workers."""
+
+    def __init__(self, path: str | None = None, samples: int = PROFILE_SAMPLES):
+        self.path = path
+        self.samples = max(1, samples)
+        self.profiles = read_json_file(path, {})
+        self._pending = {}  # hôte -> arbres des fiches échantillons
+        self._recent = {}  # hôte -> hits des dernières fiches
+        self._changed = {}  # hôte -> profil appris, ou None si oublié, depuis le dernier `save`
+
+    def get(self, url: str) -> dict | None:
+        return self.profiles.get(urlparse(url).netloc)
+
+    def learn(self, url: str, tree) -> dict | None:
+        """Ajoute une fiche complète aux échantillons du domaine ; retourne le profil une fois appris."""
+        host = urlparse(url).netloc
+        if tree is None or host in self.profiles:
+            return self.profiles.get(host)
+        pending = self._pending.setdefault(host, [])
+        pending.append(tree)
+        if len(pending) < self.samples:
+            return None
+        profile = learn_profile(pending)
+        profile["learned_at"] = time.strftime("%Y-%m-%d %H:%M:%S")
+        del self._pending[host]
+        self.profiles[host] = profile
+        self._recent.pop(host, None)
+        self._changed[host] = profile
+        return profile
+
+    def validate(self, url: str, hits: dict) -> str | None:
+        """Compte la fiche ; retourne le champ en cause si le profil vient d'être invalidé."""
+        host = urlparse(url).netloc
+        profile = self.profiles.get(host)
+        if not profile or not hits:
+            return None
+        recent = self._recent.setdefault(host, deque(maxlen=PROFILE_WINDOW))
+        recent.append(hits)
+        if len(recent) < PROFILE_WINDOW:
+            return None
+        for key, confidence in profile.get("confidence", {}).items():
+            if not profile.get(key):
+                continue
+            rate = sum(1 for h in recent if h.get(key)) / len(recent)
+            if rate < confidence - PROFILE_DRIFT:
+                del self.profiles[host]
+                self._recent.pop(host, None)
+                self._changed[host] = None
+                return f"{key} {rate:.0%} (appris à {confidence:.0%})"
+        return None
+
+    def save(self):
+        if not (self.path and self._changed):
+            return
+        with file_lock(self.path):
+            profiles = read_json_file(self.path, {})
+            for host, profile in self._changed.items():
+                if profile is None:
+                    profiles.pop(host, None)
+                else:
+                    profiles[host] = profile
+            write_json_file(self.path, profiles, sort_keys=True)
+        # Les profils appris entre-temps par les autres workers servent dès maintenant.
+        self.profiles = profiles
+        self._changed = {}
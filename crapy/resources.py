@@ -0,0 +1,96 @@
+"""Filtrage des ressources chargées par le navigateur."""
+
+from urllib.parse import urlparse
+
+
+# Types de ressources Playwright bloqués par préréglage ("document" n'est jamais bloqué
+# pour la page principale ; les scripts restent chargés car ils construisent souvent le DOM).
+RESOURCE_PRESETS = {
+    "full": frozenset(),
+    "no-media": frozenset({"image", "media", "font"}),
+    "dom-only": frozenset({"image", "media", "font", "stylesheet", "texttrack", "manifest", "eventsource", "websocket"}),
+}
+# Publicité / mesure d'audience, bloquées avec "no-media" et "dom-only".
+DEFAULT_BLOCKED_DOMAINS = (
+    "google-analytics.com", "googletagmanager.com", "doubleclick.net", "googlesyndication.com",
+    "googleadservices.com", "facebook.net", "connect.facebook.com", "hotjar.com", "criteo.com",
+    "criteo.net", "taboola.com", "outbrain.com", "scorecardresearch.com", "bing.com", "clarity.ms",
+    "tiktok.com", "pinterest.com", "adnxs.com", "smartadserver.com", "quantserve.com",
+)
+# Tailles typiques (octets) pour estimer ce qu'une requête bloquée aurait coûté, faute d'avoir
+# observé dans le run une réponse du même type.
+TYPICAL_RESOURCE_BYTES = {
+    "image": 60_000, "media": 500_000, "font": 40_000, "stylesheet": 30_000,
+    "script": 50_000, "xhr": 5_000, "fetch": 5_000, "document": 40_000,
+}
+
+
+class ResourcePolicy:
+    """Filtre les requêtes de chaque contexte via `context.route` et compte ce qui a été évité."""
+
+    def __init__(self, preset: str = "full", blocked_domains=None):
+        if preset not in RESOURCE_PRESETS:
+            raise ValueError(f"préréglage inconnu: {preset} (choix: {', '.join(RESOURCE_PRESETS)})")
+        self.preset = preset
+        self.blocked_types = RESOURCE_PRESETS[preset]
+        if blocked_domains is None:
+            blocked_domains = DEFAULT_BLOCKED_DOMAINS if preset != "full" else ()
+        self.blocked_domains = tuple(d.lower().strip().lstrip(".") for d in blocked_domains if d.strip())
+        self.blocked = {}
+        self.allowed = {}
+        self.loaded_bytes = {}
+        self.loaded_count = {}
+
+    def should_block(self, resource_type: str, url: str, main_document: bool = False) -> bool:
+        if main_document:
+            return False
+        if resource_type in self.blocked_types:
+            return True
+        host = (urlparse(url).hostname or "").lower()
+        return any(host == d or host.endswith("." + d) for d in self.blocked_domains)
+
+    async def handle(self, route):
+        request = route.request
+        rtype = request.resource_type
+        try:
+            main_document = rtype == "document" and request.frame.parent_frame is None
+        except Exception:
+            main_document = rtype == "document"
+        if self.should_block(rtype, request.url, main_document):
+            self.blocked[rtype] = self.blocked.get(rtype, 0) + 1
+            await route.abort("blockedbyclient")
+        else:
+            self.allowed[rtype] = self.allowed.get(rtype, 0) + 1
+            await route.continue_()
+
+    def on_response(self, response):
+        try:
+            rtype = response.request.resource_type
+            size = int(response.headers.get("content-length") or 0)
+        except Exception:
+            return
+        self.loaded_bytes[rtype] = self.loaded_bytes.get(rtype, 0) + size
+        self.loaded_count[rtype] = self.loaded_count.get(rtype, 0) + 1
+
+    @property
+    def intercepts(self) -> bool:
+        # Sans rien à bloquer, pas d'interception (elle désactive le cache HTTP de Chromium).
+        return bool(self.blocked_types or self.blocked_domains)
+
+    def saved_bytes(self) -> int:
+        """Estimation des octets évités : taille moyenne observée du même type, sinon taille typique."""
+        total = 0
+        for rtype, count in self.blocked.items():
+            seen = self.loaded_count.get(rtype, 0)
+            avg = self.loaded_bytes.get(rtype, 0) / seen if seen else TYPICAL_RESOURCE_BYTES.get(rtype, 10_000)
+            total += int(avg * count)
+        return total
+
+    def summary(self) -> str:
+        blocked = sum(self.blocked.values())
+        detail = ", ".join(f"{k}={v}" for k, v in sorted(self.blocked.items(), key=lambda kv: -kv[1]))
+        return (
+            f"ressources [{self.preset}]: {blocked} requête(s) bloquée(s)"
+            + (f" ({detail})" if detail else "")
+            + f", ≈{self.saved_bytes() / 1e6:.1f} Mo évités, {sum(self.loaded_bytes.values()) / 1e6:.1f} Mo chargés"
+        )
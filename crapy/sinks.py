@@ -0,0 +1,184 @@
+"""Export des fiches au fil de l'eau : JSON Lines, JSON, CSV ou Parquet."""
+
+import abc
+import csv
+import json
+import os
+import sys
+import time
+
+from .extraction import PRODUCT_FIELDS
+from .util import log_stderr
+
+
+class RecordSink(abc.ABC):
+    """Écrit les fiches une à une, sans les garder en mémoire.
+
+    L'écriture se fait dans `<path>.part`, vidé sur disque toutes les `flush_every` fiches ou
+    `flush_s` secondes ; `close()` renomme atomiquement le fichier sur `path`. Si le run échoue
+    (sortie du `with` sur exception), le `.part` est supprimé et `path` n'est pas touché : la
+    reprise passe par le journal. `path == "-"` écrit directement sur stdout. Une instance s'utilise comme `on_result`."""
+
+    binary = False
+
+    def __init__(self, path: str, fields=PRODUCT_FIELDS, flush_every: int = 100, flush_s: float = 5.0):
+        self.path = path
+        self.fields = tuple(fields)
+        self.flush_every = max(1, flush_every)
+        self.flush_s = flush_s
+        self.count = 0
+        self._pending = 0
+        self._last_flush = time.monotonic()
+        if path == "-":
+            self.tmp_path = None
+            self.f = sys.stdout.buffer if self.binary else sys.stdout
+        else:
+            self.tmp_path = f"{path}.part"
+            self.f = open(self.tmp_path, "wb") if self.binary else open(self.tmp_path, "w", encoding="utf-8", newline="")
+        self.begin()
+
+    def begin(self):
+        pass
+
+    @abc.abstractmethod
+    def write_row(self, row: dict):
+        """Écrit une fiche dans `self.f` (ou la met en tampon)."""
+
+    def end(self):
+        pass
+
+    def write(self, row: dict):
+        self.write_row(row)
+        self.count += 1
+        self._pending += 1
+        if self._pending >= self.flush_every or time.monotonic() - self._last_flush >= self.flush_s:
+            self.flush()
+
+    __call__ = write
+
+    def flush(self):
+        self.f.flush()
+        if self.tmp_path:
+            os.fsync(self.f.fileno())
+        self._pending = 0
+        self._last_flush = time.monotonic()
+
+    def close(self, commit: bool = True):
+        if commit:
+            self.end()
+        self.flush()
+        if self.tmp_path:
+            self.f.close()
+            if commit:
+                os.replace(self.tmp_path, self.path)
+            else:
+                os.remove(self.tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+            return False
+        try:
+            self.close(commit=False)
+        except Exception as e:
+            # L'erreur du run prime : un échec de nettoyage est seulement signalé.
+            log_stderr(f"⚠️ {self.tmp_path}: {e}")
+            return False
+        if self.tmp_path:
+            log_stderr(f"⚠️ export interrompu : {self.path} n'a pas été écrit")
+        return False
+
+
+class JsonlSink(RecordSink):
+    def write_row(self, row: dict):
+        self.f.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+
+class JsonSink(RecordSink):
+    """Tableau JSON écrit au fil de l'eau (un objet indenté par fiche)."""
+
+    def begin(self):
+        self.f.write("[")
+
+    def write_row(self, row: dict):
+        text = json.dumps(row, ensure_ascii=False, indent=2).replace("\n", "\n  ")
+        self.f.write(("," if self.count else "") + "\n  " + text)
+
+    def end(self):
+        self.f.write("\n]\n" if self.count else "]\n")
+
+
+class CsvSink(RecordSink):
+    def begin(self):
+        self.writer = csv.DictWriter(self.f, fieldnames=self.fields, extrasaction="ignore")
+        self.writer.writeheader()
+
+    def write_row(self, row: dict):
+        self.writer.writerow(row)
+
+
+class ParquetSink(RecordSink):
+    """Parquet colonne par colonne (pyarrow, optionnel), écrit par row groups de
+    `row_group_size` fiches : seul le row group en cours est gardé en mémoire. Le fichier n'est
+    lisible qu'une fois finalisé (le pied de page Parquet est écrit à la fermeture)."""
+
+    binary = True
+
+    def __init__(self, path: str, fields=PRODUCT_FIELDS, row_group_size: int = 10_000, **kwargs):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("export Parquet: installer pyarrow (pip install pyarrow)") from None
+        if path == "-":
+            raise RuntimeError("export Parquet: un fichier de sortie est requis")
+        self._pa = pa
+        self._pq = pq
+        self.row_group_size = max(1, row_group_size)
+        self._buffer = []
+        super().__init__(path, fields, **kwargs)
+
+    def begin(self):
+        self.schema = self._pa.schema([(name, self._pa.string()) for name in self.fields])
+        self.writer = self._pq.ParquetWriter(self.f, self.schema, compression="zstd")
+
+    def write_row(self, row: dict):
+        self._buffer.append(row)
+        if len(self._buffer) >= self.row_group_size:
+            self._write_group()
+
+    def _write_group(self):
+        if not self._buffer:
+            return
+        columns = {name: [None if r.get(name) is None else str(r.get(name)) for r in self._buffer] for name in self.fields}
+        self.writer.write_table(self._pa.table(columns, schema=self.schema))
+        self._buffer = []
+
+    def flush(self):
+        # Un row group par flush ferait des groupes minuscules : on n'écrit que des groupes pleins.
+        if len(self._buffer) >= self.row_group_size:
+            self._write_group()
+        super().flush()
+
+    def end(self):
+        self._write_group()
+        self.writer.close()
+
+    def close(self, commit: bool = True):
+        if not commit:
+            # Fermé avant le fichier : sinon pyarrow écrit son pied de page sur un fichier fermé.
+            self._buffer = []
+            self.writer.close()
+        super().close(commit)
+
+
+OUTPUT_HELP = "sortie .jsonl, .csv, .json ou .parquet (pyarrow) ; '-' = stdout, JSON Lines"
+SINKS = {".csv": CsvSink, ".jsonl": JsonlSink, ".ndjson": JsonlSink, ".json": JsonSink, ".parquet": ParquetSink}
+
+
+def open_sink(path: str, **kwargs) -> RecordSink:
+    """Sink selon l'extension (JSON Lines par défaut, et pour stdout)."""
+    return SINKS.get(os.path.splitext(path)[1].lower(), JsonlSink)(path, **kwargs)
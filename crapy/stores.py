@@ -0,0 +1,580 @@
+"""Stockage SQLite : cache HTML, journal de crawl, empreintes du re-scrape incrémental."""
+
+import hashlib
+import json
+import math
+import sqlite3
+import threading
+import time
+import zlib
+from collections import Counter
+from typing import NamedTuple
+from urllib.parse import urlparse
+
+from .extraction import PRODUCT_FIELDS
+from .urls import UrlRules, normalize_url
+
+
+# -------------------- Cache HTML --------------------
+
+DEFAULT_CACHE_PATH = "crapy_cache.sqlite"
+CACHE_TOUCH_BATCH = 200  # lectures dont l'heure d'accès est écrite en une fois
+CACHE_EVICT_TARGET = 0.9  # une éviction redescend à 90 % de max_bytes (pas une à chaque écriture)
+
+class CachedPage(NamedTuple):
+    url: str
+    final_url: str
+    status: int | None
+    html: str
+    fetched_at: float
+
+
+class HtmlCache:
+    """Cache disque des pages rendues (`page.content()`), compressé, avec TTL par entrée
+    et éviction LRU au-delà de `max_bytes` (SQLite, clé = URL normalisée).
+
+    Une lecture n'écrit rien : les heures d'accès sont gardées en mémoire et écrites par lots
+    (`CACHE_TOUCH_BATCH`, avant une éviction et à la fermeture)."""
+
+    def __init__(self, path: str, ttl_s: float = 24 * 3600, max_bytes: int = 512 * 1024 * 1024):
+        self.path = path
+        self.ttl_s = ttl_s
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS pages (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                final_url TEXT NOT NULL,
+                status INTEGER,
+                fetched_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                size INTEGER NOT NULL,
+                body BLOB NOT NULL
+            )
+            """
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS pages_lru ON pages (accessed_at)")
+        self._db.commit()
+        self._total = None  # taille totale, calculée à la première écriture puis tenue à jour
+        self._touched = {}  # clé -> dernière lecture, pas encore écrite
+
+    def get(self, url: str, allow_expired: bool = False) -> CachedPage | None:
+        key = normalize_url(url)
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT url, final_url, status, fetched_at, expires_at, body FROM pages WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or (row[4] < now and not allow_expired):
+                self.misses += 1
+                return None
+            self._touched[key] = now
+            if len(self._touched) >= CACHE_TOUCH_BATCH:
+                self._flush_touched()
+        self.hits += 1
+        return CachedPage(row[0], row[1], row[2], zlib.decompress(row[5]).decode("utf-8"), row[3])
+
+    def contains(self, url: str) -> bool:
+        """Page présente et non expirée (sans la relire ni toucher aux compteurs)."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT 1 FROM pages WHERE key = ? AND expires_at >= ?", (normalize_url(url), time.time())
+            ).fetchone()
+        return row is not None
+
+    def put(self, url: str, status: int | None, html: str, final_url: str = "", ttl_s: float | None = None):
+        body = zlib.compress(html.encode("utf-8"), 6)
+        now = time.time()
+        ttl_s = self.ttl_s if ttl_s is None else ttl_s
+        key = normalize_url(url)
+        with self._lock:
+            previous = self._db.execute("SELECT size FROM pages WHERE key = ?", (key,)).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, url, final_url or url, status, now, now + ttl_s, now, len(body), body),
+            )
+            self._db.commit()
+            if self._total is not None:
+                self._total += len(body) - (previous[0] if previous else 0)
+            self._evict()
+
+    def _flush_touched(self):
+        if self._touched:
+            self._db.executemany(
+                "UPDATE pages SET accessed_at = ? WHERE key = ?", [(t, k) for k, t in self._touched.items()]
+            )
+            self._db.commit()
+            self._touched.clear()
+
+    def _evict(self):
+        if self._total is None:
+            self._total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+        if self._total <= self.max_bytes:
+            return
+        self._flush_touched()
+        # Supprime d'abord les entrées expirées, puis les moins récemment lues, par tranches
+        # dimensionnées sur la taille moyenne d'une entrée (sans charger les clés en mémoire).
+        self._db.execute("DELETE FROM pages WHERE expires_at < ?", (time.time(),))
+        total, count = self._db.execute("SELECT COALESCE(SUM(size), 0), COUNT(*) FROM pages").fetchone()
+        target = self.max_bytes * CACHE_EVICT_TARGET
+        while total > target and count:
+            n = max(1, math.ceil((total - target) / (total / count)))
+            freed, removed = self._db.execute(
+                "SELECT COALESCE(SUM(size), 0), COUNT(*) FROM (SELECT size FROM pages ORDER BY accessed_at LIMIT ?)",
+                (n,),
+            ).fetchone()
+            self._db.execute(
+                "DELETE FROM pages WHERE key IN (SELECT key FROM pages ORDER BY accessed_at LIMIT ?)", (n,)
+            )
+            total -= freed
+            count -= removed
+        self._db.commit()
+        self._total = total
+
+    def entries(self, prefix: str = "") -> list[str]:
+        """URLs en cache (ordre d'insertion), éventuellement filtrées par préfixe."""
+        with self._lock:
+            rows = self._db.execute("SELECT url FROM pages ORDER BY rowid").fetchall()
+        return [url for (url,) in rows if url.startswith(prefix)]
+
+    def close(self):
+        with self._lock:
+            self._flush_touched()
+            self._db.close()
+
+
+# -------------------- Journal de crawl --------------------
+
+DEFAULT_JOURNAL_PATH = "crapy_journal.sqlite"
+URL_STATES = ("pending", "done", "failed", "skipped")
+LEASE_COLUMNS = (
+    ("lease_owner", "TEXT NOT NULL DEFAULT ''"),
+    ("lease_until", "REAL NOT NULL DEFAULT 0"),
+    ("host", "TEXT NOT NULL DEFAULT ''"),
+)
+
+
+class CrawlJournal:
+    """Frontière d'URLs durable (pending/done/failed/skipped) et fiches extraites, en SQLite,
+    écrites par lots de `batch_size`. Sert aussi de file partagée entre workers : `lease` loue
+    une URL pour `lease_s` secondes, elle redevient disponible si le bail expire."""
+
+    def __init__(self, path: str, batch_size: int = 25):
+        self.path = path
+        self.batch_size = max(1, batch_size)
+        self._uncommitted = 0
+        self._lock = threading.Lock()
+        # Plusieurs process peuvent écrire (workers) : on attend le verrou au lieu d'échouer.
+        self._db = sqlite3.connect(path, timeout=60, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS frontier (
+                url TEXT PRIMARY KEY,
+                position INTEGER NOT NULL,
+                state TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                error TEXT NOT NULL DEFAULT '',
+                updated_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS frontier_state ON frontier (state, position);
+            CREATE TABLE IF NOT EXISTS rows (
+                url TEXT PRIMARY KEY,
+                data TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+            """
+        )
+        # Journaux créés avant les baux : colonnes ajoutées, hôte renseigné pour les URLs existantes.
+        existing = {row[1] for row in self._db.execute("PRAGMA table_info(frontier)")}
+        for name, decl in LEASE_COLUMNS:
+            if name not in existing:
+                self._db.execute(f"ALTER TABLE frontier ADD COLUMN {name} {decl}")
+        self._db.executemany(
+            "UPDATE frontier SET host = ? WHERE url = ?",
+            [(urlparse(url).netloc, url) for (url,) in self._db.execute("SELECT url FROM frontier WHERE host = ''")],
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS frontier_lease ON frontier (state, lease_until)")
+        self._db.commit()
+
+    def _write(self, sql: str, params=()):
+        with self._lock:
+            self._db.execute(sql, params)
+            self._uncommitted += 1
+            if self._uncommitted >= self.batch_size:
+                self._db.commit()
+                self._uncommitted = 0
+
+    def flush(self):
+        with self._lock:
+            self._db.commit()
+            self._uncommitted = 0
+
+    def set_meta(self, key: str, value: str):
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, value))
+            self._db.commit()
+
+    def get_meta(self, key: str, default: str = "") -> str:
+        with self._lock:
+            row = self._db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def add_urls(self, urls: list[str]):
+        """Ajoute les nouvelles URLs en `pending` (celles déjà connues gardent leur état)."""
+        now = time.time()
+        with self._lock:
+            start = self._db.execute("SELECT COALESCE(MAX(position), -1) + 1 FROM frontier").fetchone()[0]
+            self._db.executemany(
+                "INSERT OR IGNORE INTO frontier (url, position, updated_at, host) VALUES (?, ?, ?, ?)",
+                ((url, start + i, now, urlparse(url).netloc) for i, url in enumerate(urls)),
+            )
+            self._db.commit()
+
+    def urls(self, *states: str) -> list[str]:
+        states = states or URL_STATES
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT url FROM frontier WHERE state IN ({','.join('?' * len(states))}) ORDER BY position",
+                states,
+            ).fetchall()
+        return [url for (url,) in rows]
+
+    def scraped(self, urls) -> bool | None:
+        """Une des formes `urls` d'une fiche est-elle `done`/`skipped` ? None si le journal n'en
+        connaît aucune (elle a pu être traitée avec un autre journal)."""
+        urls = list(urls)
+        with self._lock:
+            states = [state for (state,) in self._db.execute(
+                f"SELECT state FROM frontier WHERE url IN ({','.join('?' * len(urls))})", urls
+            )]
+        if not states:
+            return None
+        return any(state in ("done", "skipped") for state in states)
+
+    def todo(self, urls: list[str]) -> list[str]:
+        """URLs de `urls` encore à traiter (ni `done` ni `skipped`)."""
+        with self._lock:
+            finished = {
+                url for (url,) in self._db.execute("SELECT url FROM frontier WHERE state IN ('done', 'skipped')")
+            }
+        return [url for url in urls if url not in finished]
+
+    def mark_done(self, url: str, row: dict):
+        self._write("INSERT OR REPLACE INTO rows VALUES (?, ?)", (url, json.dumps(row, ensure_ascii=False)))
+        self._mark(url, "done", "")
+
+    def mark_failed(self, url: str, error: str):
+        self._mark(url, "failed", error)
+
+    def mark_skipped(self, url: str, reason: str):
+        self._mark(url, "skipped", reason)
+
+    def _mark(self, url: str, state: str, error: str):
+        self._write(
+            "UPDATE frontier SET state = ?, error = ?, attempts = attempts + 1, updated_at = ?, "
+            "lease_owner = '', lease_until = 0 WHERE url = ?",
+            (state, error[:500], time.time(), url),
+        )
+
+    def lease(self, owner: str, n: int, lease_s: float, host_cap: int = 0) -> list[str]:
+        """Loue à `owner` jusqu'à `n` URLs `pending` libres (jamais louées ou bail expiré), dans
+        l'ordre de la frontière. Avec `host_cap`, un hôte n'a jamais plus de `host_cap` URLs
+        louées en même temps, tous workers confondus."""
+        now = time.time()
+        with self._lock:
+            self._db.commit()
+            self._uncommitted = 0
+            # BEGIN IMMEDIATE : deux workers ne peuvent pas choisir les mêmes URLs.
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                leased = Counter(dict(self._db.execute(
+                    "SELECT host, COUNT(*) FROM frontier WHERE state = 'pending' AND lease_until > ? GROUP BY host",
+                    (now,),
+                )))
+                picked = []
+                free = self._db.execute(
+                    "SELECT url, host FROM frontier WHERE state = 'pending' AND lease_until <= ? ORDER BY position",
+                    (now,),
+                )
+                for url, host in free:
+                    if host_cap and leased[host] >= host_cap:
+                        continue
+                    leased[host] += 1
+                    picked.append(url)
+                    if len(picked) >= n:
+                        break
+                self._db.executemany(
+                    "UPDATE frontier SET lease_owner = ?, lease_until = ? WHERE url = ?",
+                    ((owner, now + lease_s, url) for url in picked),
+                )
+                self._db.commit()
+            except BaseException:
+                self._db.rollback()
+                raise
+        return picked
+
+    def renew(self, owner: str, lease_s: float) -> None:
+        """Prolonge les baux des URLs encore en cours chez `owner` (à appeler bien avant leur fin)."""
+        with self._lock:
+            self._db.execute(
+                "UPDATE frontier SET lease_until = ? WHERE lease_owner = ? AND state = 'pending'",
+                (time.time() + lease_s, owner),
+            )
+            self._db.commit()
+            self._uncommitted = 0
+
+    def release(self, owner: str) -> None:
+        """Rend aussitôt les URLs non terminées de `owner` (arrêt propre d'un worker)."""
+        with self._lock:
+            self._db.execute(
+                "UPDATE frontier SET lease_owner = '', lease_until = 0 WHERE lease_owner = ? AND state = 'pending'",
+                (owner,),
+            )
+            self._db.commit()
+            self._uncommitted = 0
+
+    def requeue_failed(self) -> int:
+        """Remet les URLs `failed` en `pending` (pour les workers) ; renvoie leur nombre."""
+        with self._lock:
+            count = self._db.execute(
+                "UPDATE frontier SET state = 'pending', lease_owner = '', lease_until = 0 WHERE state = 'failed'"
+            ).rowcount
+            self._db.commit()
+        return count
+
+    def leases(self) -> dict[str, int]:
+        """URLs en cours par worker (baux non expirés)."""
+        with self._lock:
+            return dict(self._db.execute(
+                "SELECT lease_owner, COUNT(*) FROM frontier WHERE state = 'pending' AND lease_until > ? "
+                "GROUP BY lease_owner",
+                (time.time(),),
+            ).fetchall())
+
+    def rows(self) -> list[dict]:
+        """Fiches extraites, dans l'ordre de la frontière."""
+        self.flush()
+        with self._lock:
+            data = self._db.execute(
+                "SELECT r.data FROM rows r JOIN frontier f ON f.url = r.url ORDER BY f.position"
+            ).fetchall()
+        return [json.loads(d) for (d,) in data]
+
+    def iter_rows(self, batch_size: int = 1000):
+        """Comme `rows()`, mais lu par lots : mémoire constante pour les gros exports."""
+        self.flush()
+        last = None
+        while True:
+            with self._lock:
+                chunk = self._db.execute(
+                    "SELECT f.position, r.data FROM rows r JOIN frontier f ON f.url = r.url "
+                    "WHERE ? IS NULL OR f.position > ? ORDER BY f.position LIMIT ?",
+                    (last, last, batch_size),
+                ).fetchall()
+            if not chunk:
+                return
+            for _, data in chunk:
+                yield json.loads(data)
+            last = chunk[-1][0]
+
+    def counts(self) -> dict[str, int]:
+        self.flush()
+        with self._lock:
+            found = dict(self._db.execute("SELECT state, COUNT(*) FROM frontier GROUP BY state").fetchall())
+        return {state: found.get(state, 0) for state in URL_STATES}
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            self._db.close()
+
+
+# -------------------- Re-scrape incrémental --------------------
+
+DEFAULT_FINGERPRINTS_PATH = "crapy_fingerprints.sqlite"
+GONE_STATUSES = (404, 410)
+
+
+def row_fingerprint(row: dict) -> str:
+    """Empreinte des champs extraits (hors URL) : deux fiches identiques ont la même empreinte."""
+    payload = json.dumps([row.get(k, "") for k in PRODUCT_FIELDS if k != "url"], ensure_ascii=False)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def validators(headers: dict | None) -> tuple[str, str]:
+    """(ETag, Last-Modified) d'une réponse, chaînes vides si absents."""
+    headers = {k.lower(): v for k, v in (headers or {}).items()}
+    return headers.get("etag", ""), headers.get("last-modified", "")
+
+
+class FingerprintStore:
+    """Empreintes des fiches d'un run à l'autre, en SQLite : hash des champs extraits, ETag et
+    Last-Modified par URL produit.
+
+    Chaque ouverture démarre un run. Les pages inchangées (304, ou même empreinte) sont
+    comptées mais pas ré-exportées ; `finish_run` marque comme retirées les fiches connues
+    qui n'ont pas été revues, pour un export limité au delta (new / changed / removed).
+    """
+
+    def __init__(self, path: str, batch_size: int = 100):
+        self.path = path
+        self.batch_size = max(1, batch_size)
+        self._uncommitted = 0
+        self._lock = threading.Lock()
+        self._hosts: set[str] = set()
+        self._gone: set[str] = set()
+        self.stats: Counter = Counter()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS products (
+                url TEXT PRIMARY KEY,
+                hash TEXT NOT NULL,
+                etag TEXT NOT NULL DEFAULT '',
+                last_modified TEXT NOT NULL DEFAULT '',
+                data TEXT NOT NULL,
+                first_run INTEGER NOT NULL,
+                changed_run INTEGER NOT NULL,
+                seen_run INTEGER NOT NULL,
+                removed_run INTEGER
+            );
+            CREATE TABLE IF NOT EXISTS runs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                started_at REAL NOT NULL,
+                finished_at REAL
+            );
+            """
+        )
+        self.run = self._db.execute("INSERT INTO runs (started_at) VALUES (?)", (time.time(),)).lastrowid
+        self._db.commit()
+
+    def _write(self, sql: str, params=()):
+        with self._lock:
+            self._db.execute(sql, params)
+            self._uncommitted += 1
+            if self._uncommitted >= self.batch_size:
+                self._db.commit()
+                self._uncommitted = 0
+
+    def flush(self):
+        with self._lock:
+            self._db.commit()
+            self._uncommitted = 0
+
+    def see(self, urls: list[str]):
+        """URLs listées pendant ce run : elles ne seront pas comptées comme retirées."""
+        self._hosts.update(urlparse(url).netloc for url in urls)
+        with self._lock:
+            self._db.executemany(
+                "UPDATE products SET seen_run = ? WHERE url = ?", ((self.run, url) for url in urls)
+            )
+            self._db.commit()
+
+    def conditional_headers(self, url: str) -> dict:
+        """En-têtes If-None-Match / If-Modified-Since pour une fiche déjà connue."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT etag, last_modified FROM products WHERE url = ? AND removed_run IS NULL", (url,)
+            ).fetchone()
+        if not row:
+            return {}
+        headers = {}
+        if row[0]:
+            headers["If-None-Match"] = row[0]
+        if row[1]:
+            headers["If-Modified-Since"] = row[1]
+        return headers
+
+    def known(self, urls) -> bool:
+        """Une des formes `urls` d'une fiche a-t-elle déjà été enregistrée (même retirée depuis) ?"""
+        urls = list(urls)
+        with self._lock:
+            return self._db.execute(
+                f"SELECT 1 FROM products WHERE url IN ({','.join('?' * len(urls))}) LIMIT 1", urls
+            ).fetchone() is not None
+
+    def not_modified(self, url: str):
+        """Réponse 304 : la fiche stockée reste valable."""
+        self.stats["not-modified"] += 1
+
+    def gone(self, url: str):
+        """404/410 sur une fiche connue : elle sera exportée comme retirée en fin de run."""
+        self._gone.add(url)
+
+    def update(self, url: str, row: dict, etag: str = "", last_modified: str = "") -> str | None:
+        """Enregistre la fiche ; renvoie "new", "changed", ou None si elle n'a pas changé."""
+        digest = row_fingerprint(row)
+        with self._lock:
+            known = self._db.execute(
+                "SELECT hash, removed_run FROM products WHERE url = ?", (url,)
+            ).fetchone()
+        if known and known[0] == digest and known[1] is None:
+            self._write(
+                "UPDATE products SET etag = COALESCE(NULLIF(?, ''), etag), "
+                "last_modified = COALESCE(NULLIF(?, ''), last_modified), seen_run = ? WHERE url = ?",
+                (etag, last_modified, self.run, url),
+            )
+            self.stats["unchanged"] += 1
+            return None
+        change = "changed" if known and known[1] is None else "new"
+        self._write(
+            "INSERT INTO products (url, hash, etag, last_modified, data, first_run, changed_run, seen_run) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT (url) DO UPDATE SET hash = excluded.hash, "
+            "etag = COALESCE(NULLIF(excluded.etag, ''), products.etag), "
+            "last_modified = COALESCE(NULLIF(excluded.last_modified, ''), products.last_modified), "
+            "data = excluded.data, "
+            "changed_run = excluded.changed_run, seen_run = excluded.seen_run, removed_run = NULL"
+            + (", first_run = excluded.first_run" if change == "new" else ""),
+            (url, digest, etag, last_modified, json.dumps(row, ensure_ascii=False),
+             self.run, self.run, self.run),
+        )
+        self.stats[change] += 1
+        return change
+
+    def finish_run(self, rules: UrlRules | str | None = None) -> list[dict]:
+        """Clôt le run : les fiches actives non revues (sur les hôtes parcourus, retenues par les
+        `rules` du crawl) ou disparues (404/410) passent en retirées. Renvoie leurs dernières données.
+
+        À n'appeler qu'après un parcours complet du catalogue, sinon tout ce qui n'a pas été
+        listé serait compté comme retiré."""
+        rules = UrlRules.of(rules)
+        self.flush()
+        with self._lock:
+            rows = self._db.execute("SELECT url, seen_run FROM products WHERE removed_run IS NULL").fetchall()
+            removed = [
+                json.loads(self._db.execute("SELECT data FROM products WHERE url = ?", (url,)).fetchone()[0])
+                for url, seen in rows
+                if (url in self._gone or (seen < self.run and urlparse(url).netloc in self._hosts))
+                and rules.match(url)
+            ]
+        with self._lock:
+            self._db.executemany(
+                "UPDATE products SET removed_run = ?, changed_run = ? WHERE url = ?",
+                ((self.run, self.run, row["url"]) for row in removed),
+            )
+            self._db.execute("UPDATE runs SET finished_at = ? WHERE id = ?", (time.time(), self.run))
+            self._db.commit()
+        self.stats["removed"] += len(removed)
+        return removed
+
+    def summary(self) -> str:
+        return ", ".join(
+            f"{k}={self.stats[k]}" for k in ("new", "changed", "unchanged", "not-modified", "removed")
+        )
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            self._db.close()
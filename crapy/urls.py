@@ -0,0 +1,353 @@
+"""URLs : résolution des liens, règles include/exclude, forme canonique et URLs déjà vues."""
+
+import bisect
+import hashlib
+import math
+import mmap
+import os
+import re
+import struct
+from urllib.parse import unquote_plus, urljoin, urlparse, urlsplit, urlunsplit
+
+from .util import replace_file
+
+
+def same_domain(a: str, b: str) -> bool:
+    pa, pb = urlparse(a), urlparse(b)
+    return (pa.scheme, pa.netloc) == (pb.scheme, pb.netloc)
+
+
+def extract_all_hrefs(html: str) -> list[str]:
+    # Extrait tous les href="..." (relatifs ou absolus)
+    return re.findall(r'href\s*=\s*["\']([^"\']+)["\']', html, flags=re.IGNORECASE)
+
+
+async def hrefs_to_absolute(page, hrefs: list[str], base_url: str | None = None) -> list[str]:
+    cleaned = []
+    for h in hrefs:
+        if not h:
+            continue
+        h = h.strip()
+        if h.startswith(("javascript:", "mailto:", "tel:")):
+            continue
+        cleaned.append(h)
+    if not cleaned:
+        return []
+    # Convertit relatif -> absolu côté navigateur, en une seule évaluation pour toute la page
+    # (base explicite pour une page servie par le cache, sinon l'URL courante de l'onglet).
+    resolved = await page.evaluate(
+        "([hrefs, base]) => hrefs.map((href) => new URL(href, base || window.location.href).href)",
+        [cleaned, base_url],
+    )
+    return [absu.split("#")[0] for absu in resolved]
+
+
+_BASE_HREF_RE = re.compile(r'<base\b[^>]*?\bhref\s*=\s*["\']([^"\']+)["\']', re.IGNORECASE)
+
+
+def document_base(html: str, url: str) -> str:
+    """URL de base du document, comme `document.baseURI` : le premier `<base href>` résolu sur
+    l'URL de la page, sinon l'URL elle-même."""
+    m = _BASE_HREF_RE.search(html or "")
+    return urljoin(url, m.group(1).strip()) if m else url
+
+
+def resolve_hrefs_offline(hrefs: list[str], base_url: str) -> list[str]:
+    """Équivalent Python (urljoin) de `hrefs_to_absolute`, pour les pages rejouées sans navigateur."""
+    abs_links = []
+    for h in hrefs:
+        if not h:
+            continue
+        h = h.strip()
+        if h.startswith(("javascript:", "mailto:", "tel:")):
+            continue
+        abs_links.append(urljoin(base_url, h).split("#")[0])
+    return abs_links
+
+
+def normalize_url(url: str) -> str:
+    """Clé de cache : schéma/hôte en minuscules, port par défaut et fragment retirés."""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    port = parts.port
+    if port and (scheme, port) not in (("http", 80), ("https", 443)):
+        host = f"{host}:{port}"
+    return urlunsplit((scheme, host, parts.path or "/", parts.query, ""))
+
+
+def filter_by_prefix(urls: list[str], prefix: str, only_same_domain: bool, base_url: str) -> list[str]:
+    return select_urls(urls, UrlRules.of(prefix), base_url=base_url if only_same_domain else "")
+
+
+# Paramètres de suivi retirés des URLs (globs sur le nom, sans tenir compte de la casse).
+DEFAULT_STRIP_PARAMS = (
+    "utm_*", "gclid", "gbraid", "wbraid", "dclid", "fbclid", "msclkid", "yclid", "mc_cid", "mc_eid",
+    "_ga", "_gl", "igshid", "srsltid",
+)
+PCT_ESCAPE_RE = re.compile(r"%[0-9a-fA-F]{2}")
+
+
+def glob_regex(glob: str) -> str:
+    """Glob d'URL en regex : `*` = n'importe quelle suite de caractères, le reste est littéral
+    (`?` et `[` sont fréquents dans les URLs)."""
+    return ".*".join(re.escape(part) for part in glob.split("*"))
+
+
+def parse_url_rule(rule: str) -> tuple[str, str]:
+    """("prefix" | "glob" | "re", motif) : `re:…` regex (recherchée n'importe où), `glob:…` ou motif
+    contenant `*` glob (URL entière), `prefix:…` ou autre préfixe (commence par)."""
+    for kind in ("re", "glob", "prefix"):
+        if rule.startswith(kind + ":"):
+            return kind, rule[len(kind) + 1:]
+    return ("glob" if "*" in rule else "prefix"), rule
+
+
+class UrlRules:
+    """Règles include/exclude sur les URLs produits : une URL est retenue si aucune règle
+    `exclude` ne la vérifie et au moins une `include` (toutes si aucune). Préfixes triés
+    (recherche dichotomique), globs et regex réunis en une seule expression."""
+
+    def __init__(self, include=(), exclude=()):
+        self.include = [rule for rule in include if rule]
+        self.exclude = [rule for rule in exclude if rule]
+        self._include = self.compile(self.include)
+        self._exclude = self.compile(self.exclude)
+
+    @classmethod
+    def of(cls, rules) -> "UrlRules":
+        """Règles telles quelles, ou un simple préfixe (ancienne API `prefix: str`)."""
+        if isinstance(rules, UrlRules):
+            return rules
+        return cls([rules] if rules else [])
+
+    @staticmethod
+    def compile(rules: list[str]) -> tuple:
+        prefixes, patterns = [], []
+        for rule in rules:
+            kind, value = parse_url_rule(rule)
+            if kind == "prefix":
+                prefixes.append(value)
+                continue
+            pattern = f"^{glob_regex(value)}\\Z" if kind == "glob" else value
+            try:
+                re.compile(pattern)
+            except re.error as e:
+                raise ValueError(f"règle d'URL invalide {rule!r}: {e}") from None
+            patterns.append(pattern)
+        reduced = []
+        for prefix in sorted(set(prefixes)):
+            if not reduced or not prefix.startswith(reduced[-1]):
+                reduced.append(prefix)
+        try:
+            regexes = [re.compile("|".join(f"(?:{p})" for p in patterns))] if patterns else []
+        except re.error:
+            # Drapeaux globaux (`(?i)…`) : interdits au milieu d'une expression combinée.
+            regexes = [re.compile(p) for p in patterns]
+        return reduced, regexes
+
+    @staticmethod
+    def matches(compiled: tuple, url: str) -> bool:
+        prefixes, regexes = compiled
+        i = bisect.bisect_right(prefixes, url)
+        if i and url.startswith(prefixes[i - 1]):
+            return True
+        return any(regex.search(url) for regex in regexes)
+
+    def match(self, url: str) -> bool:
+        if self.exclude and self.matches(self._exclude, url):
+            return False
+        return not self.include or self.matches(self._include, url)
+
+    @property
+    def prefixes(self) -> list[str]:
+        """Préfixes couvrant les règles `include` (début littéral des globs compris), pour compter
+        les liens produits dans la page ; vide si une regex peut retenir n'importe quelle URL."""
+        heads = []
+        for rule in self.include:
+            kind, value = parse_url_rule(rule)
+            if kind == "re" or (kind == "glob" and not value.split("*")[0]):
+                return []
+            heads.append(value.split("*")[0])
+        return sorted(set(heads))
+
+    def __str__(self) -> str:
+        parts = [" | ".join(self.include) or "*"]
+        if self.exclude:
+            parts.append("sauf " + " | ".join(self.exclude))
+        return " ".join(parts)
+
+
+class UrlCanonicalizer:
+    """Forme canonique des URLs produits, pour ne pas visiter deux fois la même fiche.
+
+    `canonical` normalise schéma, hôte, échappements et paramètres (suivi retiré, tri) ; `key`,
+    la clé de déduplication, ignore en plus le `/` final. La casse du chemin n'est ignorée qu'avec
+    `fold_case` : beaucoup de serveurs la distinguent."""
+
+    def __init__(self, strip_params=DEFAULT_STRIP_PARAMS, sort_query: bool = True,
+                 fold_slash: bool = True, fold_case: bool = False):
+        self.strip_params = tuple(p for p in strip_params if p)
+        self.sort_query = sort_query
+        self.fold_slash = fold_slash
+        self.fold_case = fold_case
+        self._strip = (
+            re.compile("|".join(glob_regex(p) for p in self.strip_params), re.IGNORECASE)
+            if self.strip_params else None
+        )
+
+    def split(self, url: str) -> tuple[str, str]:
+        """(URL canonique, clé de déduplication)."""
+        url = url.strip()
+        try:
+            parts = urlsplit(url)
+            port = parts.port
+        except ValueError:
+            return url, url
+        scheme = parts.scheme.lower()
+        host = (parts.hostname or "").rstrip(".")
+        if not host.isascii():
+            try:
+                host = host.encode("idna").decode("ascii")
+            except UnicodeError:
+                pass
+        if ":" in host:
+            host = f"[{host}]"
+        if port and (scheme, port) not in (("http", 80), ("https", 443)):
+            host = f"{host}:{port}"
+        userinfo = parts.netloc.rpartition("@")[0]
+        netloc = f"{userinfo}@{host}" if userinfo else host
+        path = PCT_ESCAPE_RE.sub(lambda m: m.group(0).upper(), parts.path or "/")
+        params = [
+            p for p in parts.query.split("&")
+            if p and not (self._strip and self._strip.fullmatch(unquote_plus(p.partition("=")[0])))
+        ]
+        if self.sort_query:
+            # Tri stable sur le nom : l'ordre des valeurs d'un paramètre répété est conservé.
+            params.sort(key=lambda p: p.partition("=")[0])
+        query = PCT_ESCAPE_RE.sub(lambda m: m.group(0).upper(), "&".join(params))
+        canonical = urlunsplit((scheme, netloc, path, query, ""))
+        if self.fold_slash and len(path) > 1:
+            path = path.rstrip("/") or "/"
+        if self.fold_case:
+            path = path.lower()
+        return canonical, urlunsplit((scheme, netloc, path, query, ""))
+
+    def canonical(self, url: str) -> str:
+        return self.split(url)[0]
+
+    def key(self, url: str) -> str:
+        return self.split(url)[1]
+
+    def variants(self, url: str) -> set[str] | None:
+        """Formes canoniques de même clé (avec ou sans `/` final), pour retrouver une URL déjà
+        enregistrée sous l'une d'elles ; None si elles ne sont pas énumérables (`fold_case`)."""
+        if self.fold_case:
+            return None
+        canonical, key = self.split(url)
+        forms = {canonical, key}
+        if self.fold_slash:
+            parts = urlsplit(key)
+            if parts.path != "/":
+                forms.add(urlunsplit(parts._replace(path=parts.path + "/")))
+        return forms
+
+
+def select_urls(
+    urls, rules: UrlRules | None = None, canonicalizer: UrlCanonicalizer | None = None,
+    keys: set | None = None, base_url: str = "",
+) -> list[str]:
+    """URLs retenues, dans l'ordre : canonisées, sur le domaine de `base_url` s'il est donné,
+    conformes aux `rules`, une seule fois par clé (`keys`, complété au passage)."""
+    keys = set() if keys is None else keys
+    if canonicalizer and base_url:
+        base_url = canonicalizer.canonical(base_url)
+    base = urlparse(base_url)[:2] if base_url else None  # (schéma, hôte), comme same_domain
+    out = []
+    for url in urls:
+        key = url
+        if canonicalizer:
+            url, key = canonicalizer.split(url)
+        if base and urlparse(url)[:2] != base:
+            continue
+        if rules is not None and not rules.match(url):
+            continue
+        if key not in keys:
+            keys.add(key)
+            out.append(url)
+    return out
+
+
+DEFAULT_SEEN_PATH = "crapy_seen.bloom"
+DEFAULT_SEEN_CAPACITY = 10_000_000
+DEFAULT_SEEN_ERROR = 0.001
+SEEN_MAGIC = b"CRAPYBF1"
+SEEN_HEADER = struct.Struct("<8sQIQQ")  # magic, bits, nb de hachages, capacité, URLs ajoutées
+
+
+class SeenSet:
+    """URLs déjà scrapées, d'un run à l'autre : filtre de Bloom de taille fixe (`capacity`,
+    `error_rate`) dans un fichier projeté en mémoire. Faux positifs possibles (≈ `error_rate`),
+    jamais de faux négatif ; un seul process écrit dans le fichier."""
+
+    def __init__(self, path: str, capacity: int = DEFAULT_SEEN_CAPACITY, error_rate: float = DEFAULT_SEEN_ERROR):
+        self.path = path
+        if not os.path.exists(path) or not os.path.getsize(path):
+            capacity = max(1, capacity)
+            bits = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+            bits = max(64, -(-bits // 8) * 8)
+            hashes = max(1, round(bits / capacity * math.log(2)))
+
+            def write(f):
+                f.write(SEEN_HEADER.pack(SEEN_MAGIC, bits, hashes, capacity, 0))
+                f.truncate(SEEN_HEADER.size + bits // 8)  # fichier creux : rien n'est écrit d'avance
+
+            replace_file(path, write, binary=True)
+        self._file = open(path, "r+b")
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        magic, self.bits, self.hashes, self.capacity, self.count = SEEN_HEADER.unpack_from(self._map)
+        if magic != SEEN_MAGIC or len(self._map) != SEEN_HEADER.size + self.bits // 8:
+            self.close(flush=False)
+            raise ValueError(f"{path}: ce n'est pas un fichier d'URLs vues crapy")
+
+    def _offsets(self, key: str):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hashes):
+            bit = (h1 + i * h2) % self.bits
+            yield SEEN_HEADER.size + (bit >> 3), 1 << (bit & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._map[offset] & mask for offset, mask in self._offsets(key))
+
+    def add(self, key: str) -> bool:
+        """Ajoute la clé ; True si elle n'était pas (selon le filtre) déjà présente."""
+        added = False
+        for offset, mask in self._offsets(key):
+            byte = self._map[offset]
+            if not byte & mask:
+                self._map[offset] = byte | mask
+                added = True
+        self.count += added
+        return added
+
+    def error_estimate(self) -> float:
+        """Probabilité actuelle de prendre une URL nouvelle pour déjà vue."""
+        return (1 - math.exp(-self.hashes * self.count / self.bits)) ** self.hashes
+
+    def summary(self) -> str:
+        text = f"{self.count} URL(s) vue(s), faux positifs ≈ {self.error_estimate():.2%}"
+        if self.count > self.capacity:
+            text += f" ⚠️ capacité {self.capacity} dépassée (recréer le fichier plus grand)"
+        return text
+
+    def flush(self) -> None:
+        SEEN_HEADER.pack_into(self._map, 0, SEEN_MAGIC, self.bits, self.hashes, self.capacity, self.count)
+        self._map.flush()
+
+    def close(self, flush: bool = True) -> None:
+        if flush:
+            self.flush()
+        self._map.close()
+        self._file.close()
@@ -0,0 +1,82 @@
+"""Fichiers partagés (écriture atomique, verrou, JSON) et journalisation sur stderr."""
+
+import json
+import os
+import sys
+import tempfile
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+# Droits d'un fichier neuf selon l'umask (mkstemp crée en 0600), lus une fois au chargement.
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def replace_file(path: str, write, binary: bool = False) -> None:
+    """Écriture atomique de `path` : `write(f)` remplit un fichier temporaire unique du même
+    dossier, qui remplace ensuite `path`. Deux process (workers) qui écrivent le même chemin ne
+    partagent jamais leur fichier temporaire ; le dernier `os.replace` l'emporte."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") if binary else os.fdopen(fd, "w", encoding="utf-8") as f:
+            write(f)
+        mode = os.stat(path).st_mode & 0o777 if os.path.exists(path) else 0o666 & ~_UMASK
+        os.chmod(tmp, mode)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def write_json_file(path: str, data, **kwargs) -> None:
+    replace_file(path, lambda f: json.dump(data, f, ensure_ascii=False, indent=2, **kwargs))
+
+
+@contextmanager
+def file_lock(path: str):
+    """Verrou exclusif entre process sur `<path>.lock` (flock, ou msvcrt sous Windows) : pour
+    relire puis réécrire un fichier partagé par plusieurs workers sans perdre leurs écritures."""
+    with open(f"{path}.lock", "a+b") as f:
+        if fcntl:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            while True:
+                try:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:  # LK_LOCK abandonne après ~10 s d'attente
+                    continue
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def read_json_file(path: str | None, default):
+    """Contenu JSON de `path`, ou `default` s'il est absent ou illisible."""
+    if not path or not os.path.exists(path):
+        return default
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def log_stderr(msg: str):
+    print(msg, file=sys.stderr, flush=True)
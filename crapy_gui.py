@@ -0,0 +1,604 @@
+"""Interface graphique de crapy (Tkinter), chargée par `python -m crapy` sans sous-commande :
+les commandes sans interface (crawl, replay, export, worker, coordinator) tournent sur des
+hôtes sans Tk."""
+import threading
+import time
+from collections import deque
+
+import tkinter as tk
+from tkinter import ttk, filedialog, messagebox
+
+from crapy import (
+    DEFAULT_CACHE_PATH,
+    DEFAULT_FETCH_MODES_PATH,
+    DEFAULT_JOURNAL_PATH,
+    DEFAULT_PROFILES_PATH,
+    RESOURCE_PRESETS,
+    BrowserSession,
+    CrawlEngine,
+    CrawlJournal,
+    FetchModes,
+    HtmlCache,
+    HttpClient,
+    ProfileStore,
+    ResourcePolicy,
+    open_sink,
+)
+
+
+# -------------------- GUI --------------------
+
+# Rafraîchissement de l'interface : les threads de travail ne touchent jamais Tk, ils déposent
+# des événements que la boucle Tk dépile par tranches de temps bornées.
+UI_TICK_MS = 50
+UI_SLICE_MS = 15
+LOG_MAX_LINES = 2000
+
+
+class VirtualTable(ttk.Frame):
+    """Tableau virtualisé : les données restent dans une liste Python et seules les lignes
+    visibles existent dans le Treeview, ce qui tient 100k lignes sans ralentir Tk.
+
+    Sélection gérée ici (clic, Ctrl+clic, Maj+clic, Ctrl+A) ; avec `follow`, la vue suit les
+    lignes ajoutées tant qu'elle est en bas."""
+
+    def __init__(self, master, columns, widths: dict, formatter, selectable: bool = False,
+                 follow: bool = False, on_select=None):
+        super().__init__(master)
+        self.formatter = formatter
+        self.selectable = selectable
+        self.follow = follow
+        self.on_select = on_select
+        self.items = []
+        self.selected = set()
+        self.top = 0
+        self.visible = 20
+        self._anchor = None
+
+        self.tree = ttk.Treeview(self, columns=columns, show="headings", selectmode="none")
+        for c in columns:
+            self.tree.heading(c, text=c)
+            self.tree.column(c, width=widths.get(c, 200), anchor="w")
+        self.tree.tag_configure("selected", background="#cfe3ff")
+        self.tree.pack(side="left", fill="both", expand=True)
+        self.scroll = ttk.Scrollbar(self, orient="vertical", command=self._on_scrollbar)
+        self.scroll.pack(side="right", fill="y")
+
+        self.tree.bind("<Configure>", self._on_resize)
+        self.tree.bind("<MouseWheel>", lambda e: self.scroll_by(-3 if e.delta > 0 else 3))
+        self.tree.bind("<Button-4>", lambda e: self.scroll_by(-3))
+        self.tree.bind("<Button-5>", lambda e: self.scroll_by(3))
+        if selectable:
+            self.tree.bind("<Button-1>", self._on_click)
+            self.tree.bind("<Control-a>", lambda e: self.select_all())
+
+    def __len__(self):
+        return len(self.items)
+
+    def set_items(self, items):
+        self.items = list(items)
+        self.selected.clear()
+        self._anchor = None
+        self.top = 0
+        self.refresh()
+
+    def extend(self, items):
+        at_bottom = self.top + self.visible >= len(self.items)
+        self.items.extend(items)
+        if self.follow and at_bottom:
+            self.top = max(0, len(self.items) - self.visible)
+        self.refresh()
+
+    def select_all(self):
+        self.selected = set(range(len(self.items)))
+        self.refresh()
+        if self.on_select:
+            self.on_select()
+        return "break"
+
+    def selected_items(self) -> list:
+        return [self.items[i] for i in sorted(self.selected)]
+
+    def scroll_by(self, rows: int):
+        self.top = max(0, min(self.top + rows, len(self.items) - self.visible))
+        self.refresh()
+        return "break"
+
+    def refresh(self):
+        self.top = max(0, min(self.top, len(self.items) - self.visible))
+        end = min(len(self.items), self.top + self.visible)
+        self.tree.delete(*self.tree.get_children())
+        for i in range(self.top, end):
+            self.tree.insert(
+                "", "end", iid=str(i), values=self.formatter(self.items[i]),
+                tags=("selected",) if i in self.selected else (),
+            )
+        n = len(self.items)
+        self.scroll.set(self.top / n if n else 0.0, end / n if n else 1.0)
+
+    def _on_resize(self, event):
+        row_height = int(ttk.Style().lookup("Treeview", "rowheight") or 20)
+        # Une ligne de moins pour l'en-tête des colonnes.
+        visible = max(1, event.height // row_height - 1)
+        if visible != self.visible:
+            self.visible = visible
+            self.refresh()
+
+    def _on_scrollbar(self, *args):
+        if args[0] == "moveto":
+            self.top = int(float(args[1]) * len(self.items))
+        elif args[0] == "scroll":
+            step = self.visible if args[2] == "pages" else 1
+            self.top += int(args[1]) * step
+        self.refresh()
+
+    def _on_click(self, event):
+        if self.tree.identify_region(event.x, event.y) not in ("cell", "tree"):
+            return None
+        iid = self.tree.identify_row(event.y)
+        if not iid:
+            return "break"
+        i = int(iid)
+        if event.state & 0x0001 and self._anchor is not None:  # Maj : plage depuis l'ancre
+            lo, hi = sorted((self._anchor, i))
+            self.selected |= set(range(lo, hi + 1))
+        elif event.state & 0x0004:  # Ctrl : bascule
+            self.selected ^= {i}
+            self._anchor = i
+        else:
+            self.selected = {i}
+            self._anchor = i
+        self.tree.focus_set()
+        self.refresh()
+        if self.on_select:
+            self.on_select()
+        return "break"
+
+
+def result_columns(r: dict) -> tuple:
+    desc = r.get("description", "") or ""
+    short = (desc[:160] + "…") if len(desc) > 160 else desc
+    return (r.get("url", ""), r.get("title", ""), r.get("image", ""), r.get("images", ""), short)
+
+
+class App(tk.Tk):
+    def __init__(self):
+        super().__init__()
+        self.title("Scraper — 2 étapes (HTML hrefs → URLs → Fiches) [Playwright]")
+        self.geometry("1320x860")
+
+        self.product_urls = []
+        self.results = []
+        self.cache = None
+        self.journal = None
+        self.resumed_results = []
+        # Gardés entre deux clics : connexions keep-alive et modes appris par domaine.
+        self.http_client = HttpClient()
+        self.fetch_modes = FetchModes(DEFAULT_FETCH_MODES_PATH)
+        self.profiles = ProfileStore(DEFAULT_PROFILES_PATH)
+        # Chromium lancé au premier clic puis partagé par « Récupérer » et « Scraper ».
+        self.session = BrowserSession()
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+        # Files remplies par les threads de travail, vidées par `drain_events` dans la boucle Tk.
+        self._events = deque()
+        self._log_lines = deque(maxlen=LOG_MAX_LINES)
+        self._log_lock = threading.Lock()
+        self._dropped_lines = 0
+        self._new_rows = deque()
+
+        frm = ttk.Frame(self, padding=10)
+        frm.pack(fill="x")
+
+        ttk.Label(frm, text="URL catégorie (listing)").grid(row=0, column=0, sticky="w")
+        self.listing_var = tk.StringVar(
+            value="https://www.king-jouet.com/jeux-jouets/jeux-exterieur/jeux-outils-jardinage/page1.htm"
+        )
+        ttk.Entry(frm, textvariable=self.listing_var, width=120).grid(row=0, column=1, columnspan=7, sticky="we", padx=6)
+
+        ttk.Label(frm, text="Préfixe URL produit (commence par)").grid(row=1, column=0, sticky="w", pady=(8, 0))
+        self.prefix_var = tk.StringVar(value="https://www.king-jouet.com/jeu-jouet/")
+        ttk.Entry(frm, textvariable=self.prefix_var, width=70).grid(row=1, column=1, sticky="w", padx=6, pady=(8, 0))
+        ttk.Label(frm, text="(mets un préfixe précis si tu veux une sous-catégorie)").grid(row=1, column=2, sticky="w", pady=(8, 0), columnspan=4)
+
+        ttk.Label(frm, text="Timeout (s)").grid(row=2, column=0, sticky="w", pady=(8, 0))
+        self.timeout_var = tk.StringVar(value="70")
+        ttk.Entry(frm, textvariable=self.timeout_var, width=8).grid(row=2, column=1, sticky="w", padx=6, pady=(8, 0))
+
+        ttk.Label(frm, text="Wait max (ms)").grid(row=2, column=2, sticky="e", pady=(8, 0))
+        self.wait_var = tk.StringVar(value="2500")
+        ttk.Entry(frm, textvariable=self.wait_var, width=10).grid(row=2, column=3, sticky="w", padx=6, pady=(8, 0))
+
+        self.headless_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(frm, text="Headless", variable=self.headless_var).grid(row=2, column=4, sticky="w", pady=(8, 0))
+
+        self.same_domain_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(frm, text="Même domaine", variable=self.same_domain_var).grid(row=2, column=5, sticky="w", pady=(8, 0))
+
+        ttk.Label(frm, text="Limite scraping").grid(row=2, column=6, sticky="e", pady=(8, 0))
+        self.limit_var = tk.StringVar(value="20")
+        ttk.Entry(frm, textvariable=self.limit_var, width=8).grid(row=2, column=7, sticky="w", padx=6, pady=(8, 0))
+
+        ttk.Label(frm, text="Nb pages listing").grid(row=3, column=0, sticky="w", pady=(8, 0))
+        self.pages_var = tk.StringVar(value="1")
+        ttk.Entry(frm, textvariable=self.pages_var, width=8).grid(row=3, column=1, sticky="w", padx=6, pady=(8, 0))
+
+        ttk.Label(frm, text="Pause départ (ms)").grid(row=3, column=2, sticky="e", pady=(8, 0))
+        self.delay_min_var = tk.StringVar(value="900")
+        self.delay_max_var = tk.StringVar(value="1900")
+        ttk.Entry(frm, textvariable=self.delay_min_var, width=8).grid(row=3, column=3, sticky="w", padx=(6, 2), pady=(8, 0))
+        ttk.Label(frm, text="à").grid(row=3, column=4, sticky="w", pady=(8, 0))
+        ttk.Entry(frm, textvariable=self.delay_max_var, width=8).grid(row=3, column=5, sticky="w", padx=(2, 6), pady=(8, 0))
+
+        ttk.Label(frm, text="Max req/s").grid(row=3, column=6, sticky="e", pady=(8, 0))
+        self.max_rate_var = tk.StringVar(value="2")
+        ttk.Entry(frm, textvariable=self.max_rate_var, width=8).grid(row=3, column=7, sticky="w", padx=6, pady=(8, 0))
+
+        ttk.Label(frm, text="Pages simultanées").grid(row=4, column=0, sticky="w", pady=(8, 0))
+        self.concurrency_var = tk.StringVar(value="1")
+        ttk.Entry(frm, textvariable=self.concurrency_var, width=8).grid(row=4, column=1, sticky="w", padx=6, pady=(8, 0))
+
+        ttk.Label(frm, text="Max par domaine").grid(row=4, column=2, sticky="e", pady=(8, 0))
+        self.per_host_var = tk.StringVar(value="2")
+        ttk.Entry(frm, textvariable=self.per_host_var, width=8).grid(row=4, column=3, sticky="w", padx=6, pady=(8, 0))
+
+        ttk.Label(frm, text="Process extraction").grid(row=4, column=4, sticky="e", pady=(8, 0))
+        self.parse_workers_var = tk.StringVar(value="0")
+        ttk.Entry(frm, textvariable=self.parse_workers_var, width=8).grid(row=4, column=5, sticky="w", padx=6, pady=(8, 0))
+
+        self.cache_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(frm, text="Cache HTML", variable=self.cache_var).grid(row=4, column=6, sticky="w", pady=(8, 0))
+
+        self.offline_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(frm, text="Hors ligne", variable=self.offline_var).grid(row=4, column=7, sticky="w", pady=(8, 0))
+
+        # Opt-in : le journal est un fichier fixe, et `todo()` y écarterait les fiches déjà
+        # traitées lors d'un run précédent (re-scraper rendrait alors une liste vide).
+        self.journal_var = tk.BooleanVar(value=False)
+        self.journal_check = ttk.Checkbutton(frm, text=f"Journal ({DEFAULT_JOURNAL_PATH})", variable=self.journal_var)
+        self.journal_check.grid(row=5, column=0, columnspan=2, sticky="w", pady=(8, 0))
+
+        ttk.Label(frm, text="Ressources").grid(row=5, column=2, sticky="e", pady=(8, 0))
+        self.resources_var = tk.StringVar(value="full")
+        ttk.Combobox(
+            frm, textvariable=self.resources_var, values=list(RESOURCE_PRESETS), width=10, state="readonly"
+        ).grid(row=5, column=3, sticky="w", padx=6, pady=(8, 0))
+
+        self.http_first_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(frm, text="HTTP d'abord", variable=self.http_first_var).grid(
+            row=5, column=4, columnspan=2, sticky="w", pady=(8, 0)
+        )
+
+        ttk.Label(frm, text="Sortie au fil de l'eau").grid(row=6, column=0, sticky="w", pady=(8, 0))
+        self.output_var = tk.StringVar(value="")
+        ttk.Entry(frm, textvariable=self.output_var, width=70).grid(row=6, column=1, sticky="w", padx=6, pady=(8, 0))
+        ttk.Button(frm, text="Choisir…", command=self.choose_output).grid(row=6, column=2, sticky="w", pady=(8, 0))
+        ttk.Label(frm, text="(.jsonl, .csv, .json ou .parquet ; vide = pas d'écriture pendant le scrape)").grid(
+            row=6, column=3, sticky="w", pady=(8, 0), columnspan=5
+        )
+
+        btns = ttk.Frame(self, padding=(10, 0, 10, 10))
+        btns.pack(fill="x")
+
+        self.get_urls_btn = ttk.Button(btns, text="1) Récupérer URLs produits", command=self.get_urls)
+        self.get_urls_btn.pack(side="left")
+
+        self.scrape_btn = ttk.Button(btns, text="2) Scraper fiches sélectionnées", command=self.scrape_selected, state="disabled")
+        self.scrape_btn.pack(side="left", padx=8)
+
+        self.resume_btn = ttk.Button(btns, text="Reprendre journal", command=self.resume_journal)
+        self.resume_btn.pack(side="left", padx=8)
+
+        ttk.Button(btns, text="Exporter CSV", command=self.export_csv).pack(side="left", padx=8)
+        ttk.Button(btns, text="Exporter JSON", command=self.export_json).pack(side="left")
+
+        self.status_var = tk.StringVar(value="Prêt.")
+        ttk.Label(btns, textvariable=self.status_var).pack(side="right")
+
+        main = ttk.Frame(self, padding=(10, 0, 10, 10))
+        main.pack(fill="both", expand=True)
+
+        left = ttk.LabelFrame(main, text="URLs récupérées (sélection multiple)", padding=10)
+        left.pack(side="left", fill="both", expand=True)
+
+        self.url_view = VirtualTable(
+            left, ("url",), {"url": 560}, lambda u: (u,), selectable=True, on_select=self._update_scrape_button
+        )
+        self.url_view.pack(fill="both", expand=True)
+
+        right = ttk.LabelFrame(main, text="Aperçu résultats (title / image(s) / description)", padding=10)
+        right.pack(side="left", fill="both", expand=True, padx=(10, 0))
+
+        self.results_view = VirtualTable(
+            right,
+            ("url", "title", "image", "images", "description"),
+            {"url": 340, "title": 240, "image": 280, "images": 340, "description": 420},
+            result_columns,
+            follow=True,
+        )
+        self.results_view.pack(fill="both", expand=True)
+
+        logfrm = ttk.LabelFrame(self, text="Logs", padding=10)
+        logfrm.pack(fill="both", expand=False, padx=10, pady=(0, 10))
+        self.log = tk.Text(logfrm, height=10)
+        self.log.pack(fill="both", expand=True)
+
+        self.after(UI_TICK_MS, self.drain_events)
+
+    def log_line(self, msg: str):
+        # Appelable depuis n'importe quel thread ; au-delà de LOG_MAX_LINES en attente, les plus
+        # anciennes sont perdues plutôt que de bloquer le crawl (et comptées pour le signaler).
+        with self._log_lock:
+            if len(self._log_lines) == LOG_MAX_LINES:
+                self._dropped_lines += 1
+            self._log_lines.append(msg)
+
+    def post(self, fn, *args):
+        """Planifie `fn(*args)` dans la boucle Tk (seul point d'entrée des threads de travail)."""
+        self._events.append((fn, args))
+
+    def show_error(self, msg: str):
+        """Affiche `msg` dans une boîte d'erreur hors de `drain_events` : la boîte est modale et
+        bloquerait sinon le vidage des files (logs, fiches) tant qu'elle reste ouverte."""
+        self.after_idle(messagebox.showerror, "Erreur", msg)
+
+    def post_row(self, row: dict):
+        self._new_rows.append(row)
+
+    def drain_events(self):
+        deadline = time.perf_counter() + UI_SLICE_MS / 1000
+        try:
+            while self._events and time.perf_counter() < deadline:
+                fn, args = self._events.popleft()
+                fn(*args)
+            if self._new_rows:
+                rows = [self._new_rows.popleft() for _ in range(len(self._new_rows))]
+                self.results.extend(rows)
+                self.results_view.extend(rows)
+                self.status_var.set(f"Scraping fiches… {len(self.results)}")
+            if self._log_lines:
+                with self._log_lock:
+                    lines = list(self._log_lines)
+                    self._log_lines.clear()
+                    dropped, self._dropped_lines = self._dropped_lines, 0
+                if dropped:
+                    lines.insert(0, f"… {dropped} ligne(s) de log perdue(s) (file pleine)")
+                self.log.insert("end", "\n".join(lines) + "\n")
+                # Anneau : on ne garde que les LOG_MAX_LINES dernières lignes du widget.
+                excess = int(self.log.index("end-1c").split(".")[0]) - 1 - LOG_MAX_LINES
+                if excess > 0:
+                    self.log.delete("1.0", f"{excess + 1}.0")
+                self.log.see("end")
+        finally:
+            self.after(UI_TICK_MS, self.drain_events)
+
+    def _update_scrape_button(self):
+        self.scrape_btn.config(state="normal" if self.url_view.selected else "disabled")
+
+    def set_busy(self, busy: bool):
+        """Verrouille les actions qui lancent un run ou touchent au journal pendant qu'un run tourne."""
+        state = "disabled" if busy else "normal"
+        for widget in (self.get_urls_btn, self.resume_btn, self.journal_check):
+            widget.config(state=state)
+        if busy:
+            self.scrape_btn.config(state="disabled")
+        else:
+            self._update_scrape_button()
+
+    def fill_url_list(self, urls):
+        self.url_view.set_items(urls)
+        self._update_scrape_button()
+
+    def fill_results(self, rows):
+        self.results_view.set_items(rows)
+
+    def on_close(self):
+        self.session.close()
+        self.http_client.close()
+        self.destroy()
+
+    def build_engine(self) -> CrawlEngine:
+        try:
+            timeout_s = int(self.timeout_var.get().strip())
+        except ValueError:
+            timeout_s = 70
+
+        try:
+            wait_ms = int(self.wait_var.get().strip())
+        except ValueError:
+            wait_ms = 2500
+
+        try:
+            delay_min = int(self.delay_min_var.get().strip())
+            delay_max = int(self.delay_max_var.get().strip())
+        except ValueError:
+            delay_min, delay_max = 900, 1900
+
+        try:
+            max_rate = float(self.max_rate_var.get().strip().replace(",", "."))
+        except ValueError:
+            max_rate = 2.0
+
+        try:
+            concurrency = int(self.concurrency_var.get().strip())
+            per_host = int(self.per_host_var.get().strip())
+        except ValueError:
+            concurrency, per_host = 1, 2
+
+        try:
+            parse_workers = int(self.parse_workers_var.get().strip())
+        except ValueError:
+            parse_workers = 0
+
+        offline = bool(self.offline_var.get())
+        if (self.cache_var.get() or offline) and self.cache is None:
+            self.cache = HtmlCache(DEFAULT_CACHE_PATH)
+
+        return CrawlEngine(
+            timeout_s=timeout_s,
+            wait_ms=wait_ms,
+            headless=bool(self.headless_var.get()),
+            delay_min=delay_min,
+            delay_max=delay_max,
+            concurrency=concurrency,
+            per_host=per_host,
+            max_rate=max_rate,
+            parse_workers=parse_workers,
+            cache=self.cache if (self.cache_var.get() or offline) else None,
+            offline=offline,
+            journal=self.open_journal() if self.journal_var.get() else None,
+            resource_policy=ResourcePolicy(self.resources_var.get()),
+            http_client=self.http_client if self.http_first_var.get() else None,
+            fetch_modes=self.fetch_modes,
+            profiles=self.profiles,
+            session=self.session,
+            logger=self.log_line,
+        )
+
+    def open_journal(self) -> CrawlJournal:
+        if self.journal is None:
+            self.journal = CrawlJournal(DEFAULT_JOURNAL_PATH)
+        return self.journal
+
+    def resume_journal(self):
+        """Recharge un crawl interrompu : fiches déjà extraites + URLs restantes (sélectionnées)."""
+        # Reprendre est explicite : le scrape qui suit continue dans le même journal.
+        self.journal_var.set(True)
+        journal = self.open_journal()
+        self.results = self.resumed_results = journal.rows()
+        remaining = journal.urls("pending", "failed")
+        self.fill_results(self.results)
+        self.fill_url_list(remaining)
+        self.url_view.select_all()
+        self.status_var.set(f"Journal: {len(self.results)} fiche(s), {len(remaining)} URL(s) restantes")
+        self.log_line("↺ Journal: " + " ".join(f"{k}={v}" for k, v in journal.counts().items()))
+
+    def get_urls(self):
+        listing_url = self.listing_var.get().strip()
+        prefix = (self.prefix_var.get() or "").strip()
+        only_same = bool(self.same_domain_var.get())
+
+        try:
+            max_pages = int(self.pages_var.get().strip())
+        except ValueError:
+            max_pages = 1
+
+        if not listing_url:
+            messagebox.showwarning("Manquant", "Mets l’URL catégorie.")
+            return
+        if not prefix:
+            messagebox.showwarning("Manquant", "Mets un préfixe URL produit.")
+            return
+
+        self.resumed_results = []
+        self.set_busy(True)
+        self.status_var.set("Récupération URLs…")
+        self.log_line(f"→ Listing: {listing_url}")
+        self.log_line(f"→ Prefix: {prefix}")
+
+        engine = self.build_engine()
+
+        def worker():
+            try:
+                links = engine.collect_urls(listing_url, prefix, max_pages=max_pages, only_same_domain=only_same)
+                self.product_urls = links
+                self.post(self.fill_url_list, links)
+                self.post(self.status_var.set, f"URLs récupérées: {len(links)}")
+                self.log_line("✓ OK: URLs affichées dans la liste.")
+
+            except Exception as e:
+                self.log_line(f"✗ Erreur URLs: {e}")
+                self.post(self.show_error, str(e))
+                self.post(self.status_var.set, "Erreur")
+            finally:
+                self.post(self.set_busy, False)
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def scrape_selected(self):
+        if not self.url_view.selected:
+            messagebox.showinfo("Sélection", "Sélectionne une ou plusieurs URLs.")
+            return
+
+        urls = self.url_view.selected_items()
+
+        try:
+            limit = int(self.limit_var.get().strip())
+        except ValueError:
+            limit = 20
+        urls = urls[:max(1, limit)]
+
+        self.set_busy(True)
+        self.status_var.set("Scraping fiches…")
+        self.log_line(f"→ Scrape {len(urls)} fiche(s)")
+
+        engine = self.build_engine()
+        # Après une reprise, les fiches déjà extraites du journal restent dans les résultats ;
+        # les nouvelles s'ajoutent au tableau au fil du scrape.
+        self.results = list(self.resumed_results)
+        self.fill_results(self.results)
+
+        output = self.output_var.get().strip()
+
+        def finished():
+            self.status_var.set(f"Terminé: {len(self.results)} fiche(s)")
+
+        def worker():
+            try:
+                if output:
+                    # Chaque fiche part dans le sink dès son extraction (fichier `.part` jusqu'à la
+                    # fin du scrape) : rien n'est réécrit depuis `self.results` à la fin.
+                    with open_sink(output) as sink:
+                        def on_result(row: dict):
+                            sink.write(row)
+                            self.post_row(row)
+
+                        engine.scrape(urls, on_result=on_result, keep_rows=False)
+                    self.log_line(f"→ {sink.count} fiche(s) écrite(s) dans {output}")
+                else:
+                    engine.scrape(urls, on_result=self.post_row, keep_rows=False)
+                self.post(finished)
+                self.log_line("✓ Terminé.")
+
+            except Exception as e:
+                self.log_line(f"✗ Erreur scrape: {e}")
+                self.post(self.show_error, str(e))
+                self.post(self.status_var.set, "Erreur")
+            finally:
+                self.post(self.set_busy, False)
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def choose_output(self):
+        path = filedialog.asksaveasfilename(
+            defaultextension=".jsonl",
+            filetypes=[("JSON Lines", "*.jsonl"), ("CSV", "*.csv"), ("JSON", "*.json"), ("Parquet", "*.parquet")],
+        )
+        if path:
+            self.output_var.set(path)
+
+    def export_csv(self):
+        if not self.results:
+            messagebox.showinfo("Rien à exporter", "Aucun résultat.")
+            return
+        path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV", "*.csv")])
+        if not path:
+            return
+        self.write_results(path)
+        self.log_line(f"→ Export CSV: {path}")
+
+    def export_json(self):
+        if not self.results:
+            messagebox.showinfo("Rien à exporter", "Aucun résultat.")
+            return
+        path = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("JSON", "*.json")])
+        if not path:
+            return
+        self.write_results(path)
+        self.log_line(f"→ Export JSON: {path}")
+
+    def write_results(self, path: str):
+        # Export a posteriori des fiches affichées ; pour écrire pendant le scrape, renseigner
+        # « Sortie au fil de l'eau ».
+        with open_sink(path) as sink:
+            for row in self.results:
+                sink.write(row)
@@ -0,0 +1,29 @@
+import json
+
+from benchmarks.baseline import compare_baseline, save_baseline
+from benchmarks.bench import bench_micro
+from benchmarks.corpus import BASELINE_PATH, SITE_CORPUS_DIR, load_site_corpus, split_site_corpus
+
+
+def test_committed_corpus_and_baseline_match_bench_micro():
+    listings, products = split_site_corpus(load_site_corpus(SITE_CORPUS_DIR))
+    assert len(listings) >= 2 and len(products) >= 6
+    with open(BASELINE_PATH, encoding="utf-8") as f:
+        recorded = json.load(f)["micro"]
+    results = bench_micro(SITE_CORPUS_DIR, repeat=1, logger=quiet)
+    assert set(results) <= set(recorded)
+
+
+def quiet(message):
+    pass
+
+
+def test_compare_baseline_flags_only_regressions(tmp_path):
+    path = str(tmp_path / "baseline.json")
+    save_baseline("micro", {"parse_ms": 10.0, "pages_per_s": 5.0, "pages": 60}, path)
+    save_baseline("e2e", {"elapsed_s": 1.0}, path)
+    assert compare_baseline("micro", {"parse_ms": 11.0, "pages_per_s": 4.5, "pages": 10}, path, logger=quiet) == []
+    assert compare_baseline("micro", {"parse_ms": 12.0, "pages_per_s": 4.0}, path, logger=quiet) == [
+        "parse_ms", "pages_per_s",
+    ]
+    assert compare_baseline("e2e", {"elapsed_s": 2.0}, path, logger=quiet) == ["elapsed_s"]
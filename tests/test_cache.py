@@ -0,0 +1,96 @@
+import random
+import sqlite3
+import string
+
+import pytest
+
+from crapy import HtmlCache, stores
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(stores.time, "time", clock)
+    return clock
+
+
+def page(seed: int, size: int = 1000) -> str:
+    # Texte aléatoire : la compression zlib ne le réduit presque pas, la taille stockée reste prévisible.
+    rng = random.Random(seed)
+    return "<html><body>" + "".join(rng.choice(string.ascii_letters) for _ in range(size)) + "</body></html>"
+
+
+def accessed_at(path: str) -> dict:
+    db = sqlite3.connect(path)
+    try:
+        return dict(db.execute("SELECT url, accessed_at FROM pages"))
+    finally:
+        db.close()
+
+
+def test_expired_pages_are_misses_except_offline(tmp_path, clock):
+    cache = HtmlCache(str(tmp_path / "cache.sqlite"), ttl_s=60)
+    cache.put("https://a.com/p/1", 200, page(1))
+    cache.put("https://a.com/p/2", 200, page(2), ttl_s=3600)
+    clock.now += 61
+    assert cache.get("https://a.com/p/1") is None
+    assert not cache.contains("https://a.com/p/1")
+    assert cache.get("https://a.com/p/1", allow_expired=True).html == page(1)
+    assert cache.get("https://a.com/p/2").html == page(2)
+    assert (cache.hits, cache.misses) == (2, 1)
+    cache.close()
+
+
+def test_eviction_drops_least_recently_read_pages(tmp_path, clock):
+    cache = HtmlCache(str(tmp_path / "cache.sqlite"), max_bytes=2800)
+    for i in range(3):
+        cache.put(f"https://a.com/p/{i}", 200, page(i))
+        clock.now += 1
+    assert cache.get("https://a.com/p/0") is not None
+    clock.now += 1
+    cache.put("https://a.com/p/3", 200, page(3))
+    # p/0 vient d'être lue : p/1, la moins récemment utilisée, part la première.
+    assert cache.entries() == ["https://a.com/p/0", "https://a.com/p/2", "https://a.com/p/3"]
+    cache.close()
+
+
+def test_eviction_removes_expired_pages_first(tmp_path, clock):
+    cache = HtmlCache(str(tmp_path / "cache.sqlite"), max_bytes=2800)
+    cache.put("https://a.com/old", 200, page(0))
+    clock.now += 1
+    cache.put("https://a.com/short", 200, page(1), ttl_s=1)
+    clock.now += 1
+    cache.put("https://a.com/p/2", 200, page(2))
+    clock.now += 1
+    cache.put("https://a.com/p/3", 200, page(3))
+    assert cache.entries() == ["https://a.com/old", "https://a.com/p/2", "https://a.com/p/3"]
+    cache.close()
+
+
+def test_access_times_are_written_in_batches(tmp_path, clock, monkeypatch):
+    monkeypatch.setattr(stores, "CACHE_TOUCH_BATCH", 3)
+    path = str(tmp_path / "cache.sqlite")
+    cache = HtmlCache(path)
+    urls = [f"https://a.com/p/{i}" for i in range(4)]
+    for url in urls:
+        cache.put(url, 200, page(0, size=10))
+    written = accessed_at(path)
+    clock.now += 10
+    for url in urls[:2]:
+        cache.get(url)
+    # Deux lectures : rien n'est encore écrit.
+    assert accessed_at(path) == written
+    cache.get(urls[2])
+    assert accessed_at(path) == {**written, **dict.fromkeys(urls[:3], clock.now)}
+    clock.now += 10
+    cache.get(urls[3])
+    cache.close()
+    assert accessed_at(path)[urls[3]] == clock.now
@@ -0,0 +1,49 @@
+import pytest
+
+from benchmarks.corpus import CHALLENGE_CORPUS_DIR, load_challenge_corpus, make_challenge_corpus
+from crapy import classify_challenge, looks_like_bot_challenge
+
+CORPUS = load_challenge_corpus(CHALLENGE_CORPUS_DIR)
+
+
+def test_committed_corpus_has_both_labels():
+    labels = [page["label"] for page in CORPUS]
+    assert labels.count("challenge") >= 10 and labels.count("normal") >= 8
+
+
+@pytest.mark.parametrize("page", CORPUS, ids=lambda page: f"{page['label']}/{page['name']}")
+def test_committed_corpus_labels(page):
+    assert looks_like_bot_challenge(page["html"], page["status"], page["headers"]) == (page["label"] == "challenge")
+
+
+@pytest.mark.parametrize("page", make_challenge_corpus(), ids=lambda page: f"{page['label']}/{page['name']}")
+def test_synthetic_corpus_labels(page):
+    assert looks_like_bot_challenge(page["html"], page["status"], page["headers"]) == (page["label"] == "challenge")
+
+
+def test_vendor_scripts_on_normal_pages_are_not_markers():
+    jsd = "<html><head><title>Arrosoir</title></head><body><script>a.src='/cdn-cgi/challenge-platform/scripts/jsd/main.js'</script>"
+    imperva = "<html><head><script src='/_Incapsula_Resource?SWJIYLWA=719d34d3'></script></head><body></body></html>"
+    assert classify_challenge(jsd, 200) is None
+    assert classify_challenge(imperva, 200) is None
+    assert classify_challenge(jsd.replace("scripts/jsd/main.js", "h/b/orchestrate/chl_page/v1"), 403) == "cloudflare"
+
+
+def test_title_alone_needs_a_refusal_or_a_captcha_widget():
+    page = "<html><head><title>Captcha | Jeu d'ambiance</title></head><body><p>Dès 10 ans.</p></body></html>"
+    assert classify_challenge(page, 200) is None
+    assert classify_challenge(page, 403) == "titre: captcha | jeu d'ambiance"
+    widget = page.replace("</body>", "<div class='h-captcha'></div><p>Are you a robot?</p></body>")
+    assert classify_challenge(widget, 200) == "titre: captcha | jeu d'ambiance"
+
+
+def test_size_hint_disables_weak_signals_on_large_pages():
+    head = "<html><head><title>Robot Check</title></head><body><div class='g-recaptcha'></div><p>Are you a robot?</p>"
+    assert classify_challenge(head, 200) is not None
+    assert classify_challenge(head, 200, size=500_000) is None
+    assert classify_challenge(head, 429, size=500_000) is not None
+
+
+def test_aws_waf_action_header():
+    assert classify_challenge("<html></html>", 202, {"X-Amzn-Waf-Action": "challenge"}) == "aws-waf"
+    assert classify_challenge("<html></html>", 200, {"x-amzn-waf-action": "block"}) is None
@@ -0,0 +1,67 @@
+"""`compile_css` doit sélectionner exactement les mêmes éléments que soupsieve (BeautifulSoup)."""
+
+import pytest
+from bs4 import BeautifulSoup
+
+from crapy import compile_css, parse_html
+
+HTML = """<!DOCTYPE html><html><head>
+<meta property="og:title" content="Arrosoir">
+<meta name="description" content="">
+<meta name="Description" content="Majuscule">
+</head><body>
+<div class="product  main	card" id="p1" data-ref="604211"><h1 class="text-trabaldo">Arrosoir</h1></div>
+<div class="product-card" id="p2" lang="fr-FR"><h1>Autre</h1></div>
+<DIV CLASS="Product" ID="P3" DATA-REF="A b">Casse</DIV>
+<p class="MsoNormal">Un</p><p class="msonormal">deux</p><p class="MsoNormal extra">trois</p>
+<img src="/storage/products/1.jpg"><img src="/img/thumb/2.jpg" alt="vignette"><img data-src="/lazy.jpg">
+<a href="https://example.com/jeu-jouet/a.htm" rel="nofollow  noopener">a</a>
+<a href="/jeu-jouet/b.htm?x=1" rel="next">b</a>
+<span lang="fr">fr</span><span lang="fr-CA">ca</span><span lang="french">non</span>
+<div title="a b c">t</div><div title="">vide</div>
+<!-- <div class="product">commentaire</div> -->
+<script>var x = '<div class="product">';</script>
+</body></html>"""
+
+SELECTORS = [
+    "h1", "div", "*", "p.MsoNormal", ".product", ".main", ".card", "#p1", "#P3", "div#p2", "h1.text-trabaldo",
+    "[data-ref]", "[data-ref='604211']", "div[data-ref=\"A b\"]", "[id]", "img[src]", "img[src*='/storage/']",
+    "img[src^='/img/']", "img[src$='.jpg']", "img[src*='']", "img[src^='']", "img[src$='']", "[alt]",
+    "meta[property='og:title']", "meta[name='description']", "meta[name=description]", "[content='']",
+    "a[rel~=nofollow]", "a[rel~='noopener']", "a[rel='nofollow noopener']", "a[rel~='']", "a[href*='jeu-jouet']",
+    "span[lang|=fr]", "[lang|='fr-FR']", "[title~=b]", "[title~='a b']", "[title='']", "p.MsoNormal.extra",
+    ".product.card", "div.product-card#p2", "[class*='product']", "[class^='product']", "[class$='card']",
+    "[class='product main card']", "[class~=main]",
+]
+
+
+def lxml_select(root, selector: str) -> list:
+    tag, _, predicate = compile_css(selector)
+    return [
+        el for el in root.iter()
+        if isinstance(el.tag, str) and (tag == "*" or el.tag == tag) and (predicate is None or predicate(el))
+    ]
+
+
+@pytest.fixture(scope="module")
+def trees():
+    """Les deux arbres viennent du même parseur lxml : un élément a la même position (ordre du
+    document) dans l'un et l'autre."""
+    root, soup = parse_html(HTML), BeautifulSoup(HTML, "lxml")
+    elements = [el for el in root.iter() if isinstance(el.tag, str)]
+    tags = soup.find_all(True)
+    assert [el.tag for el in elements] == [tag.name for tag in tags]
+    return root, soup, {el: i for i, el in enumerate(elements)}, {id(tag): i for i, tag in enumerate(tags)}
+
+
+@pytest.mark.parametrize("selector", SELECTORS)
+def test_compile_css_matches_soupsieve(trees, selector):
+    root, soup, lxml_pos, soup_pos = trees
+    expected = [soup_pos[id(tag)] for tag in soup.select(selector)]
+    assert [lxml_pos[el] for el in lxml_select(root, selector)] == expected
+
+
+@pytest.mark.parametrize("selector", ["div p", "div > p", "h1, h2", "p:first-child", "a[href]:not(.x)", "div ~ p"])
+def test_compile_css_rejects_combinators(selector):
+    with pytest.raises(ValueError):
+        compile_css(selector)
@@ -0,0 +1,65 @@
+import asyncio
+
+from crapy import CrawlEngine, FetchModes, HttpPage
+
+# Titre et description, pas d'image : 2 champs sur 3, en HTTP comme après rendu.
+PARTIAL_PAGE = (
+    "<html><head><title>Arrosoir</title><meta name='description' content='Arrosoir vert 1,5 L'></head>"
+    "<body><h1>Arrosoir</h1></body></html>"
+)
+
+
+class StubSession:
+    """Session navigateur sans Chromium : `fetch_product` est remplacé, les pages ne servent pas."""
+
+    async def start(self, headless=None, policy=None):
+        pass
+
+    async def acquire(self, timeout_s=70):
+        return object()
+
+    async def release(self, page):
+        pass
+
+    def summary(self):
+        return "session factice"
+
+
+class StubHttpClient:
+    reused = 0
+
+    def __init__(self, html: str):
+        self.html = html
+        self.requests = []
+
+    def get(self, url, headers=None):
+        self.requests.append(url)
+        if url.endswith("/robots.txt"):
+            return HttpPage(url, url, 404, "", {})
+        return HttpPage(url, url, 200, self.html, {})
+
+    def close(self):
+        pass
+
+
+def test_incomplete_domain_is_fetched_once_per_product():
+    http = StubHttpClient(PARTIAL_PAGE)
+    modes = FetchModes()
+    engine = CrawlEngine(wait_ms=0, delay_min=0, delay_max=0, max_rate=1000, http_client=http,
+                         fetch_modes=modes, session=StubSession(), logger=lambda message: None)
+    rendered = []
+
+    async def fetch_product(page, url, label, limiter, ready_groups=None, in_page=None):
+        rendered.append(url)
+        return PARTIAL_PAGE
+
+    engine.fetch_product = fetch_product
+    urls = [f"https://a.com/p/{i}" for i in range(5)]
+    rows = asyncio.run(engine.scrape_async(urls))
+
+    assert [row["url"] for row in rows] == urls
+    assert modes.get(urls[0]) == "browser"
+    products = [url for url in http.requests if not url.endswith("/robots.txt")]
+    # 1re fiche : HTTP puis rendu ; ensuite une seule visite navigateur par fiche.
+    assert products == urls[:1]
+    assert rendered == urls
@@ -0,0 +1,47 @@
+import pytest
+
+from crapy import FingerprintStore, UrlRules
+
+URLS = [
+    "https://a.com/jeu_jouet/1",
+    "https://a.com/jeu_jouet/2",
+    "https://a.com/jeuXjouet/3",
+    "https://a.com/jeu_jouet/promo/4",
+]
+
+
+@pytest.fixture
+def path(tmp_path):
+    path = str(tmp_path / "fingerprints.sqlite")
+    store = FingerprintStore(path)
+    for url in URLS:
+        store.update(url, {"url": url, "title": url[-1]})
+    store.close()
+    return path
+
+
+def removed_after_empty_run(path, rules):
+    store = FingerprintStore(path)
+    store.see(["https://a.com/"])
+    try:
+        return {row["url"] for row in store.finish_run(rules)}
+    finally:
+        store.close()
+
+
+def test_finish_run_prefix_is_literal(path):
+    # « _ » et « % » ne sont pas des jokers : jeuXjouet reste hors du préfixe.
+    assert removed_after_empty_run(path, "https://a.com/jeu_jouet/") == {URLS[0], URLS[1], URLS[3]}
+
+
+def test_finish_run_follows_include_and_exclude_rules(path):
+    rules = UrlRules(["https://a.com/jeu_jouet/", "re:jeuXjouet"], ["https://a.com/jeu_jouet/promo/"])
+    assert removed_after_empty_run(path, rules) == {URLS[0], URLS[1], URLS[2]}
+
+
+def test_finish_run_keeps_seen_and_foreign_hosts(path):
+    store = FingerprintStore(path)
+    store.see([URLS[0]])
+    store.update("https://b.com/p/1", {"url": "https://b.com/p/1"})
+    assert {row["url"] for row in store.finish_run()} == set(URLS[1:])
+    store.close()
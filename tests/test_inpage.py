@@ -0,0 +1,49 @@
+import asyncio
+
+import pytest
+
+from benchmarks.corpus import BENCH_HOST, SITE_CORPUS_DIR, load_site_corpus, split_site_corpus
+from crapy import build_extraction_profile, extract_in_page, extract_product_info
+
+async_api = pytest.importorskip("playwright.async_api")
+
+_, PRODUCTS = split_site_corpus(load_site_corpus(SITE_CORPUS_DIR))
+PAGES = {BENCH_HOST + path: html for path, html in PRODUCTS}
+
+
+async def rows_in_page(profiles: list) -> list:
+    """(url, profil, fiche dans la page, fiche Python sur le même DOM) pour chaque fiche du corpus."""
+    results = []
+    async with async_api.async_playwright() as p:
+        try:
+            browser = await p.chromium.launch(headless=True)
+        except Exception as e:
+            pytest.skip(f"Chromium indisponible: {e}")
+        try:
+            page = await browser.new_page()
+
+            async def serve(route):
+                html = PAGES.get(route.request.url)
+                if html is None:
+                    await route.abort()
+                else:
+                    await route.fulfill(status=200, content_type="text/html; charset=utf-8", body=html)
+
+            await page.route("**/*", serve)
+            for url in PAGES:
+                await page.goto(url, wait_until="domcontentloaded")
+                html = await page.content()
+                for profile in profiles:
+                    fields = await extract_in_page(page, url, profile)
+                    results.append((url, profile, fields["row"], extract_product_info(url, html, profile)))
+        finally:
+            await browser.close()
+    return results
+
+
+def test_in_page_extraction_matches_python_on_the_site_corpus():
+    assert PAGES
+    learned = build_extraction_profile(PRODUCTS[0][1])
+    profiles = [{}, learned, {**learned, "lean": True}]
+    for url, profile, in_page, expected in asyncio.run(rows_in_page(profiles)):
+        assert in_page == expected, (url, profile)
@@ -0,0 +1,81 @@
+import time
+
+import pytest
+
+from crapy import CrawlJournal
+
+
+@pytest.fixture
+def journal(tmp_path):
+    journal = CrawlJournal(str(tmp_path / "journal.sqlite"))
+    journal.add_urls([f"https://a.com/p/{i}" for i in range(4)] + [f"https://b.com/p/{i}" for i in range(2)])
+    yield journal
+    journal.close()
+
+
+def test_lease_hands_out_each_url_once_in_frontier_order(journal):
+    first = journal.lease("w1", 3, lease_s=60)
+    second = journal.lease("w2", 10, lease_s=60)
+    assert first == ["https://a.com/p/0", "https://a.com/p/1", "https://a.com/p/2"]
+    assert second == ["https://a.com/p/3", "https://b.com/p/0", "https://b.com/p/1"]
+    assert journal.lease("w3", 10, lease_s=60) == []
+    assert journal.leases() == {"w1": 3, "w2": 3}
+
+
+def test_host_cap_counts_leases_of_all_workers(journal):
+    assert journal.lease("w1", 10, lease_s=60, host_cap=2) == [
+        "https://a.com/p/0", "https://a.com/p/1", "https://b.com/p/0", "https://b.com/p/1",
+    ]
+    assert journal.lease("w2", 10, lease_s=60, host_cap=2) == []
+    journal.mark_done("https://a.com/p/0", {"url": "https://a.com/p/0"})
+    assert journal.lease("w2", 10, lease_s=60, host_cap=2) == ["https://a.com/p/2"]
+
+
+def test_expired_lease_goes_back_to_the_queue(journal):
+    leased = journal.lease("mort", 2, lease_s=0.05)
+    time.sleep(0.1)
+    assert journal.lease("w2", 2, lease_s=60) == leased
+
+
+def test_renew_keeps_urls_and_release_returns_them(journal):
+    leased = journal.lease("w1", 2, lease_s=0.2)
+    journal.renew("w1", lease_s=60)
+    time.sleep(0.3)
+    assert leased[0] not in journal.lease("w2", 6, lease_s=60)
+    journal.release("w2")
+    journal.release("w1")
+    assert journal.lease("w3", 2, lease_s=60) == leased
+
+
+def test_finished_urls_are_never_leased_again(journal):
+    url = journal.lease("w1", 1, lease_s=60)[0]
+    journal.mark_done(url, {"url": url, "title": "t"})
+    journal.release("w1")
+    assert url not in journal.lease("w2", 10, lease_s=60)
+    assert journal.counts()["done"] == 1
+    assert journal.rows() == [{"url": url, "title": "t"}]
+
+
+def test_failed_urls_are_leased_again_after_requeue(journal):
+    url = journal.lease("w1", 1, lease_s=60)[0]
+    journal.mark_failed(url, "timeout")
+    journal.release("w1")
+    assert url not in journal.lease("w2", 10, lease_s=60)
+    journal.release("w2")
+    assert journal.requeue_failed() == 1
+    assert journal.lease("w3", 1, lease_s=60) == [url]
+
+
+def test_two_connections_never_share_a_url(tmp_path):
+    path = str(tmp_path / "journal.sqlite")
+    first, second = CrawlJournal(path), CrawlJournal(path)
+    try:
+        first.add_urls([f"https://a.com/p/{i}" for i in range(10)])
+        taken = []
+        for _ in range(5):
+            taken += first.lease("w1", 1, lease_s=60)
+            taken += second.lease("w2", 1, lease_s=60)
+        assert sorted(taken) == sorted(f"https://a.com/p/{i}" for i in range(10))
+    finally:
+        first.close()
+        second.close()
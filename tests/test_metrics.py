@@ -0,0 +1,94 @@
+import os
+import re
+
+import pytest
+
+from crapy import METRIC_QUANTILES, Metrics, percentile, prom_escape
+
+# Échantillon du format texte Prometheus : nom, labels optionnels (valeurs échappées), valeur.
+SAMPLE_RE = re.compile(r'^([a-zA-Z_:][\w:]*)(\{(?:[a-zA-Z_]\w*="(?:[^"\\\n]|\\[\\"n])*",?)*\})? (\S+)$')
+
+
+@pytest.mark.parametrize("q", [0, 0.5, 0.99, 1])
+def test_percentile_of_empty_and_single_value(q):
+    assert percentile([], q) == 0.0
+    assert percentile([0.25], q) == 0.25
+
+
+def test_percentile_interpolates_between_sorted_values():
+    values = [4.0, 1.0, 3.0, 2.0]
+    assert percentile(values, 0) == 1.0
+    assert percentile(values, 1) == 4.0
+    assert percentile(values, 0.5) == 2.5
+    assert percentile(values, 0.9) == pytest.approx(3.7)
+    assert values == [4.0, 1.0, 3.0, 2.0]
+
+
+def test_stage_stats_of_a_single_measure():
+    metrics = Metrics()
+    metrics.add("goto", 0.2, "https://a.com/p/1")
+    stats = metrics.stage_stats()["goto"]
+    assert (stats["count"], stats["total_s"], stats["mean_s"], stats["max_s"]) == (1, 0.2, 0.2, 0.2)
+    assert all(stats[f"p{round(q * 100)}_s"] == 0.2 for q in METRIC_QUANTILES)
+
+
+def test_per_url_timings_are_capped():
+    metrics = Metrics(max_urls=2)
+    for i in range(3):
+        metrics.add("parse", 0.1, f"https://a.com/p/{i}")
+        metrics.add("parse", 0.1, f"https://a.com/p/{i}")
+    assert list(metrics.per_url) == ["https://a.com/p/0", "https://a.com/p/1"]
+    assert metrics.per_url["https://a.com/p/0"]["parse"] == pytest.approx(0.2)
+    assert len(metrics.durations["parse"]) == 6
+
+
+@pytest.mark.parametrize(
+    "value, escaped",
+    [("goto", "goto"), ('a"b', 'a\\"b'), ("c:\\tmp", "c:\\\\tmp"), ("l1\nl2", "l1\\nl2"), (429, "429")],
+)
+def test_prom_escape(value, escaped):
+    assert prom_escape(value) == escaped
+
+
+def test_prometheus_textfile_format():
+    metrics = Metrics()
+    metrics.add("goto", 0.5)
+    metrics.add('wait "idle"\\\n', 0.1)
+    metrics.count("retry", 2)
+    metrics.response(200, "<html>é</html>")
+    metrics.response(None)
+    text = metrics.prometheus()
+    assert text.endswith("\n")
+
+    families = {}
+    for line in text.splitlines():
+        if line.startswith("# "):
+            kind, name, rest = line[2:].split(" ", 2)
+            assert kind in ("HELP", "TYPE")
+            families.setdefault(name, {})[kind] = rest
+            continue
+        m = SAMPLE_RE.match(line)
+        assert m, line
+        name = re.sub(r"_(sum|count)$", "", m.group(1)) if m.group(1).startswith("crapy_stage_seconds") else m.group(1)
+        # Chaque échantillon suit le HELP et le TYPE de sa famille.
+        assert set(families.get(name, {})) == {"HELP", "TYPE"}, line
+        float(m.group(3))
+
+    assert families["crapy_stage_seconds"]["TYPE"] == "summary"
+    assert families["crapy_events_total"]["TYPE"] == "counter"
+    assert families["crapy_run_duration_seconds"]["TYPE"] == "gauge"
+    assert 'crapy_stage_seconds_count{stage="wait \\"idle\\"\\\\\\n"} 1' in text.splitlines()
+    assert 'crapy_stage_seconds{stage="goto",quantile="0.5"} 0.500000' in text
+    assert 'crapy_events_total{event="retry"} 2' in text
+    assert 'crapy_http_responses_total{class="none"} 1' in text
+    assert "crapy_html_bytes_total 15" in text
+
+
+def test_empty_run_still_writes_every_family(tmp_path):
+    path = str(tmp_path / "crapy.prom")
+    Metrics().save_prometheus(path)
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    assert text.count("# TYPE ") == 6
+    assert "crapy_stage_seconds{" not in text
+    assert os.listdir(tmp_path) == ["crapy.prom"]
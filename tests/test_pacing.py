@@ -0,0 +1,169 @@
+import asyncio
+import time
+
+import pytest
+
+from crapy import CircuitBreaker, FetchError, HostLimiter, RetryScheduler, pacing
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_host_limiter_caps_concurrent_visits_per_host():
+    limiter = HostLimiter(per_host=2, delay_min=0, delay_max=0, max_rate=1000)
+    active = {"a.com": 0, "b.com": 0}
+    peak = {"a.com": 0, "b.com": 0}
+
+    async def visit(host):
+        async with limiter.slot(f"https://{host}/p"):
+            active[host] += 1
+            peak[host] = max(peak[host], active[host])
+            await asyncio.sleep(0.02)
+            active[host] -= 1
+
+    async def main():
+        await asyncio.gather(*(visit(host) for host in ("a.com", "b.com") for _ in range(6)))
+
+    run(main())
+    assert peak == {"a.com": 2, "b.com": 2}
+
+
+def test_host_limiter_spaces_departures_at_max_rate():
+    limiter = HostLimiter(per_host=4, delay_min=0, delay_max=0, max_rate=20)
+    starts = []
+
+    async def visit():
+        async with limiter.slot("https://a.com/p"):
+            starts.append(time.monotonic())
+
+    async def main():
+        await asyncio.gather(*(visit() for _ in range(5)))
+
+    run(main())
+    # 20 req/s : 4 intervalles de 50 ms au moins entre le premier et le dernier départ.
+    assert starts[-1] - starts[0] >= 4 * 0.05 * 0.95
+
+
+def test_feedback_slows_down_and_honours_retry_after():
+    limiter = HostLimiter(delay_min=0, delay_max=0, max_rate=10)
+    state = limiter.host_rate("https://a.com/p")
+    rate = state.rate
+    limiter.feedback("https://a.com/p", 429, retry_after="2")
+    assert state.rate < rate
+    assert state.paused_until - time.monotonic() == pytest.approx(2, abs=0.1)
+    assert state.take() == pytest.approx(2, abs=0.1)
+
+
+def test_fast_responses_raise_the_rate_up_to_max_rate():
+    limiter = HostLimiter(delay_min=900, delay_max=1900, max_rate=2)
+    state = limiter.host_rate("https://a.com/p")
+    assert state.rate == pytest.approx(2000 / 2800)
+    for _ in range(100):
+        limiter.feedback("https://a.com/p", 200, latency_s=0.1)
+    assert state.rate == 2
+
+
+def test_robots_crawl_delay_caps_the_rate():
+    limiter = HostLimiter(max_rate=10, robots_fetch=lambda url: "User-agent: *\nCrawl-delay: 4\n")
+
+    async def main():
+        async with limiter.slot("https://a.com/p"):
+            pass
+
+    run(main())
+    state = limiter.host_rate("https://a.com/p")
+    assert state.robots_interval == 4 and state.max_rate == pytest.approx(0.25)
+
+
+@pytest.fixture
+def fast_backoff(monkeypatch):
+    monkeypatch.setattr(pacing, "RETRY_BACKOFF_S", {kind: 0.01 for kind in pacing.RETRY_BACKOFF_S})
+
+
+def test_retry_scheduler_requeues_then_gives_up(fast_backoff):
+    async def main():
+        queue = asyncio.Queue()
+        retries = RetryScheduler(queue, max_attempts=3)
+        await retries.put((0, "https://a.com/p"))
+        seen = 0
+        while True:
+            item = await queue.get()
+            seen += 1
+            if retries.fail(item, FetchError("timeout", "trop lent")) is None:
+                break
+        await asyncio.wait_for(retries.drained(), 1)
+        return seen, retries
+
+    seen, retries = run(main())
+    assert seen == 3
+    assert (retries.retried, retries.recovered, retries.gave_up) == (2, 0, 1)
+    assert retries.failures == {"timeout": 3}
+
+
+def test_retry_scheduler_drops_permanent_errors_and_counts_recoveries(fast_backoff):
+    async def main():
+        queue = asyncio.Queue()
+        retries = RetryScheduler(queue)
+        await retries.put((0, "https://a.com/dns"))
+        await retries.put((1, "https://a.com/flaky"))
+        assert retries.fail(await queue.get(), FetchError("dns", "introuvable")) is None
+        item = await queue.get()
+        assert retries.fail(item, FetchError("http-5xx", "HTTP 503")) is not None
+        item = await asyncio.wait_for(queue.get(), 1)
+        retries.settle(item[0])
+        await asyncio.wait_for(retries.drained(), 1)
+        return retries
+
+    retries = run(main())
+    assert (retries.retried, retries.recovered, retries.gave_up) == (1, 1, 1)
+
+
+def test_retry_delay_doubles_and_respects_retry_after(fast_backoff):
+    error = FetchError("http-429", "HTTP 429")
+    assert 0.01 <= pacing.retry_delay(error, 1) <= 0.015
+    assert 0.04 <= pacing.retry_delay(error, 3) <= 0.06
+    assert pacing.retry_delay(FetchError("http-429", "HTTP 429", retry_after="7"), 1) == 7
+
+
+def trip(breaker, url, failures):
+    for _ in range(failures):
+        assert breaker.check(url) == 0.0
+        breaker.failure(url)
+
+
+def test_breaker_gives_up_after_max_trips_in_a_row():
+    breaker = CircuitBreaker(threshold=2, cooldown_s=0, max_trips=3, heal_after=5)
+    url = "https://a.com/p"
+    trip(breaker, url, 2)
+    # Après une ouverture, l'échec de la requête sonde suffit à rouvrir.
+    trip(breaker, url, 1)
+    trip(breaker, url, 1)
+    assert breaker.check(url) is None
+    assert breaker.check("https://b.com/p") == 0.0
+
+
+def test_breaker_forgets_a_trip_after_a_run_of_successes():
+    breaker = CircuitBreaker(threshold=2, cooldown_s=0, max_trips=3, heal_after=5)
+    url = "https://a.com/p"
+    # Incidents espacés : entre deux coupures, le domaine répond assez longtemps.
+    for _ in range(5):
+        trip(breaker, url, 2)
+        for _ in range(5):
+            assert breaker.check(url) == 0.0
+            breaker.success(url)
+    assert breaker.trips["a.com"] == 0
+    assert breaker.opened["a.com"] == 5
+    assert breaker.check(url) == 0.0
+
+
+def test_breaker_success_run_is_reset_by_a_failure():
+    breaker = CircuitBreaker(threshold=2, cooldown_s=0, max_trips=3, heal_after=3)
+    url = "https://a.com/p"
+    trip(breaker, url, 2)
+    assert breaker.check(url) == 0.0
+    for outcome in ("success", "success", "failure", "success", "success"):
+        getattr(breaker, outcome)(url)
+    assert breaker.trips["a.com"] == 1
+    breaker.success(url)
+    assert breaker.trips["a.com"] == 0
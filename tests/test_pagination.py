@@ -0,0 +1,82 @@
+import pytest
+
+from crapy import CrawlEngine, HtmlCache, detect_pagination
+
+LISTING = "https://a.com/jeu-jouet/jardin/"
+
+
+def listing(*hrefs: str, extra: str = "") -> str:
+    links = "".join(f"<a href='{href}'>{href}</a>" for href in hrefs)
+    return f"<html><head>{extra}</head><body>{links}</body></html>"
+
+
+@pytest.mark.parametrize(
+    "url, html, kind, param, next_url",
+    [
+        ("https://a.com/jardin/page1.htm", listing(), "suffix", "", "https://a.com/jardin/page2.htm"),
+        ("https://a.com/jardin/page9.htm?tri=prix", listing(), "suffix", "", "https://a.com/jardin/page10.htm?tri=prix"),
+        ("https://a.com/jardin?tri=prix&page=3", listing(), "query", "page", "https://a.com/jardin?tri=prix&page=4"),
+        ("https://a.com/jardin?p=1", listing(), "query", "p", "https://a.com/jardin?p=2"),
+        (LISTING, listing(extra="<link rel='next' href='?offset=24'>"), "rel-next", "", LISTING + "?offset=24"),
+        (LISTING, listing("/p/1", "page2.htm"), "suffix", "", LISTING + "page2.htm"),
+        (LISTING, listing("/p/1", "/jeu-jouet/jardin/?page=2#top"), "query", "page", LISTING + "?page=2"),
+        (LISTING, "<html><body><button> Voir plus </button></body></html>", "load-more", "", None),
+        (LISTING, "<html><body><a href='#'>Load more</a></body></html>", "load-more", "", None),
+        (LISTING, listing("/p/1", "/p/2"), "scroll", "", None),
+    ],
+)
+def test_detect_pagination(url, html, kind, param, next_url):
+    pagination = detect_pagination(url, html)
+    assert (pagination.kind, pagination.param) == (kind, param)
+    assert pagination.in_page == (kind in ("load-more", "scroll"))
+    assert pagination.next_url(url, html) == next_url
+
+
+def test_hint_is_only_used_for_the_unnumbered_first_page():
+    pagination = detect_pagination(LISTING, listing("page2.htm"))
+    assert pagination.next_url(LISTING) == LISTING + "page2.htm"
+    assert pagination.next_url(LISTING + "page2.htm") == LISTING + "page3.htm"
+
+
+def test_rel_next_follows_each_page_and_stops_without_link():
+    pagination = detect_pagination(LISTING, listing(extra="<link rel='next' href='/l/2'>"))
+    assert pagination.next_url("https://a.com/l/2", "<a rel='prev next' href='/l/3'>3</a>") == "https://a.com/l/3"
+    assert pagination.next_url("https://a.com/l/3", listing("/p/9")) is None
+
+
+def test_listing_stops_at_the_first_page_without_new_products(tmp_path):
+    cache = HtmlCache(str(tmp_path / "cache.sqlite"))
+    cache.put(LISTING + "page1.htm", 200, listing("/p/1", "/p/2", "page2.htm"))
+    # Page 2 ne répète que des fiches déjà vues : le parcours s'arrête avant la page 3.
+    cache.put(LISTING + "page2.htm", 200, listing("/p/2", "/p/1", "page3.htm"))
+    cache.put(LISTING + "page3.htm", 200, listing("/p/3"))
+    engine = CrawlEngine(cache=cache, offline=True, logger=lambda message: None)
+    try:
+        urls = engine.collect_urls(LISTING + "page1.htm", "https://a.com/p/", max_pages=10)
+    finally:
+        cache.close()
+    assert urls == ["https://a.com/p/1", "https://a.com/p/2"]
+
+
+def test_listing_continues_while_pages_add_products(tmp_path):
+    cache = HtmlCache(str(tmp_path / "cache.sqlite"))
+    cache.put(LISTING + "page1.htm", 200, listing("/p/1"))
+    cache.put(LISTING + "page2.htm", 200, listing("/p/1", "/p/2"))
+    cache.put(LISTING + "page3.htm", 200, listing("/p/3"))
+    engine = CrawlEngine(cache=cache, offline=True, logger=lambda message: None)
+    try:
+        urls = engine.collect_urls(LISTING + "page1.htm", "https://a.com/p/", max_pages=3)
+    finally:
+        cache.close()
+    assert urls == ["https://a.com/p/1", "https://a.com/p/2", "https://a.com/p/3"]
+
+
+def test_listing_links_follow_the_base_href(tmp_path):
+    cache = HtmlCache(str(tmp_path / "cache.sqlite"))
+    cache.put(LISTING, 200, listing("p/1", "p/2", extra="<base href='/catalogue/'>"))
+    engine = CrawlEngine(cache=cache, offline=True, logger=lambda message: None)
+    try:
+        urls = engine.collect_urls(LISTING, "https://a.com/catalogue/p/")
+    finally:
+        cache.close()
+    assert urls == ["https://a.com/catalogue/p/1", "https://a.com/catalogue/p/2"]
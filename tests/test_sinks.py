@@ -0,0 +1,114 @@
+import csv
+import importlib.util
+import json
+import os
+
+import pytest
+
+from crapy import PRODUCT_FIELDS, CsvSink, JsonlSink, JsonSink, open_sink
+
+ROWS = [{"url": f"https://a.com/p/{i}", "title": f"Fiche {i}", "description": "", "image": "", "images": ""} for i in range(5)]
+
+
+def read(path: str):
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        return pq.read_table(path).to_pylist()
+    with open(path, encoding="utf-8", newline="") as f:
+        if path.endswith(".csv"):
+            return list(csv.DictReader(f))
+        if path.endswith(".json"):
+            return json.load(f)
+        return [json.loads(line) for line in f]
+
+
+NO_PYARROW = importlib.util.find_spec("pyarrow") is None
+SUFFIXES = [".jsonl", ".json", ".csv", pytest.param(".parquet", marks=pytest.mark.skipif(NO_PYARROW, reason="pyarrow absent"))]
+
+
+@pytest.mark.parametrize("suffix", SUFFIXES)
+def test_target_appears_only_on_close(tmp_path, suffix):
+    path = str(tmp_path / f"out{suffix}")
+    with open_sink(path) as sink:
+        for row in ROWS:
+            sink(row)
+        assert not os.path.exists(path)
+        assert os.listdir(tmp_path) == [f"out{suffix}.part"]
+    assert os.listdir(tmp_path) == [f"out{suffix}"]
+    assert read(path) == ROWS
+
+
+@pytest.mark.parametrize("suffix", SUFFIXES)
+def test_nothing_is_left_behind_on_error(tmp_path, suffix):
+    path = str(tmp_path / f"out{suffix}")
+    with pytest.raises(RuntimeError):
+        with open_sink(path) as sink:
+            sink(ROWS[0])
+            raise RuntimeError("boom")
+    assert os.listdir(tmp_path) == []
+
+
+def test_error_keeps_a_previous_export(tmp_path):
+    path = str(tmp_path / "out.jsonl")
+    with open_sink(path) as sink:
+        sink(ROWS[0])
+    with pytest.raises(RuntimeError):
+        with open_sink(path) as sink:
+            sink(ROWS[1])
+            raise RuntimeError("boom")
+    assert read(path) == ROWS[:1]
+    assert os.listdir(tmp_path) == ["out.jsonl"]
+
+
+@pytest.mark.parametrize("sink_class", [JsonlSink, CsvSink])
+def test_part_file_is_flushed_every_n_rows(tmp_path, sink_class):
+    path = str(tmp_path / "out")
+    with sink_class(path, flush_every=2, flush_s=3600) as sink:
+        sink(ROWS[0])
+        with open(sink.tmp_path, encoding="utf-8") as f:
+            assert ROWS[0]["url"] not in f.read()
+        sink(ROWS[1])
+        with open(sink.tmp_path, encoding="utf-8") as f:
+            flushed = f.read()
+        assert ROWS[0]["url"] in flushed and ROWS[1]["url"] in flushed
+
+
+def test_part_file_is_flushed_after_flush_s(tmp_path):
+    with JsonSink(str(tmp_path / "out.json"), flush_every=1000, flush_s=0) as sink:
+        sink(ROWS[0])
+        with open(sink.tmp_path, encoding="utf-8") as f:
+            assert ROWS[0]["url"] in f.read()
+
+
+def test_empty_json_export_is_an_empty_array(tmp_path):
+    path = str(tmp_path / "out.json")
+    with open_sink(path):
+        pass
+    assert read(path) == []
+
+
+def test_csv_header_lists_fields_added_by_later_rows(tmp_path):
+    path = str(tmp_path / "out.csv")
+    with open_sink(path, fields=(*PRODUCT_FIELDS, "change")) as sink:
+        sink(ROWS[0])
+        sink({**ROWS[1], "change": "modified"})
+        sink({"url": "https://a.com/p/9", "change": "removed"})
+    with open(path, encoding="utf-8", newline="") as f:
+        assert next(csv.reader(f)) == [*PRODUCT_FIELDS, "change"]
+    rows = read(path)
+    assert [row["change"] for row in rows] == ["", "modified", "removed"]
+    assert rows[2]["title"] == ""
+
+
+def test_parquet_writes_full_row_groups(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    path = str(tmp_path / "out.parquet")
+    rows = [{**ROWS[0], "url": f"https://a.com/p/{i}"} for i in range(7)]
+    with open_sink(path, row_group_size=3, flush_every=1) as sink:
+        for row in rows:
+            sink(row)
+    metadata = pq.ParquetFile(path).metadata
+    # flush_every=1 ne produit pas de row groups d'une fiche : seuls les groupes pleins partent.
+    assert [metadata.row_group(i).num_rows for i in range(metadata.num_row_groups)] == [3, 3, 1]
+    assert read(path) == rows
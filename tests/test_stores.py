@@ -0,0 +1,124 @@
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from crapy import PROFILE_DRIFT, PROFILE_WINDOW, FetchModes, ProfileStore, learn_profile, parse_html, replace_file
+
+HOSTS_PER_WORKER = 20
+LONG = "Arrosoir en métal galvanisé pour les petits jardiniers, anse ergonomique et pomme amovible. " * 2
+
+
+def product(description_class: str = "desc", image_dir: str = "media", block: str = "fiche") -> str:
+    return (
+        f"<html><head><meta property='og:image' content='https://cdn.a.com/{image_dir}/og.jpg'></head><body>"
+        f"<h1 class='nom'>Arrosoir métal</h1><div id='{block}'><p class='{description_class}'>{LONG}</p></div>"
+        f"<img src='/{image_dir}/1.jpg'></body></html>"
+    )
+
+
+def fill_stores(directory: str, worker: int) -> None:
+    """Un « worker » : décide un mode et apprend un profil par domaine, en sauvant à chaque fois."""
+    modes = FetchModes(os.path.join(directory, "modes.json"))
+    profiles = ProfileStore(os.path.join(directory, "profiles.json"), samples=1)
+    for i in range(HOSTS_PER_WORKER):
+        url = f"https://w{worker}-{i}.com/p"
+        modes.set(url, "http")
+        modes.save()
+        profiles.learn(url, parse_html(product()))
+        profiles.save()
+
+
+def test_workers_sharing_a_path_keep_every_host(tmp_path):
+    with ProcessPoolExecutor(4) as pool:
+        list(pool.map(fill_stores, [str(tmp_path)] * 4, range(4)))
+    expected = {f"w{w}-{i}.com" for w in range(4) for i in range(HOSTS_PER_WORKER)}
+    assert set(FetchModes(str(tmp_path / "modes.json")).modes) == expected
+    assert set(ProfileStore(str(tmp_path / "profiles.json")).profiles) == expected
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+
+def test_save_applies_only_local_changes(tmp_path):
+    path = str(tmp_path / "modes.json")
+    first, second = FetchModes(path), FetchModes(path)
+    first.set("https://a.com/", "browser")
+    first.save()
+    second.set("https://b.com/", "http")
+    second.save()
+    assert second.modes == {"a.com": "browser", "b.com": "http"}
+    with open(path, encoding="utf-8") as f:
+        assert json.load(f) == {"a.com": "browser", "b.com": "http"}
+
+
+def test_forgotten_profile_is_removed_from_the_shared_file(tmp_path):
+    path = str(tmp_path / "profiles.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"b.com": {"title": "h2"}}, f)
+    store = ProfileStore(path, samples=1)
+    profile = store.learn("https://a.com/p/1", parse_html(product()))
+    store.save()
+    assert set(ProfileStore(path).profiles) == {"a.com", "b.com"}
+    for _ in range(PROFILE_WINDOW):
+        forgotten = store.validate("https://a.com/p/2", {"title": True, "description": False, "images": True})
+    assert forgotten == "description 0% (appris à 100%)"
+    assert profile["description"] and store.get("https://a.com/") is None
+    store.save()
+    assert set(ProfileStore(path).profiles) == {"b.com"}
+
+
+def test_replace_file_keeps_the_target_on_error(tmp_path):
+    path = str(tmp_path / "data.json")
+    replace_file(path, lambda f: f.write("old"))
+
+    def fail(f):
+        f.write("partial")
+        raise RuntimeError("boom")
+
+    try:
+        replace_file(path, fail)
+    except RuntimeError:
+        pass
+    with open(path, encoding="utf-8") as f:
+        assert f.read() == "old"
+    assert os.listdir(tmp_path) == ["data.json"]
+
+
+def test_learn_profile_keeps_the_selector_that_works_on_most_pages():
+    pages = [product(), product(), product("autre", image_dir="img", block="bloc")]
+    profile = learn_profile([parse_html(html) for html in pages])
+    assert profile["title"] == "h1.nom"
+    # p.desc et #fiche réussissent sur 2 fiches sur 3 : le plus spécifique l'emporte.
+    assert profile["description"] == "p.desc"
+    # img[src*='/media/'] ne réussit que sur 2 fiches : le sélecteur générique passe devant.
+    assert profile["images"] == "img[src]"
+    assert profile["confidence"] == {"title": 1.0, "description": 0.667, "images": 1.0}
+    assert profile["samples"] == 3 and not profile["lean"]
+
+
+def test_profile_is_learned_after_the_sample_pages():
+    store = ProfileStore(samples=2)
+    assert store.learn("https://a.com/p/1", parse_html(product())) is None
+    assert store.get("https://a.com/") is None
+    profile = store.learn("https://a.com/p/2", parse_html(product()))
+    assert profile["lean"] and store.get("https://a.com/x") is profile
+    # Un domaine appris ne réapprend pas.
+    assert store.learn("https://a.com/p/3", parse_html(product("autre"))) is profile
+
+
+@pytest.mark.parametrize("rate, forgotten", [(1 - PROFILE_DRIFT + 0.05, False), (1 - PROFILE_DRIFT - 0.05, True)])
+def test_validate_forgets_a_drifting_profile(rate, forgotten):
+    store = ProfileStore(samples=1)
+    store.learn("https://a.com/p/0", parse_html(product()))
+    misses = round(PROFILE_WINDOW * (1 - rate))
+    results = [
+        store.validate(f"https://a.com/p/{i}", {"title": True, "description": True, "images": i >= misses})
+        for i in range(PROFILE_WINDOW)
+    ]
+    assert results[:-1] == [None] * (PROFILE_WINDOW - 1)
+    assert (results[-1] is not None) == forgotten
+    assert (store.get("https://a.com/") is None) == forgotten
+    if forgotten:
+        assert results[-1].startswith("images ")
+        # Oublié : les fiches suivantes servent à réapprendre.
+        assert store.learn("https://a.com/p/99", parse_html(product())) is not None
@@ -0,0 +1,200 @@
+import pytest
+
+from urllib.parse import urljoin
+
+from crapy import (
+    CrawlEngine,
+    CrawlJournal,
+    FingerprintStore,
+    SeenSet,
+    UrlCanonicalizer,
+    UrlRules,
+    document_base,
+    extract_all_hrefs,
+    resolve_hrefs_offline,
+    select_urls,
+)
+
+
+@pytest.mark.parametrize(
+    "url, canonical",
+    [
+        ("HTTPS://WWW.Example.COM/Jeu/A.htm", "https://www.example.com/Jeu/A.htm"),
+        ("https://example.com:443/a", "https://example.com/a"),
+        ("http://example.com:80/a", "http://example.com/a"),
+        ("http://example.com:8080/a", "http://example.com:8080/a"),
+        ("https://example.com./a", "https://example.com/a"),
+        ("https://example.com", "https://example.com/"),
+        ("https://example.com/a%2fb%c3%a9", "https://example.com/a%2Fb%C3%A9"),
+        ("https://example.com/a#avis", "https://example.com/a"),
+        ("https://example.com/a?utm_source=x&b=2&a=1&gclid=z", "https://example.com/a?a=1&b=2"),
+        ("https://example.com/a?UTM_Medium=x", "https://example.com/a"),
+        ("https://example.com/a?b=2&a=1&b=1", "https://example.com/a?a=1&b=2&b=1"),
+        ("https://jouets.exemple/a", "https://jouets.exemple/a"),
+        ("https://bücher.example/a", "https://xn--bcher-kva.example/a"),
+        ("  https://example.com/a  ", "https://example.com/a"),
+    ],
+)
+def test_canonical(url, canonical):
+    assert UrlCanonicalizer().canonical(url) == canonical
+
+
+def test_key_folds_trailing_slash_but_url_keeps_first_form():
+    canonicalizer = UrlCanonicalizer()
+    assert canonicalizer.key("https://example.com/a/") == canonicalizer.key("https://example.com/a")
+    assert canonicalizer.canonical("https://example.com/a/") == "https://example.com/a/"
+    assert canonicalizer.key("https://example.com/") == "https://example.com/"
+    strict = UrlCanonicalizer(fold_slash=False)
+    assert strict.key("https://example.com/a/") != strict.key("https://example.com/a")
+
+
+def test_path_case_is_kept_by_default():
+    canonicalizer = UrlCanonicalizer()
+    assert canonicalizer.key("HTTPS://Example.COM/p/AB12") == "https://example.com/p/AB12"
+    assert canonicalizer.key("https://example.com/p/AB12") != canonicalizer.key("https://example.com/p/ab12")
+
+
+def test_variants_cover_the_folded_forms():
+    canonicalizer = UrlCanonicalizer()
+    assert canonicalizer.variants("https://example.com/a/?b=1") == {
+        "https://example.com/a/?b=1", "https://example.com/a?b=1",
+    }
+    assert canonicalizer.variants("https://example.com/") == {"https://example.com/"}
+    assert UrlCanonicalizer(fold_case=True).variants("https://example.com/A") is None
+
+
+def test_fold_case_only_touches_the_key_path():
+    canonicalizer = UrlCanonicalizer(fold_case=True)
+    assert canonicalizer.key("https://example.com/A.htm?Ref=X") == "https://example.com/a.htm?Ref=X"
+    assert canonicalizer.canonical("https://example.com/A.htm") == "https://example.com/A.htm"
+
+
+def test_options_keep_query_and_params():
+    canonicalizer = UrlCanonicalizer(strip_params=(), sort_query=False)
+    assert canonicalizer.canonical("https://example.com/a?utm_source=x&b=1&a=2") == (
+        "https://example.com/a?utm_source=x&b=1&a=2"
+    )
+
+
+def test_invalid_url_is_left_untouched():
+    assert UrlCanonicalizer().split("http://[::1/a") == ("http://[::1/a", "http://[::1/a")
+
+
+def test_select_urls_dedupes_on_key_and_filters_domain_and_rules():
+    rules = UrlRules(["https://example.com/p/"], exclude=["*?sort=*"])
+    urls = [
+        "https://example.com/p/1?utm_source=a",
+        "https://example.com/p/1/",
+        "https://EXAMPLE.com/p/2#avis",
+        "https://example.com/p/3?sort=prix",
+        "https://other.com/p/4",
+        "https://example.com/c/5",
+    ]
+    keys = set()
+    out = select_urls(urls, rules, UrlCanonicalizer(), keys, base_url="https://example.com/c/page1.htm")
+    assert out == ["https://example.com/p/1", "https://example.com/p/2"]
+    assert select_urls(urls, rules, UrlCanonicalizer(), keys, base_url="https://example.com/") == []
+
+
+def test_seen_set_remembers_urls_across_reopen(tmp_path):
+    path = str(tmp_path / "seen.bloom")
+    seen = SeenSet(path, capacity=1000, error_rate=0.01)
+    assert seen.add("https://example.com/p/1")
+    assert not seen.add("https://example.com/p/1")
+    assert "https://example.com/p/1" in seen
+    seen.close()
+
+    seen = SeenSet(path, capacity=10)  # capacité ignorée : fixée à la création
+    assert seen.capacity == 1000 and seen.count == 1
+    assert "https://example.com/p/1" in seen
+    assert "https://example.com/p/2" not in seen
+    seen.close()
+
+
+def test_seen_set_false_positive_rate_stays_near_target(tmp_path):
+    seen = SeenSet(str(tmp_path / "seen.bloom"), capacity=5000, error_rate=0.01)
+    for i in range(5000):
+        seen.add(f"https://example.com/p/{i}")
+    assert all(f"https://example.com/p/{i}" in seen for i in range(5000))
+    false_positives = sum(f"https://example.com/q/{i}" in seen for i in range(20000))
+    assert false_positives / 20000 < 0.02
+    assert seen.error_estimate() == pytest.approx(0.01, rel=0.5)
+    seen.close()
+
+
+def test_seen_set_rejects_foreign_file(tmp_path):
+    path = tmp_path / "autre.bin"
+    path.write_bytes(b"pas un filtre de Bloom" * 10)
+    with pytest.raises(ValueError):
+        SeenSet(str(path))
+
+
+def test_seen_hits_are_confirmed_against_the_journal(tmp_path):
+    seen = SeenSet(str(tmp_path / "seen.bloom"), capacity=1000, error_rate=0.01)
+    journal = CrawlJournal(str(tmp_path / "journal.sqlite"))
+    done, pending, unknown, new = (f"https://example.com/p/{i}" for i in range(4))
+    journal.add_urls([done + "/", pending])
+    journal.mark_done(done + "/", {"url": done + "/"})
+    journal.flush()
+    for url in (done, pending, unknown):
+        seen.add(url)  # `pending` et `unknown` jouent les faux positifs du filtre
+    engine = CrawlEngine(canonicalizer=UrlCanonicalizer(), seen=seen, journal=journal, logger=lambda message: None)
+    assert engine.unseen([done, pending, unknown, new]) == [pending, new]
+    assert engine.known_urls == 2
+    assert engine.metrics.counters["seen_false_positive"] == 1
+    journal.close()
+    seen.close()
+
+
+def test_seen_hits_are_confirmed_against_the_fingerprint_store(tmp_path):
+    seen = SeenSet(str(tmp_path / "seen.bloom"), capacity=1000, error_rate=0.01)
+    store = FingerprintStore(str(tmp_path / "fingerprints.sqlite"))
+    store.update("https://example.com/p/1", {"url": "https://example.com/p/1"})
+    seen.add("https://example.com/p/1")
+    seen.add("https://example.com/p/2")
+    engine = CrawlEngine(canonicalizer=UrlCanonicalizer(), seen=seen, incremental=store, logger=lambda message: None)
+    assert engine.unseen(["https://example.com/p/1", "https://example.com/p/2"]) == ["https://example.com/p/2"]
+    store.close()
+    seen.close()
+
+
+PAGE_URL = "https://a.com/jeu-jouet/jardin/page2.htm?tri=prix"
+
+
+@pytest.mark.parametrize(
+    "href, absolute",
+    [
+        ("arrosoir-ref-1.htm", "https://a.com/jeu-jouet/jardin/arrosoir-ref-1.htm"),
+        ("../pelle-ref-2.htm", "https://a.com/jeu-jouet/pelle-ref-2.htm"),
+        ("/jeu-jouet/seau-ref-3.htm", "https://a.com/jeu-jouet/seau-ref-3.htm"),
+        ("//cdn.a.com/p/4", "https://cdn.a.com/p/4"),
+        ("?tri=nom", "https://a.com/jeu-jouet/jardin/page2.htm?tri=nom"),
+        ("  râteau-ref-5.htm#avis ", "https://a.com/jeu-jouet/jardin/râteau-ref-5.htm"),
+        ("#haut", "https://a.com/jeu-jouet/jardin/page2.htm?tri=prix"),
+        ("https://b.com/p/6#x", "https://b.com/p/6"),
+    ],
+)
+def test_resolve_hrefs_offline_follows_urljoin(href, absolute):
+    assert resolve_hrefs_offline([href], PAGE_URL) == [absolute]
+    assert absolute == urljoin(PAGE_URL, href.strip()).split("#")[0]
+
+
+def test_resolve_hrefs_offline_drops_script_mail_and_empty_links():
+    hrefs = ["javascript:void(0)", "mailto:sav@a.com", "tel:+33100000000", "", "p/1"]
+    assert resolve_hrefs_offline(hrefs, PAGE_URL) == ["https://a.com/jeu-jouet/jardin/p/1"]
+
+
+@pytest.mark.parametrize(
+    "head, base",
+    [
+        ("", PAGE_URL),
+        ("<base href='https://cdn.a.com/catalogue/'>", "https://cdn.a.com/catalogue/"),
+        ('<BASE target="_self" HREF="/fr/">', "https://a.com/fr/"),
+        ("<base target='_blank'><base href='../'><base href='/ignoree/'>", "https://a.com/jeu-jouet/"),
+    ],
+)
+def test_document_base_follows_the_first_base_href(head, base):
+    html = f"<html><head>{head}</head><body><a href='p/1#avis'>1</a></body></html>"
+    assert document_base(html, PAGE_URL) == base
+    hrefs = [h for h in extract_all_hrefs(html) if h == "p/1#avis"]
+    assert resolve_hrefs_offline(hrefs, document_base(html, PAGE_URL)) == [urljoin(base, "p/1")]